@@ -0,0 +1,322 @@
+"""
+Chunked audio streaming between the multiplayer server and remote players.
+
+Requests and responses share one TCP connection per client:
+
+    client -> server:  {"song_id": "...", "offset": 0, "length": 65536}\\n
+    server -> client:  {"song_id": "...", "offset": 0, "length": 65536, "total": 3145728, "format": "mp3"}\\n
+                       followed by exactly `length` raw bytes
+
+The server keeps recently streamed files in an LRU cache, so a round's song is
+read from disk once however many players fetch it. The client pipelines range
+requests into a jitter buffer that the decoder reads like a file.
+"""
+import os
+import json
+import asyncio
+import threading
+from collections import OrderedDict
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+MAX_CHUNK_SIZE = 1024 * 1024
+
+
+class AudioCache:
+    """
+    LRU cache of whole audio files, bounded by total size in bytes.
+
+    Concurrent requests for a file that is still being read share one disk
+    read; prefetch() warms the cache ahead of time (read-ahead for the next round).
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.files = OrderedDict()  # path -> bytes, least recently used first
+        self.loading = {}  # path -> future of a read in progress
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, path):
+        """Return the file's bytes, reading it on a worker thread on a miss."""
+        if path in self.files:
+            self.hits += 1
+            self.files.move_to_end(path)
+            return self.files[path]
+
+        if path not in self.loading:
+            self.misses += 1
+            self.loading[path] = asyncio.get_running_loop().run_in_executor(None, self._read, path)
+        try:
+            data = await asyncio.shield(self.loading[path])
+        finally:
+            self.loading.pop(path, None)
+
+        self._store(path, data)
+        return data
+
+    def prefetch(self, path):
+        """Start loading a file in the background if it is not cached yet."""
+        if path not in self.files and path not in self.loading:
+            # A file that cannot be read fails again, visibly, when a player requests it
+            asyncio.ensure_future(self.get(path)).add_done_callback(_retrieve_error)
+
+    @staticmethod
+    def _read(path):
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def _store(self, path, data):
+        if path in self.files or len(data) > self.max_bytes:
+            return
+        self.files[path] = data
+        self.size += len(data)
+        while self.size > self.max_bytes:
+            _, evicted = self.files.popitem(last=False)
+            self.size -= len(evicted)
+
+
+class AudioStreamServer:
+    """Serves byte ranges of the songs that resolve(song_id) allows, from an AudioCache."""
+
+    def __init__(self, resolve, cache=None):
+        self.resolve = resolve  # song_id -> file path, or None if it may not be streamed
+        self.cache = cache or AudioCache()
+        self.server = None
+        self.port = None
+        self.bytes_sent = 0
+        self._connections = {}  # handler task -> writer
+
+    async def start(self, host="0.0.0.0", port=0):
+        self.server = await asyncio.start_server(self.handle_client, host, port, backlog=1024)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self.server
+
+    async def stop(self):
+        """Close open streams and stop listening."""
+        for writer in self._connections.values():
+            writer.close()
+        await asyncio.gather(*self._connections, return_exceptions=True)
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+
+    async def handle_client(self, reader, writer):
+        self._connections[asyncio.current_task()] = writer
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    song_id = request["song_id"]
+                    offset = max(0, int(request.get("offset", 0)))
+                    length = min(MAX_CHUNK_SIZE, max(0, int(request.get("length", DEFAULT_CHUNK_SIZE))))
+                except (ValueError, KeyError, TypeError):
+                    writer.write(b'{"error": "bad request"}\n')
+                    continue
+
+                path = self.resolve(song_id)
+                if path is None:
+                    writer.write(json.dumps({"song_id": song_id, "error": "unknown song"}).encode() + b"\n")
+                    continue
+
+                data = await self.cache.get(path)
+                chunk = data[offset:offset + length]
+                header = {"song_id": song_id, "offset": offset, "length": len(chunk), "total": len(data),
+                          "format": os.path.splitext(path)[1].lstrip('.').lower()}
+                writer.write(json.dumps(header).encode() + b"\n")
+                writer.write(chunk)
+                self.bytes_sent += len(chunk)
+                await writer.drain()
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            writer.close()
+            self._connections.pop(asyncio.current_task(), None)
+
+
+class JitterBuffer:
+    """
+    Reassembles streamed chunks into a seekable, file-like object for the decoder.
+
+    Chunks may arrive late or out of order; only the contiguous prefix is
+    readable. Playback should start once `prebuffer` bytes are buffered so
+    network hiccups are absorbed by the data already received. A read past
+    the buffered data blocks (on the decoder's thread) until it arrives or
+    `timeout` passes; each such wait is counted as an underrun.
+    """
+
+    def __init__(self, total, prebuffer=256 * 1024, timeout=5.0, name_hint=""):
+        self.total = total
+        self.prebuffer = min(prebuffer, total)
+        self.timeout = timeout
+        self.name_hint = name_hint  # File extension, so the decoder knows the format
+        self.data = bytearray()
+        self.pending = {}  # offset -> chunk received ahead of the contiguous prefix
+        self.position = 0
+        self.underruns = 0
+        self.failed = False
+        self.error = None  # Why the stream broke, if it did
+        self._changed = threading.Condition()
+
+    def add(self, offset, chunk):
+        """Store a received chunk (duplicates and overlaps are fine)."""
+        with self._changed:
+            if offset + len(chunk) <= len(self.data):
+                return
+            self.pending[offset] = chunk
+            # Move every chunk that now touches the prefix into it
+            while True:
+                start = next((o for o in self.pending if o <= len(self.data)), None)
+                if start is None:
+                    break
+                piece = self.pending.pop(start)
+                self.data += piece[len(self.data) - start:]
+            self._changed.notify_all()
+
+    def fail(self, error=None):
+        """Mark the stream as broken so blocked reads give up."""
+        with self._changed:
+            self.failed = True
+            self.error = error
+            self._changed.notify_all()
+
+    @property
+    def available(self):
+        return len(self.data)
+
+    def complete(self):
+        return len(self.data) >= self.total
+
+    def ready(self):
+        return len(self.data) >= self.prebuffer
+
+    def wait_ready(self, timeout=None):
+        """Block until the prebuffer is filled; False on timeout or failure."""
+        with self._changed:
+            return self._changed.wait_for(lambda: self.ready() or self.failed, timeout) and not self.failed
+
+    # File-like interface for the decoder
+
+    def read(self, size=-1):
+        with self._changed:
+            end = self.total if size is None or size < 0 else min(self.total, self.position + size)
+            if end > len(self.data) and not self.failed:
+                self.underruns += 1
+                self._changed.wait_for(lambda: len(self.data) >= end or self.failed, self.timeout)
+            chunk = bytes(self.data[self.position:min(end, len(self.data))])
+            self.position += len(chunk)
+            return chunk
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        base = {os.SEEK_SET: 0, os.SEEK_CUR: self.position, os.SEEK_END: self.total}[whence]
+        self.position = max(0, min(self.total, base + offset))
+        return self.position
+
+    def tell(self):
+        return self.position
+
+    def seekable(self):
+        return True
+
+    def readable(self):
+        return True
+
+    def close(self):
+        pass
+
+
+class AudioStreamClient:
+    """Fetches songs from an AudioStreamServer with several range requests in flight."""
+
+    def __init__(self, host, port, chunk_size=DEFAULT_CHUNK_SIZE, window=4):
+        self.host = host
+        self.port = port
+        self.chunk_size = chunk_size
+        self.window = window  # Requests sent ahead of the response being read
+        self.reader = None
+        self.writer = None
+        self.lock = asyncio.Lock()  # One stream at a time per connection
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    async def close(self):
+        self._disconnect()
+
+    def _disconnect(self):
+        """Drop the connection; the next open() starts a new one."""
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+    def _request(self, song_id, offset):
+        self.writer.write(json.dumps({"song_id": song_id, "offset": offset,
+                                      "length": self.chunk_size}).encode() + b"\n")
+
+    async def _response(self, song_id):
+        header = json.loads(await self.reader.readline())
+        if "error" in header:
+            raise ValueError(f"Cannot stream {song_id}: {header['error']}")
+        chunk = await self.reader.readexactly(header["length"])
+        return header, chunk
+
+    async def open(self, song_id, prebuffer=256 * 1024):
+        """Fetch the first chunk and return a JitterBuffer plus a task that fills the rest."""
+        await self.lock.acquire()
+        try:
+            # Checked under the lock: a failing fill may have dropped the connection while we waited
+            if self.writer is None:
+                await self.connect()
+            self._request(song_id, 0)
+            header, chunk = await self._response(song_id)
+        except BaseException:
+            self._disconnect()  # A half-read response would desynchronize the connection
+            self.lock.release()
+            raise
+
+        buffer = JitterBuffer(header["total"], prebuffer, name_hint=header.get("format", ""))
+        buffer.add(0, chunk)
+        task = asyncio.create_task(self._fill(song_id, buffer))
+        task.add_done_callback(_retrieve_error)
+        return buffer, task
+
+    async def _fill(self, song_id, buffer):
+        try:
+            offsets = list(range(self.chunk_size, buffer.total, self.chunk_size))
+            in_flight = 0
+            for offset in offsets[:self.window]:
+                self._request(song_id, offset)
+                in_flight += 1
+            next_index = in_flight
+            while in_flight:
+                header, chunk = await self._response(song_id)
+                in_flight -= 1
+                buffer.add(header["offset"], chunk)
+                if next_index < len(offsets):
+                    self._request(song_id, offsets[next_index])
+                    next_index += 1
+                    in_flight += 1
+        except asyncio.CancelledError:
+            buffer.fail()
+            # Responses still in flight would desynchronize the connection; start a new one next time
+            self._disconnect()
+            raise
+        except (ConnectionError, ValueError, asyncio.IncompleteReadError) as e:
+            buffer.fail(e)
+            self._disconnect()
+            raise
+        finally:
+            self.lock.release()
+
+
+def _retrieve_error(task):
+    """
+    Mark a background task's failure as seen, so asyncio does not warn about it
+    when nobody awaits the task. A fill task's error stays on the buffer
+    (JitterBuffer.error), and awaiting the task still raises it.
+    """
+    if not task.cancelled():
+        task.exception()
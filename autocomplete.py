@@ -0,0 +1,83 @@
+from country_matcher import normalize
+
+
+class _TrieNode:
+    __slots__ = ("children", "suggestions")
+
+    def __init__(self):
+        self.children = {}
+        self.suggestions = []  # Best (priority, label, value) entries for this prefix
+
+
+class PrefixTrie:
+    """
+    Prefix trie over normalized names that answers "suggestions for this prefix".
+
+    Each node caches its best `limit` suggestions when the trie is built, so a
+    lookup only walks the typed prefix: O(len(prefix)) per keystroke no matter
+    how many names are indexed. Suggestions are deduplicated by value.
+    """
+
+    def __init__(self, limit=5):
+        self.limit = limit
+        self.root = _TrieNode()
+
+    def insert(self, name, label, value, priority=0):
+        """Index `name`; a match suggests `label` and selecting it yields `value`."""
+        key = normalize(name)
+        if not key:
+            return
+
+        entry = (priority, len(key), label, value)
+        node = self.root
+        self._offer(node, entry)
+        for char in key:
+            node = node.children.setdefault(char, _TrieNode())
+            self._offer(node, entry)
+
+    def _offer(self, node, entry):
+        """Keep the entry in a node's cached list if it ranks among the best."""
+        suggestions = node.suggestions
+        for i, existing in enumerate(suggestions):
+            if existing[3] == entry[3]:
+                if entry[:2] < existing[:2]:
+                    suggestions[i] = entry
+                    suggestions.sort()
+                return
+
+        if len(suggestions) < self.limit:
+            suggestions.append(entry)
+            suggestions.sort()
+        elif entry[:2] < suggestions[-1][:2]:
+            suggestions[-1] = entry
+            suggestions.sort()
+
+    def suggest(self, prefix):
+        """Return [(label, value)] for names starting with the prefix, best first."""
+        key = normalize(prefix)
+        if not key:
+            return []
+
+        node = self.root
+        for char in key:
+            node = node.children.get(char)
+            if node is None:
+                return []
+        return [(label, value) for _, _, label, value in node.suggestions]
+
+
+def build_country_trie(countries, aliases, display_name=lambda name: name, limit=5):
+    """
+    Build a trie over the given countries and their aliases.
+
+    Canonical names rank above aliases; an alias is shown as "Alias (Country)"
+    and selecting any suggestion yields the country's display name.
+    """
+    trie = PrefixTrie(limit)
+    for country in countries:
+        display = display_name(country)
+        trie.insert(country, display, display, priority=0)
+        trie.insert(display, display, display, priority=0)
+        for alias in aliases.get(country, ()):
+            trie.insert(alias, f"{alias} ({display})", display, priority=1)
+    return trie
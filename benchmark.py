@@ -0,0 +1,159 @@
+"""
+Headless end-to-end benchmarks for Song Ranker and the Song Guessing Game.
+
+Runs either app with the SDL dummy drivers in a scratch directory, drives it
+with a scripted input session (a recorded one or a synthetic one generated
+from the app state) and reports throughput and frame-time percentiles.
+
+Examples:
+    python benchmark.py ranker --votes 500
+    python benchmark.py guessing --rounds 200 --songs 1000
+    python benchmark.py ranker --session my_session.json --output report.json
+"""
+import os
+import sys
+import json
+import wave
+import shutil
+import argparse
+import tempfile
+from time import perf_counter
+
+from headless import configure_headless, ScriptedInput
+from instrumentation import PROFILER
+
+SYNTHETIC_COUNTRIES = ["Albania", "Armenia", "Australia", "Austria", "Belgium", "Croatia", "Cyprus",
+                       "Denmark", "Estonia", "Finland", "France", "Germany", "Greece", "Iceland",
+                       "Ireland", "Israel", "Italy", "Latvia", "Lithuania", "Malta", "Norway",
+                       "Poland", "Portugal", "Serbia", "Slovenia", "Spain", "Sweden", "Ukraine"]
+
+
+def generate_silent_catalog(directory, count):
+    """Write `count` one-second silent WAV files named Country_Artist_Song.wav."""
+    os.makedirs(directory, exist_ok=True)
+    silence = b"\x00\x00" * 8000
+    for i in range(count):
+        country = SYNTHETIC_COUNTRIES[i % len(SYNTHETIC_COUNTRIES)]
+        path = os.path.join(directory, f"{country}_Artist{i}_Song{i}.wav")
+        with wave.open(path, 'wb') as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(8000)
+            f.writeframes(silence)
+
+
+def ranker_script(app, votes):
+    """Open the comparison screen, then alternate votes between the two songs."""
+    center = app.screen_width // 2
+    yield {"mouse": [center, 150], "pressed": True}  # 1. Compare Songs
+    yield {"pressed": False}
+    for i in range(votes):
+        y = 195 if i % 2 == 0 else 345  # Prefer Song 1 / Prefer Song 2
+        yield {"mouse": [center + 150, y], "pressed": True}
+        yield {"pressed": False}
+
+
+def guessing_script(app, rounds):
+    """Start a game, then type the current song's country and advance each round, starting new games as needed."""
+    center = app.screen_width // 2
+    for _ in range(rounds):
+        if not app.game_in_progress:
+            yield {"mouse": [center, 180], "pressed": True}  # Start Game
+            yield {"pressed": False}
+            if not app.game_in_progress:
+                break
+        country, _, _ = app.parse_song_info(app.current_song)
+        events = [{"type": "KEYDOWN", "key": 0, "unicode": char} for char in country]
+        events.append({"type": "KEYDOWN", "key": "K_RETURN"})
+        yield {"events": events}
+        yield {"events": [{"type": "KEYDOWN", "key": "K_RETURN"}]}  # Next song
+
+
+def run_benchmark(app_name, session=None, count=200, songs=0):
+    """Run one headless session in a scratch directory and return the report dict."""
+    configure_headless()
+    source_recordings = os.path.abspath("recordings")
+    original_cwd = os.getcwd()
+    scratch = tempfile.mkdtemp(prefix="esc_bench_")
+
+    try:
+        os.chdir(scratch)
+        if songs:
+            generate_silent_catalog("recordings", songs)
+        elif os.path.isdir(source_recordings):
+            shutil.copytree(source_recordings, "recordings")
+
+        if session:
+            session = os.path.join(original_cwd, session)
+
+        PROFILER.reset()
+        PROFILER.enabled = True
+
+        if app_name == "ranker":
+            from main import SongRanker
+            app = SongRanker(input_source=ScriptedInput([]), headless=True)
+            frames = ranker_script(app, count)
+        else:
+            from song_guessing import SongGuessingGame
+            app = SongGuessingGame(input_source=ScriptedInput([]), headless=True)
+            frames = guessing_script(app, count)
+
+        app.input = ScriptedInput.from_file(session) if session else ScriptedInput(frames)
+        app.frame_rate = 0
+
+        start = perf_counter()
+        app.run()
+        elapsed = perf_counter() - start
+        app.ensure_data_loaded()
+
+        if app_name == "ranker":
+            actions = len(app.comparison_history)
+            action_name = "votes"
+        else:
+            actions = sum(stats["total_guesses"] for stats in app.guess_stats.values())
+            action_name = "guesses"
+
+        summary = PROFILER.summary()
+        return {
+            "app": app_name,
+            "songs": len(app.songs),
+            "frames": app.input.frame_count,
+            "elapsed_s": elapsed,
+            action_name: actions,
+            f"{action_name}_per_s": actions / elapsed if elapsed > 0 else 0.0,
+            "frame_ms": summary.get("frame", {}),
+            "timings": summary
+        }
+    finally:
+        PROFILER.enabled = False
+        os.chdir(original_cwd)
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless throughput and latency benchmark")
+    parser.add_argument("app", choices=["ranker", "guessing"])
+    parser.add_argument("--session", help="Replay a recorded input session instead of a synthetic one")
+    parser.add_argument("--votes", "--rounds", dest="count", type=int, default=200,
+                        help="Votes (ranker) or guesses (guessing) in the synthetic session")
+    parser.add_argument("--songs", type=int, default=0,
+                        help="Generate this many silent songs instead of copying recordings/")
+    parser.add_argument("--output", help="Write the full report to this JSON file")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.app, args.session, args.count, args.songs)
+
+    action_name = "votes" if args.app == "ranker" else "guesses"
+    frame = report["frame_ms"]
+    print(f"{report['app']}: {report['songs']} songs, {report['frames']} frames in {report['elapsed_s']:.2f}s")
+    print(f"{action_name}: {report[action_name]} ({report[action_name + '_per_s']:.1f}/s)")
+    if frame:
+        print(f"frame time: p50 {frame['p50_ms']:.2f}ms, p95 {frame['p95_ms']:.2f}ms, p99 {frame['p99_ms']:.2f}ms")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=4)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
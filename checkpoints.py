@@ -0,0 +1,98 @@
+import os
+import json
+import copy
+
+from ratings import apply_ranking, entry_order, new_rating
+
+DEFAULT_INTERVAL = int(os.environ.get("ESC_CHECKPOINT_INTERVAL", "25"))
+
+
+class RatingCheckpoints:
+    """
+    Snapshots of every song's rating, taken every `interval` history entries.
+
+    The ratings after history entry n are the nearest snapshot at or before n
+    with the entries after it re-applied, so rolling back or looking at an
+    older state replays fewer than `interval` updates however long the history
+    is. Snapshots also pin down rating changes that are not in the history at
+    all, such as a quick sort seeding the ratings or ratings from before the
+    history existed, which is why the first snapshot is the earliest state
+    that can be restored.
+
+    Each snapshot keeps a copy of the entry it follows, so snapshots that no
+    longer match the history (e.g. the history file was edited) are dropped
+    on load.
+    """
+
+    def __init__(self, path, interval=DEFAULT_INTERVAL):
+        self.path = path
+        self.interval = max(1, interval)
+        self.checkpoints = []  # {"index", "last", "rankings"}, oldest first
+
+    def load(self, history):
+        """Read saved snapshots and keep the ones that still match `history`."""
+        self.checkpoints = []
+        if os.path.exists(self.path):
+            with open(self.path, 'r') as f:
+                saved = json.load(f)
+            for checkpoint in saved:
+                index = checkpoint["index"]
+                if index > len(history) or checkpoint["last"] != (history[index - 1] if index else None):
+                    break  # The history diverged here; later snapshots are invalid too
+                self.checkpoints.append(checkpoint)
+            if len(self.checkpoints) != len(saved):
+                self.save()
+
+    def save(self):
+        with open(self.path, 'w') as f:
+            json.dump(self.checkpoints, f)
+
+    def earliest(self):
+        """Index of the oldest state that can be restored, or None without snapshots."""
+        return self.checkpoints[0]["index"] if self.checkpoints else None
+
+    def record(self, history, rankings, force=False):
+        """Snapshot `rankings` as the state after the whole history, if one is due."""
+        index = len(history)
+        if self.checkpoints and not force:
+            if index - self.checkpoints[-1]["index"] < self.interval:
+                return False
+        self.truncate(index - 1 if force else index)
+        self.checkpoints.append({
+            "index": index,
+            "last": history[-1] if history else None,
+            "rankings": copy.deepcopy(rankings)
+        })
+        self.save()
+        return True
+
+    def truncate(self, index):
+        """Forget snapshots taken after history entry `index` (those entries were undone)."""
+        kept = [checkpoint for checkpoint in self.checkpoints if checkpoint["index"] <= index]
+        if len(kept) != len(self.checkpoints):
+            self.checkpoints = kept
+            self.save()
+
+    def rankings_at(self, history, index, songs=()):
+        """
+        Ratings as they were right after the first `index` history entries,
+        or None if that is older than the earliest snapshot. Songs in `songs`
+        that had no rating yet get the default one.
+        """
+        checkpoint = None
+        for candidate in reversed(self.checkpoints):
+            if candidate["index"] <= index:
+                checkpoint = candidate
+                break
+        if checkpoint is None:
+            return None
+
+        rankings = copy.deepcopy(checkpoint["rankings"])
+        for entry in history[checkpoint["index"]:index]:
+            # Quick sort answers only change the ratings when the sort finishes (a forced snapshot)
+            if entry.get("kind") != "seed":
+                apply_ranking(rankings, entry_order(entry))
+        for song in songs:
+            if song not in rankings:
+                rankings[song] = new_rating()
+        return rankings
@@ -0,0 +1,156 @@
+"""
+Bootstrap rank confidence for the Song Ranker.
+
+The comparison history is resampled with replacement and the ratings refit
+from each resample (replayed in the original order with the same update rule
+as the ranker). How far a song's rank moves across resamples shows how
+settled it really is, which a rating's own uncertainty value cannot.
+Resamples run in a process pool so the UI never waits for them.
+"""
+import os
+import random
+import multiprocessing
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from ratings import apply_ranking, entry_order, new_rating
+
+DEFAULT_SAMPLES = int(os.environ.get("ESC_BOOTSTRAP_SAMPLES", "200"))
+
+
+def bootstrap_ranks(song_count, outcomes, samples, seed):
+    """
+    Refit ratings on `samples` resamples of `outcomes` (song index tuples, most
+    preferred first, oldest first) and return one array of ranks per resample,
+    where ranks[i] is song i's 1-based rank. Runs in a worker process.
+    """
+    rng = random.Random(seed)
+    count = len(outcomes)
+    results = []
+    for _ in range(samples):
+        rankings = {song: new_rating() for song in range(song_count)}
+        # Keep the chosen comparisons in time order, as the ratings depend on it
+        for index in sorted(rng.randrange(count) for _ in range(count)):
+            apply_ranking(rankings, outcomes[index])
+        order = sorted(range(song_count), key=lambda song: (-rankings[song]["rating"], song))
+        ranks = array('i', bytes(4 * song_count))
+        for rank, song in enumerate(order, start=1):
+            ranks[song] = rank
+        results.append(ranks)
+    return results
+
+
+def summarize(songs, rank_samples, top_k, interval):
+    """Per-song rank interval, median rank and probability of being in the top k."""
+    tail = (1 - interval) / 2
+    total = len(rank_samples)
+    summary = {}
+    for index, song in enumerate(songs):
+        ranks = sorted(sample[index] for sample in rank_samples)
+        summary[song] = {
+            "low": ranks[int(tail * (total - 1))],
+            "median": ranks[(total - 1) // 2],
+            "high": ranks[int(round((1 - tail) * (total - 1)))],
+            "top_k": sum(1 for rank in ranks if rank <= top_k) / total
+        }
+    return summary
+
+
+class RankConfidence:
+    """
+    Computes bootstrap rank intervals in the background and caches the latest result.
+
+    Call refresh() with the current history and a version that changes with
+    every vote; it starts a new computation only when the version differs from
+    the cached (or running) one. poll() never blocks: it returns the newest
+    finished result, which may belong to an older version while a new one runs.
+    A computation that fails keeps the previous result and is not retried
+    until the version changes.
+    """
+
+    def __init__(self, samples=DEFAULT_SAMPLES, top_k=3, interval=0.9, workers=None):
+        self.samples = samples
+        self.top_k = top_k
+        self.interval = interval
+        self.workers = workers or min(4, os.cpu_count() or 1)
+        self.executor = None
+        self.version = None  # Version of the cached result
+        self.result = None
+        self._pending = None  # (version, songs, futures) of the computation in flight
+        self._failed = None  # Version whose computation failed
+
+    def refresh(self, history, songs, version):
+        """Start recomputing for `version` unless it is already cached or running."""
+        if version in (self.version, self._failed) or (self._pending and self._pending[0] == version):
+            return
+        if self._pending:
+            for future in self._pending[2]:
+                future.cancel()
+            self._pending = None
+
+        songs = list(songs)
+        if not history or len(songs) < 2:
+            self.version, self.result = version, None
+            return
+
+        positions = {song: index for index, song in enumerate(songs)}
+        outcomes = []
+        for entry in history:
+            if entry.get("kind") == "seed":
+                continue  # Quick sort answers never update the ratings directly
+            # Songs no longer in the collection are left out of the order
+            order = tuple(positions[song] for song in entry_order(entry) if song in positions)
+            if len(order) >= 2:
+                outcomes.append(order)
+        if not outcomes:
+            self.version, self.result = version, None
+            return
+
+        if self.executor is None:
+            # Spawned workers start clean instead of forking the app with its pygame state and threads
+            self.executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                mp_context=multiprocessing.get_context("spawn"))
+        # One chunk of resamples per worker, each with its own seed
+        chunks = [self.samples // self.workers + (1 if i < self.samples % self.workers else 0)
+                  for i in range(self.workers)]
+        try:
+            futures = [self.executor.submit(bootstrap_ranks, len(songs), outcomes, chunk, hash((version, i)))
+                       for i, chunk in enumerate(chunks) if chunk]
+        except BrokenProcessPool:
+            self.close()
+            self._failed = version
+            return
+        self._pending = (version, songs, futures)
+
+    def poll(self):
+        """Collect a finished computation if there is one; returns the cached result."""
+        if self._pending and all(future.done() for future in self._pending[2]):
+            version, songs, futures = self._pending
+            self._pending = None
+            try:
+                rank_samples = [ranks for future in futures for ranks in future.result()]
+            except BrokenProcessPool:
+                # A worker died (killed, out of memory); the next computation gets a fresh pool
+                self.close()
+                self._failed = version
+                return self.result
+            except Exception:
+                self._failed = version
+                return self.result
+            self.version = version
+            self.result = {
+                "samples": len(rank_samples),
+                "top_k": self.top_k,
+                "interval": self.interval,
+                "songs": summarize(songs, rank_samples, self.top_k, self.interval)
+            }
+        return self.result
+
+    def computing(self):
+        return self._pending is not None
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
@@ -0,0 +1,146 @@
+"""
+Group consensus rankings over every Song Ranker profile.
+
+All profiles' comparisons are pooled into one Bradley-Terry fit (the same
+solver as time decay, see decay.py, so ESC_DECAY_HALF_LIFE_DAYS applies here
+too). Every comparison counts once, so more active users weigh more. The fit
+is kept up to date incrementally: a profile's history is re-read only when
+its file changed, only its new entries are added to the pooled totals, and
+the fit is warm-started from the previous one.
+
+Examples:
+    python consensus.py                 # group leaderboard of every profile
+    python consensus.py --top 10
+    python consensus.py --watch 2       # redraw whenever someone votes, checking every 2 seconds
+"""
+import os
+import sys
+import json
+import math
+import time
+import argparse
+
+from decay import DecayedRatings
+from leaderboard import Leaderboard
+from profiles import HISTORY_FILE, list_profiles, profile_dir, profile_label
+from ratings import new_rating
+
+
+class ConsensusRanking:
+    """
+    Bradley-Terry ratings over the combined comparison histories of all profiles.
+
+    refresh() polls the profiles' history files. Entries a profile has gained
+    since the last poll are added to the pooled totals, and entries it lost
+    (an undo, or an edited file) are taken back, so a poll costs one file read
+    per profile that changed plus a warm-started refit, however many users there are.
+    """
+
+    def __init__(self, root="", half_life_days=0):
+        self.root = root
+        self.model = DecayedRatings(half_life_days if half_life_days > 0 else math.inf)
+        self.entries = {}  # profile -> history entries in the pooled totals
+        self._stamps = {}  # profile -> (modification time, size) of its history file when last read
+        self.rankings = {}  # song -> rating entry of the consensus fit
+        self.leaderboard = Leaderboard()
+        self.version = 0  # Bumped whenever the consensus changes
+
+    def refresh(self, songs=()):
+        """Fold in every profile's new votes; returns True if the consensus changed."""
+        changed = False
+        profiles = list_profiles(self.root)
+        for profile in profiles:
+            path = os.path.join(profile_dir(profile, self.root), HISTORY_FILE)
+            try:
+                stamp = (os.path.getmtime(path), os.path.getsize(path))
+                if self._stamps.get(profile) == stamp:
+                    continue
+                with open(path, 'r') as f:
+                    history = json.load(f)
+            except (OSError, ValueError):
+                continue  # Removed or caught mid-write; read it on the next poll
+            self._stamps[profile] = stamp
+            changed = self.sync(profile, history) or changed
+
+        for profile in set(self.entries) - set(profiles):
+            changed = self.sync(profile, []) or changed  # Profile deleted
+            self._stamps.pop(profile, None)
+
+        new_songs = [song for song in songs if song not in self.rankings]
+        if changed or new_songs:
+            self.refit(songs)
+        return changed
+
+    def sync(self, profile, history):
+        """Make the pooled totals hold exactly `history` for `profile`; returns True if that changed anything."""
+        known = self.entries.get(profile, [])
+        # Histories grow at the end, and undo only drops their newest entries
+        if len(history) >= len(known) and (not known or history[len(known) - 1] == known[-1]):
+            common = len(known)
+        else:
+            common = 0
+            while common < min(len(known), len(history)) and known[common] == history[common]:
+                common += 1
+
+        for entry in reversed(known[common:]):
+            self.model.remove(entry)
+        for entry in history[common:]:
+            self.model.add(entry)
+        self.entries[profile] = known[:common] + list(history[common:])
+        return common < len(known) or common < len(history)
+
+    def refit(self, songs=()):
+        """Refit the pooled ratings and move songs that drifted in the leaderboard."""
+        for song in list(self.model.games) + list(songs):
+            self.rankings.setdefault(song, new_rating())
+        self.model.fit(self.rankings)
+        self.model.apply(self.rankings)
+        for song, data in self.rankings.items():
+            if song not in self.leaderboard or abs(self.leaderboard.score(song) - data["rating"]) > 0.01:
+                self.leaderboard.update(song, data["rating"])
+        self.version += 1
+
+    def votes(self):
+        """Entries pooled per profile."""
+        return {profile: len(entries) for profile, entries in self.entries.items()}
+
+
+def print_leaderboard(consensus, top):
+    votes = consensus.votes()
+    print(f"Consensus of {len(votes)} profiles, {sum(votes.values())} votes: " +
+          ", ".join(f"{profile_label(profile)} {count}" for profile, count in sorted(votes.items())))
+    for rank, (song, rating) in enumerate(consensus.leaderboard.items(0, top), start=1):
+        uncertainty = consensus.rankings[song]["uncertainty"]
+        print(f"{rank:>4}. {os.path.splitext(song)[0]:<48} {rating:7.1f} ±{uncertainty:.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Group leaderboard pooled from every Song Ranker profile")
+    parser.add_argument("--root", default="", help="Directory holding the profiles/ folder")
+    parser.add_argument("--top", type=int, default=25, help="Songs to show")
+    parser.add_argument("--watch", type=float, metavar="SECONDS",
+                        help="Keep polling the profiles and print the leaderboard again after new votes")
+    parser.add_argument("--half-life", type=float, default=float(os.environ.get("ESC_DECAY_HALF_LIFE_DAYS", "0")),
+                        help="Days for a vote's weight to halve (0: votes never lose weight)")
+    args = parser.parse_args()
+
+    consensus = ConsensusRanking(args.root, args.half_life)
+    consensus.refresh()
+    if not consensus.entries:
+        print("No profiles with a comparison history found.")
+        return 1
+    print_leaderboard(consensus, args.top)
+
+    try:
+        while args.watch:
+            time.sleep(args.watch)
+            if consensus.refresh():
+                print()
+                print_leaderboard(consensus, args.top)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
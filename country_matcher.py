@@ -0,0 +1,212 @@
+import unicodedata
+
+# Canonical country -> accepted alternatives (native names, ISO codes, common misspellings).
+# Canonical names are written the way they appear in recording filenames.
+COUNTRY_ALIASES = {
+    "Albania": ["Shqiperia", "Shqipëria", "AL", "ALB", "Albnia", "Albenia"],
+    "Andorra": ["AD", "AND", "Andora"],
+    "Armenia": ["Hayastan", "Հայաստան", "AM", "ARM", "Armania", "Armeina"],
+    "Australia": ["AU", "AUS", "Austrlia", "Australa", "Straya"],
+    "Austria": ["Österreich", "Osterreich", "Oesterreich", "AT", "AUT", "Austira"],
+    "Azerbaijan": ["Azərbaycan", "Azerbaycan", "AZ", "AZE", "Azerbaijian", "Azerbajan", "Azerbaidjan"],
+    "Belarus": ["Bielaruś", "BY", "BLR", "Belorussia", "Byelorussia"],
+    "Belgium": ["België", "Belgie", "Belgique", "Belgien", "BE", "BEL", "Belguim", "Belgum"],
+    "BosniaAndHerzegovina": ["Bosna i Hercegovina", "Bosnia", "BA", "BIH", "Bosnia Herzegovina"],
+    "Bulgaria": ["Bulgariya", "България", "BG", "BGR", "Bulgeria"],
+    "Croatia": ["Hrvatska", "HR", "HRV", "Croacia", "Croatie"],
+    "Cyprus": ["Kypros", "Κύπρος", "Kıbrıs", "CY", "CYP", "Cyprys", "Cypress"],
+    "Czechia": ["Česko", "Cesko", "Czech Republic", "Czech", "CZ", "CZE", "Chechia", "Czechya"],
+    "Denmark": ["Danmark", "DK", "DNK", "Denmarck", "Denamrk"],
+    "Estonia": ["Eesti", "EE", "EST", "Estona", "Esthonia"],
+    "Finland": ["Suomi", "FI", "FIN", "Finnland", "Finaland"],
+    "France": ["FR", "FRA", "Frnace", "Franse"],
+    "Georgia": ["Sakartvelo", "საქართველო", "GE", "GEO", "Gerogia"],
+    "Germany": ["Deutschland", "DE", "DEU", "Germnay", "Germeny"],
+    "Greece": ["Ellada", "Hellas", "Ελλάδα", "GR", "GRC", "Grece", "Greese"],
+    "Hungary": ["Magyarország", "Magyarorszag", "HU", "HUN", "Hungery"],
+    "Iceland": ["Ísland", "Island", "IS", "ISL", "Icland", "Iceand"],
+    "Ireland": ["Éire", "Eire", "IE", "IRL", "Irland", "Ireand"],
+    "Israel": ["Yisra'el", "Yisrael", "ישראל", "IL", "ISR", "Isreal", "Israil"],
+    "Italy": ["Italia", "IT", "ITA", "Itlay", "Italie"],
+    "Latvia": ["Latvija", "LV", "LVA", "Lativa", "Latvja"],
+    "Lithuania": ["Lietuva", "LT", "LTU", "Lithuana", "Lituania", "Lithuaina"],
+    "Luxembourg": ["Lëtzebuerg", "Letzebuerg", "Luxemburg", "LU", "LUX", "Luxemborg", "Luxenbourg"],
+    "Malta": ["MT", "MLT", "Malat"],
+    "Moldova": ["MD", "MDA", "Moldavia", "Moldava"],
+    "Monaco": ["MC", "MCO", "Monacco"],
+    "Montenegro": ["Crna Gora", "Црна Гора", "ME", "MNE", "Montenegero", "Montenergo"],
+    "Morocco": ["Al-Maghrib", "MA", "MAR", "Marocco", "Moroco"],
+    "Netherlands": ["Nederland", "Holland", "The Netherlands", "NL", "NLD", "Netherland", "Nederlands"],
+    "NorthMacedonia": ["Severna Makedonija", "Macedonia", "MK", "MKD", "North Macedona"],
+    "Norway": ["Norge", "Noreg", "NO", "NOR", "Norwey", "Norwya"],
+    "Poland": ["Polska", "PL", "POL", "Polland", "Poand"],
+    "Portugal": ["PT", "PRT", "Portugual", "Protugal"],
+    "Romania": ["România", "Rumania", "Roumania", "RO", "ROU", "Romainia"],
+    "Russia": ["Rossiya", "Россия", "RU", "RUS", "Rusia"],
+    "SanMarino": ["SM", "SMR", "San Marion"],
+    "Serbia": ["Srbija", "Србија", "RS", "SRB", "Serbija", "Sebria"],
+    "SerbiaAndMontenegro": ["Srbija i Crna Gora", "CS", "SCG"],
+    "Slovakia": ["Slovensko", "SK", "SVK", "Slovakija"],
+    "Slovenia": ["Slovenija", "SI", "SVN", "Slovania", "Slovinia"],
+    "Spain": ["España", "Espana", "ES", "ESP", "Spian", "Spane"],
+    "Sweden": ["Sverige", "SE", "SWE", "Sweeden", "Swedan"],
+    "Switzerland": ["Schweiz", "Suisse", "Svizzera", "Svizra", "CH", "CHE", "Switserland", "Swizerland"],
+    "Turkey": ["Türkiye", "Turkiye", "TR", "TUR", "Turky"],
+    "Ukraine": ["Ukraina", "Україна", "UA", "UKR", "Ukrane", "Ukriane"],
+    "UnitedKingdom": ["UK", "GB", "GBR", "Great Britain", "Britain", "England", "United Kingdon"],
+    "Yugoslavia": ["Jugoslavija", "YU", "YUG"],
+}
+
+MATCH_MODES = ("strict", "exact", "fuzzy")
+
+
+def normalize(text):
+    """Lowercase, strip accents and keep only letters, so 'Österreich' -> 'osterreich'."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in decomposed.lower() if ch.isalpha() and not unicodedata.combining(ch))
+
+
+def max_typos(length):
+    """How many edits fuzzy matching tolerates for an input of this length."""
+    if length < 5:
+        return 0  # Short inputs (ISO codes) must match exactly
+    if length < 9:
+        return 1
+    return 2
+
+
+def bounded_edit_distance(a, b, limit):
+    """
+    Edit distance between a and b counting adjacent swaps as one edit
+    (optimal string alignment), or limit + 1 as soon as it must exceed limit.
+
+    Only the diagonal band |i - j| <= limit is filled in, so the cost is
+    O(limit * len) instead of O(len(a) * len(b)).
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+
+    over = limit + 1
+    width = len(b) + 1
+    before_previous = None
+    previous = [j if j <= limit else over for j in range(width)]
+    for i in range(1, len(a) + 1):
+        current = [over] * width
+        if i <= limit:
+            current[0] = i
+        row_min = current[0]
+        char_a = a[i - 1]
+        for j in range(max(1, i - limit), min(len(b), i + limit) + 1):
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != b[j - 1]))
+            if (before_previous is not None and j > 1 and
+                    char_a == b[j - 2] and a[i - 2] == b[j - 1]):
+                value = min(value, before_previous[j - 2] + 1)
+            current[j] = value
+            if value < row_min:
+                row_min = value
+        if row_min > limit:
+            return over
+        before_previous, previous = previous, current
+    return previous[-1] if previous[-1] <= limit else over
+
+
+def _trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class CountryMatcher:
+    """
+    Matches typed guesses against country names using a precomputed alias index.
+
+    Every canonical name, native name, ISO code and listed misspelling is
+    normalized once. Exact lookups are a dict hit; fuzzy lookups only run a
+    bounded edit distance against aliases sharing enough trigrams with the input.
+
+    Modes:
+        strict - only the canonical English name is accepted
+        exact  - any known alias is accepted, spelled exactly (accents/case ignored)
+        fuzzy  - any known alias, tolerating a few typos when unambiguous
+    """
+
+    def __init__(self, countries=(), aliases=COUNTRY_ALIASES):
+        self.canonical = {}  # normalized canonical name -> country
+        self.alias_index = {}  # normalized alias -> country
+        self.trigram_index = {}  # trigram -> set of normalized aliases
+
+        for country, names in aliases.items():
+            self.add_country(country, names)
+        for country in countries:
+            if normalize(country) not in self.canonical:
+                self.add_country(country, [])
+
+    def add_country(self, country, aliases=()):
+        """Register a country (as named in filenames) with its aliases."""
+        key = normalize(country)
+        self.canonical[key] = country
+        for name in [country] + list(aliases):
+            alias = normalize(name)
+            if not alias or alias in self.alias_index:
+                continue
+            self.alias_index[alias] = country
+            for trigram in _trigrams(alias):
+                self.trigram_index.setdefault(trigram, set()).add(alias)
+
+    def aliases_for(self, country):
+        """Return every normalized alias of a country."""
+        return [alias for alias, owner in self.alias_index.items() if owner == country]
+
+    def lookup(self, text, mode="fuzzy"):
+        """Return the country a guess refers to, or None if it matches nothing."""
+        query = normalize(text)
+        if not query:
+            return None
+
+        if mode == "strict":
+            return self.canonical.get(query)
+
+        if query in self.alias_index:
+            return self.alias_index[query]
+        if mode == "exact":
+            return None
+
+        limit = max_typos(len(query))
+        if limit == 0:
+            return None
+
+        # Each edit (including a swap) breaks at most 4 trigrams, so a true match
+        # must share at least this many with the query; everything else is skipped
+        query_trigrams = _trigrams(query)
+        required = max(1, len(query_trigrams) - 4 * limit)
+        shared = {}
+        for trigram in query_trigrams:
+            for alias in self.trigram_index.get(trigram, ()):
+                shared[alias] = shared.get(alias, 0) + 1
+
+        best_country = None
+        best_distance = limit + 1
+        ambiguous = False
+        # Likely matches first: once one is found, the rest only need checking up to its distance
+        for alias, count in sorted(shared.items(), key=lambda item: -item[1]):
+            if count < required or abs(len(alias) - len(query)) > limit:
+                continue
+            distance = bounded_edit_distance(query, alias, min(limit, best_distance))
+            if distance > limit:
+                continue
+            country = self.alias_index[alias]
+            if distance < best_distance:
+                best_country, best_distance, ambiguous = country, distance, False
+            elif distance == best_distance and country != best_country:
+                ambiguous = True
+
+        return None if ambiguous else best_country
+
+    def canonical_country(self, country):
+        """Canonical name of a country as written in a filename, adding it if it is not known yet."""
+        if normalize(country) not in self.canonical:
+            self.add_country(country)
+        return self.canonical[normalize(country)]
+
+    def is_correct(self, text, country, mode="fuzzy"):
+        """True if the guess refers to the given country under the chosen mode."""
+        return self.lookup(text, mode) == self.canonical_country(country)
@@ -1,20 +1,284 @@
-import json
+"""
+Analytics over the Song Ranker and guessing game data files.
+
+Every command streams its input (comparison history, rankings, listening and
+guess stats) element by element, so memory grows with the number of songs,
+never with the length of the history.
+
+Examples:
+    python data_exploration.py                      # current ratings, best first
+    python data_exploration.py trajectory --song Sweden --song Finland
+    python data_exploration.py winrates --min-comparisons 5
+    python data_exploration.py listening --bucket 30
+    python data_exploration.py countries --csv countries.csv
+    python data_exploration.py cycles               # preference loops such as A > B > C > A
+    python data_exploration.py contradictions       # majority results the ratings disagree with
+    python data_exploration.py winrates --profile alice
+"""
+import os
+import sys
+import csv
+import argparse
+from datetime import datetime
+
+from guess_log import SNAPSHOT_OFFSET
+from json_stream import iter_array, iter_object
+from latency import P2Quantile
+from leaderboard import Leaderboard
+from pairwise import WinMatrix
+from profiles import profile_dir
+from ratings import entry_order, implied_pairs, replay
+
+RANKINGS_FILE = "song_rankings.json"
+HISTORY_FILE = "comparison_history.json"
+LISTENING_FILE = "listening_stats.json"
+GUESS_STATS_FILE = "song_guess_stats.json"
+TEXT_COLUMNS = {"song": 48, "country": 20, "preferred": 40, "rated_higher": 40, "loop": 1}  # Left-aligned columns and their widths
+
+
+def song_label(filename):
+    return os.path.splitext(filename)[0]
+
+
+def song_country(filename):
+    return filename.split('_')[0]
+
+
+def entry_time(entry):
+    """Wall-clock time of a history entry; older entries only have seconds since their session started."""
+    if "timestamp" in entry:
+        return datetime.fromtimestamp(entry["timestamp"]).isoformat(sep=" ", timespec="seconds")
+    return entry.get("time", "")
+
+
+def stream_array(path):
+    return iter_array(path) if os.path.exists(path) else iter(())
+
+
+def stream_object(path):
+    return iter_object(path) if os.path.exists(path) else iter(())
+
+
+# Commands: each returns (columns, rows) where rows may be a generator
+
+def ratings_report(args):
+    """Current ratings, best first."""
+    leaderboard = Leaderboard({filename: details["rating"] for filename, details in stream_object(args.rankings)})
+    columns = ["rank", "country", "rating", "song"]
+    rows = ((rank, song_country(filename), round(rating, 1), song_label(filename))
+            for rank, (filename, rating) in enumerate(leaderboard.items(), start=1))
+    return columns, rows
+
+
+def trajectory_report(args):
+    """Rating of each song after every comparison or ranking round, replayed from the history."""
+    patterns = [pattern.lower() for pattern in args.song or []]
+
+    def rows():
+        for index, (entry, order, rankings) in enumerate(replay(stream_array(args.history)), start=1):
+            if index % args.every:
+                continue
+            for position, song in enumerate(order, start=1):
+                if patterns and not any(pattern in song.lower() for pattern in patterns):
+                    continue
+                data = rankings[song]
+                if len(order) == 2:
+                    result = "won" if position == 1 else "lost"
+                else:
+                    result = f"placed {position}/{len(order)}"
+                yield (index, entry_time(entry), song_label(song), round(data["rating"], 1),
+                       round(data["uncertainty"], 1), result)
+
+    return ["comparison", "time", "song", "rating", "uncertainty", "result"], rows()
+
+
+def winrates_report(args):
+    """Wins, losses and win rate per song."""
+    wins = {}
+    losses = {}
+    for entry in stream_array(args.history):
+        # A ranking round counts as every pairwise result it implies
+        for winner, loser in implied_pairs(entry_order(entry)):
+            wins[winner] = wins.get(winner, 0) + 1
+            losses[loser] = losses.get(loser, 0) + 1
+
+    rates = Leaderboard()
+    for song in set(wins) | set(losses):
+        total = wins.get(song, 0) + losses.get(song, 0)
+        if total >= args.min_comparisons:
+            rates.update(song, wins.get(song, 0) / total * 100)
+
+    rows = ((song_label(song), wins.get(song, 0), losses.get(song, 0), round(rate, 1))
+            for song, rate in rates.items())
+    return ["song", "wins", "losses", "win_rate"], rows
+
+
+def listening_report(args):
+    """Distribution of average listen time per song, as a histogram plus percentiles."""
+    quantiles = {q: P2Quantile(q) for q in (0.1, 0.5, 0.9)}
+    buckets = {}
+    songs = listens = 0
+    total_time = 0.0
+
+    for _, stats in stream_object(args.listening):
+        if not stats.get("listen_count"):
+            continue
+        average = stats["average_listen_time"]
+        songs += 1
+        listens += stats["listen_count"]
+        total_time += stats["total_listen_time"]
+        for estimator in quantiles.values():
+            estimator.add(average)
+        bucket = int(average // args.bucket)
+        buckets[bucket] = buckets.get(bucket, 0) + 1
+
+    if songs:
+        print(f"{songs} songs, {listens} listens, {total_time / 3600:.1f} hours in total", file=sys.stderr)
+        print("average listen time per song: " +
+              ", ".join(f"p{int(q * 100)} {estimator.value():.1f}s" for q, estimator in quantiles.items()),
+              file=sys.stderr)
+
+    rows = ((f"{bucket * args.bucket:g}-{(bucket + 1) * args.bucket:g}s", count, round(count / songs * 100, 1))
+            for bucket, count in sorted(buckets.items()))
+    return ["average_listen_time", "songs", "percent"], rows
+
+
+def countries_report(args):
+    """Per-country aggregates of ratings, comparisons, listening and guessing."""
+    countries = {}
+
+    def country(filename):
+        name = song_country(filename)
+        if name not in countries:
+            countries[name] = {"songs": 0, "rating_total": 0.0, "wins": 0, "losses": 0,
+                               "listens": 0, "listen_time": 0.0, "guesses": 0, "correct": 0}
+        return countries[name]
+
+    for filename, details in stream_object(args.rankings):
+        entry = country(filename)
+        entry["songs"] += 1
+        entry["rating_total"] += details["rating"]
+    for history_entry in stream_array(args.history):
+        for winner, loser in implied_pairs(entry_order(history_entry)):
+            country(winner)["wins"] += 1
+            country(loser)["losses"] += 1
+    for filename, stats in stream_object(args.listening):
+        entry = country(filename)
+        entry["listens"] += stats.get("listen_count", 0)
+        entry["listen_time"] += stats.get("total_listen_time", 0)
+    for filename, stats in stream_object(args.guess_stats):
+        if filename == SNAPSHOT_OFFSET:
+            continue
+        entry = country(filename)
+        entry["guesses"] += stats.get("total_guesses", 0)
+        entry["correct"] += stats.get("correct_guesses", 0)
+
+    def ratio(part, whole, scale=100):
+        return round(part / whole * scale, 1) if whole else ""
+
+    rows = ((name, c["songs"], ratio(c["rating_total"], c["songs"], 1), c["wins"], c["losses"],
+             ratio(c["wins"], c["wins"] + c["losses"]), c["listens"], round(c["listen_time"] / 60, 1),
+             ratio(c["correct"], c["guesses"]))
+            for name, c in sorted(countries.items()))
+    return ["country", "songs", "mean_rating", "wins", "losses", "win_rate", "listens", "listen_minutes",
+            "guess_rate"], rows
+
+
+def cycles_report(args):
+    """Groups of songs whose majority preferences loop, with one shortest loop each."""
+    matrix = WinMatrix.from_history(stream_array(args.history))
+    components = matrix.components()
+    print(f"{matrix.total} comparisons of {sum(1 for _ in matrix.pairs())} pairs, "
+          f"{len(components)} preference cycles", file=sys.stderr)
+
+    rows = ((number, len(component), " > ".join(song_label(song) for song in cycle + cycle[:1]))
+            for number, component in enumerate(components, start=1)
+            for cycle in [matrix.shortest_cycle(component)])
+    return ["cycle", "songs", "loop"], rows
+
+
+def contradictions_report(args):
+    """Pairs where the song preferred more often is rated lower, biggest rating gap first."""
+    matrix = WinMatrix.from_history(stream_array(args.history))
+    ratings = {filename: details["rating"] for filename, details in stream_object(args.rankings)}
+    rows = ((song_label(preferred), song_label(other), wins, losses, round(gap, 1))
+            for preferred, other, wins, losses, gap in matrix.contradicted_pairs(ratings))
+    return ["preferred", "rated_higher", "wins", "losses", "rating_gap"], rows
+
+
+COMMANDS = {
+    "ratings": ratings_report,
+    "trajectory": trajectory_report,
+    "winrates": winrates_report,
+    "listening": listening_report,
+    "countries": countries_report,
+    "cycles": cycles_report,
+    "contradictions": contradictions_report,
+}
+
+
+def write_rows(columns, rows, csv_path=None):
+    """Stream rows to a CSV file ("-" for stdout) or as aligned text."""
+    if csv_path:
+        f = sys.stdout if csv_path == "-" else open(csv_path, 'w', newline='', encoding='utf-8')
+        try:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            writer.writerows(rows)
+        finally:
+            if f is not sys.stdout:
+                f.close()
+        return
+
+    # Fixed column widths, so rows can be printed as they are produced
+    def cell(name, value):
+        if name in TEXT_COLUMNS:
+            return f"{value:<{TEXT_COLUMNS[name]}}"
+        return f"{value:>{max(10, len(name))}}"
+
+    print("  ".join(cell(name, name) for name in columns))
+    for row in rows:
+        print("  ".join(cell(name, value) for name, value in zip(columns, row)))
 
 
 def main():
-    # Load data from the JSON file
-    with open("song_rankings.json", "r") as f:
-        data = json.load(f)
+    parser = argparse.ArgumentParser(description="Song Ranker and guessing game analytics")
+    parser.add_argument("command", nargs="?", default="ratings", choices=sorted(COMMANDS))
+    parser.add_argument("--csv", help="Export the rows to this CSV file ('-' for stdout)")
+    parser.add_argument("--profile", default=os.environ.get("ESC_PROFILE", ""),
+                        help="Read this user's files from profiles/<name>/ (default: ESC_PROFILE)")
+    parser.add_argument("--rankings")
+    parser.add_argument("--history")
+    parser.add_argument("--listening")
+    parser.add_argument("--guess-stats", default=GUESS_STATS_FILE,
+                        help="Guessing game stats; the game has no profiles, so every profile shares them")
+    parser.add_argument("--song", action="append",
+                        help="trajectory: only songs whose filename contains this text (repeatable)")
+    parser.add_argument("--every", type=int, default=1, help="trajectory: report every Nth comparison")
+    parser.add_argument("--min-comparisons", type=int, default=1, help="winrates: skip songs compared less")
+    parser.add_argument("--bucket", type=float, default=15.0, help="listening: histogram bucket width in seconds")
+    args = parser.parse_args()
+
+    # Ranker files not given explicitly come from the profile's directory (guess stats are shared)
+    directory = profile_dir(args.profile)
+    args.rankings = args.rankings or os.path.join(directory, RANKINGS_FILE)
+    args.history = args.history or os.path.join(directory, HISTORY_FILE)
+    args.listening = args.listening or os.path.join(directory, LISTENING_FILE)
 
-    # Sort the songs by rating in descending order
-    sorted_files = sorted(data.items(), key=lambda item: item[1]["rating"], reverse=True)
+    if args.command == "ratings" and not args.csv:
+        # Display the songs with ranking, country name, and rating (rounded to 1 decimal)
+        _, rows = ratings_report(args)
+        for rank, country, rating, _ in rows:
+            print(f"{rank}. {country} - {rating}")
+        return 0
 
-    # Display the songs with ranking, country name, and rating (rounded to 1 decimal)
-    for rank, (filename, details) in enumerate(sorted_files, start=1):
-        country = filename.split('_')[0]
-        rating = round(details["rating"], 1)
-        print(f"{rank}. {country} - {rating}")
+    columns, rows = COMMANDS[args.command](args)
+    try:
+        write_rows(columns, rows, args.csv)
+    except BrokenPipeError:
+        pass  # Output piped into head or similar
+    return 0
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,179 @@
+"""
+Time-decayed ratings for the Song Ranker.
+
+With decay enabled, a comparison's weight halves every ESC_DECAY_HALF_LIFE_DAYS
+days, and ratings are a weighted Bradley-Terry fit of all comparisons (ranking
+rounds count as every pair they imply) instead of the running Elo updates.
+
+Weights are kept relative to a fixed reference time, so time passing never
+requires re-weighting old comparisons: exponential decay scales all of them by
+the same factor, which leaves the fit unchanged except against the prior. The
+prior (a win and a loss against an average song, weighted as of now) therefore
+grows instead, pulling songs with only old evidence back towards the middle.
+A vote adds one weight and the fit is warm-started from the previous
+strengths, so one or two Newton steps settle it.
+"""
+import math
+import time
+
+import numpy as np
+
+from ratings import DEFAULT_RATING, DEFAULT_UNCERTAINTY, MIN_UNCERTAINTY, entry_order, implied_pairs
+
+SECONDS_PER_DAY = 86400.0
+ELO_SCALE = 400 / math.log(10)  # Rating points per unit of log strength
+PRIOR_GAMES = 1.0  # Virtual win and loss per song against an average song
+REBASE_EXPONENT = 64  # Move the reference time before weights get this many halvings away from it
+
+
+def entry_timestamp(entry, default):
+    """Wall-clock time of a history entry; entries from before timestamps were recorded get `default`."""
+    return entry.get("timestamp", default)
+
+
+class DecayedRatings:
+    """
+    Weighted Bradley-Terry ratings over a comparison history with exponential time decay.
+
+    `games[song][other]` is the total weight of their comparisons and `won[song]`
+    the weight of the comparisons `song` won, both in units of the reference time.
+    """
+
+    MAX_STEP = 1.0  # Largest change of a log strength per Newton step, for far-off starting points
+
+    def __init__(self, half_life_days, reference=None):
+        self.half_life = half_life_days * SECONDS_PER_DAY
+        self.reference = time.time() if reference is None else reference
+        self.games = {}  # song -> {other: weight of their comparisons}
+        self.won = {}  # song -> weight of comparisons won
+        self.strengths = {}  # song -> Bradley-Terry strength (1 is an average song)
+        self.information = {}  # song -> Fisher information of its log strength at the last fit
+        self.legacy_time = self.reference  # Timestamp given to entries recorded without one
+
+    @classmethod
+    def from_history(cls, history, half_life_days, now=None):
+        """Aggregate a whole history; entries without a timestamp count from the oldest one that has."""
+        now = time.time() if now is None else now
+        legacy_time = next((entry["timestamp"] for entry in history if "timestamp" in entry), now)
+        model = cls(half_life_days, reference=legacy_time)
+        for entry in history:
+            model.add(entry)
+        return model
+
+    def weight(self, timestamp):
+        """Weight of a comparison made at `timestamp`, relative to the reference time."""
+        if (timestamp - self.reference) / self.half_life > REBASE_EXPONENT:
+            self._rebase(timestamp)
+        return 2 ** ((timestamp - self.reference) / self.half_life)
+
+    def add(self, entry, sign=1):
+        """Add a history entry's pairwise results (sign=-1 takes them back)."""
+        timestamp = entry_timestamp(entry, self.legacy_time)
+        weight = sign * self.weight(timestamp)
+        for winner, loser in implied_pairs(entry_order(entry)):
+            self.won[winner] = self.won.get(winner, 0.0) + weight
+            self.won.setdefault(loser, 0.0)
+            for song, other in ((winner, loser), (loser, winner)):
+                row = self.games.setdefault(song, {})
+                total = row.get(other, 0.0) + weight
+                if total > 1e-12 * abs(weight):
+                    row[other] = total
+                else:
+                    row.pop(other, None)  # Fully taken back
+
+    def remove(self, entry):
+        """Take back an undone history entry."""
+        self.add(entry, sign=-1)
+
+    def _rebase(self, timestamp):
+        """Move the reference time forward so weights stay within floating point range."""
+        scale = 2 ** ((self.reference - timestamp) / self.half_life)
+        self.reference = timestamp
+        for song in self.won:
+            self.won[song] *= scale
+        for row in self.games.values():
+            for other in row:
+                row[other] *= scale
+
+    def fit(self, songs=(), now=None, max_steps=20, tolerance=1e-3):
+        """
+        Refit the strengths by Newton steps on the log strengths, warm-started
+        from the previous fit. Newton converges quadratically, so once a step
+        moves no log strength more than `tolerance` the error left is about its
+        square and fitting stops. Returns the number of steps.
+        """
+        now = time.time() if now is None else now
+        prior = PRIOR_GAMES * self.weight(now)
+        names = list(dict.fromkeys([*self.strengths, *self.games, *songs]))
+        count = len(names)
+        if not count:
+            return 0
+        index = {song: i for i, song in enumerate(names)}
+
+        # Each compared pair once, as (song index, other index, weight of their comparisons)
+        edges = [(index[song], index[other], weight) for song, row in self.games.items()
+                 for other, weight in row.items() if index[song] < index[other]]
+        first = np.array([edge[0] for edge in edges], dtype=int)
+        second = np.array([edge[1] for edge in edges], dtype=int)
+        weights = np.array([edge[2] for edge in edges], dtype=float)
+        won = np.array([self.won.get(song, 0.0) for song in names]) + prior
+        theta = np.log([self.strengths.get(song, 1.0) for song in names])
+
+        steps = 0
+        for steps in range(1, max_steps + 1):
+            # Chance of each first song beating its second, and of each song beating the prior's average song
+            p = 1 / (1 + np.exp(theta[second] - theta[first]))
+            p_prior = 1 / (1 + np.exp(-theta))
+            expected = (np.bincount(first, weights * p, count) + np.bincount(second, weights * (1 - p), count)
+                        + 2 * prior * p_prior)
+            curvature = weights * p * (1 - p)
+            diagonal = (np.bincount(first, curvature, count) + np.bincount(second, curvature, count)
+                        + 2 * prior * p_prior * (1 - p_prior))
+
+            step = _solve_laplacian(diagonal, first, second, curvature, won - expected, tolerance / 10)
+            largest = np.abs(step).max()
+            theta += step * min(1.0, self.MAX_STEP / largest) if largest > 0 else step
+            if largest < tolerance:
+                break
+
+        self.strengths = {song: math.exp(theta[i]) for i, song in enumerate(names)}
+        self.information = {song: diagonal[i] for i, song in enumerate(names)}
+        return steps
+
+    def apply(self, rankings):
+        """Write the fitted ratings and their standard errors into `rankings` entries."""
+        for song, entry in rankings.items():
+            if song not in self.strengths:
+                continue
+            entry["rating"] = DEFAULT_RATING + ELO_SCALE * math.log(self.strengths[song])
+            # The information still left in the decayed comparisons sets the rating's standard error
+            uncertainty = ELO_SCALE / math.sqrt(self.information[song])
+            entry["uncertainty"] = min(DEFAULT_UNCERTAINTY, max(MIN_UNCERTAINTY, uncertainty))
+
+
+def _solve_laplacian(diagonal, first, second, curvature, rhs, tolerance):
+    """
+    Solve H x = rhs, where H has `diagonal` on its diagonal and -curvature at
+    every compared pair (a weighted graph Laplacian plus the prior, so positive
+    definite). Conjugate gradients with a diagonal preconditioner: each
+    iteration costs one pass over the compared pairs, so large collections
+    never build the dense songs x songs matrix.
+    """
+    count = len(rhs)
+    solution = np.zeros(count)
+    residual = rhs.copy()
+    preconditioned = residual / diagonal
+    direction = preconditioned.copy()
+    product = residual @ preconditioned
+    for _ in range(count):
+        if np.abs(preconditioned).max() < tolerance:
+            break
+        applied = (diagonal * direction - np.bincount(first, curvature * direction[second], count)
+                   - np.bincount(second, curvature * direction[first], count))
+        length = product / (direction @ applied)
+        solution += length * direction
+        residual -= length * applied
+        preconditioned = residual / diagonal
+        previous, product = product, residual @ preconditioned
+        direction = preconditioned + (product / previous) * direction
+    return solution
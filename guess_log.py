@@ -0,0 +1,180 @@
+import os
+import json
+from latency import LatencySketch
+from leaderboard import Leaderboard
+
+SNAPSHOT_OFFSET = "log_offset"  # Key in each snapshot file: how far into the log it reaches
+
+
+def new_song_stats():
+    return {
+        "correct_guesses": 0,
+        "total_guesses": 0,
+        "correct_rate": 0.0
+    }
+
+
+def new_game_stats():
+    return {
+        "total_games": 0,
+        "untimed_games": 0,
+        "untimed_points": 0,
+        "avg_untimed_score": 0.0,
+        "timed_games": 0,
+        "timed_points": 0,
+        "avg_timed_score": 0.0,
+    }
+
+
+def upgrade_game_stats(stats):
+    """
+    Bring game stats saved before timed rounds existed up to the per-mode keys.
+    Those games were all untimed, so their totals carry over as the untimed ones.
+    """
+    if "untimed_games" not in stats:
+        games, points = stats.pop("total_games", 0), stats.pop("total_points", 0)
+        stats.pop("avg_score", None)
+        stats.update(new_game_stats(), total_games=games, untimed_games=games, untimed_points=points,
+                     avg_untimed_score=points / games if games else 0.0)
+    return stats
+
+
+def write_snapshot(path, data, offset, indent=None):
+    """
+    Write a view snapshot tagged with the log offset it covers. The file is
+    replaced atomically, so a crash leaves either the old snapshot or the new one.
+    """
+    temp_path = path + ".tmp"
+    with open(temp_path, 'w') as f:
+        json.dump({**data, SNAPSHOT_OFFSET: offset}, f, indent=indent)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+class GuessLog:
+    """
+    Append-only log of guessing game events, one JSON object per line.
+
+    Event types:
+        baseline - totals carried over from before the log existed
+        guess    - one submitted guess (song, raw input, match result, timing)
+        game_end - a finished game and its score
+
+    Appending writes a single line, so logging a guess costs the same no
+    matter how long the history is. Offsets returned by read() are byte
+    positions, letting callers resume a replay where a snapshot left off.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def exists(self):
+        return os.path.exists(self.path) and os.path.getsize(self.path) > 0
+
+    def size(self):
+        return os.path.getsize(self.path) if os.path.exists(self.path) else 0
+
+    def append(self, event):
+        """Append one event and flush it to disk; returns the new end offset."""
+        if self._file is None:
+            self._file = open(self.path, 'a', encoding='utf-8')
+        self._file.write(json.dumps(event, ensure_ascii=False) + "\n")
+        self._file.flush()
+        return self._file.tell()
+
+    def read(self, offset=0):
+        """Yield (event, end_offset) pairs from a byte offset; a torn last line is skipped."""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                offset += len(line)
+                if not line.endswith(b"\n"):
+                    break  # Partially written final line
+                yield json.loads(line), offset
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class GuessViews:
+    """
+    Aggregates derived from the guess log: per-song guess stats, overall game
+    stats and answer-time sketches per song and per player. Guessed songs are
+    also kept ordered by correct rate, so the best and worst k are an O(log n + k)
+    read instead of a sort of the whole catalog.
+
+    apply() folds one event in incrementally; rebuilding from scratch is just
+    applying every event of the log in order.
+    """
+
+    def __init__(self, guess_stats=None, game_stats=None, song_latency=None, player_latency=None):
+        self.guess_stats = guess_stats if guess_stats is not None else {}
+        self.game_stats = upgrade_game_stats(game_stats) if game_stats is not None else new_game_stats()
+        self.song_latency = song_latency if song_latency is not None else {}  # song -> LatencySketch
+        self.player_latency = player_latency if player_latency is not None else {}  # player -> LatencySketch
+        self.accuracy = Leaderboard({song: stats["correct_rate"] for song, stats in self.guess_stats.items()
+                                     if stats["total_guesses"] > 0})
+
+    @classmethod
+    def rebuild(cls, log):
+        """Replay the whole log into fresh views; returns (views, end_offset)."""
+        views = cls()
+        offset = 0
+        for event, offset in log.read():
+            views.apply(event)
+        return views, offset
+
+    def apply(self, event):
+        kind = event.get("type")
+        if kind == "guess":
+            self._apply_guess(event["song"], event["correct"])
+            if event.get("time_to_answer") is not None:
+                self._apply_latency(event["song"], event.get("player"), event["time_to_answer"])
+        elif kind == "game_end":
+            self._apply_game_end(event["score"], event.get("timed", False))
+        elif kind == "baseline":
+            for song, stats in event.get("guess_stats", {}).items():
+                self.guess_stats[song] = dict(stats)
+                if stats["total_guesses"] > 0:
+                    self.accuracy.update(song, stats["correct_rate"])
+            self.game_stats.update(upgrade_game_stats(dict(event.get("game_stats", {}))))
+
+    def _apply_guess(self, song, correct):
+        stats = self.guess_stats.setdefault(song, new_song_stats())
+        stats["total_guesses"] += 1
+        if correct:
+            stats["correct_guesses"] += 1
+            stats["streak"] = stats.get("streak", 0) + 1
+        else:
+            stats["streak"] = 0
+        stats["correct_rate"] = stats["correct_guesses"] / stats["total_guesses"] * 100.0
+        self.accuracy.update(song, stats["correct_rate"])
+
+    def _apply_latency(self, song, player, seconds):
+        self.song_latency.setdefault(song, LatencySketch()).add(seconds)
+        if player:
+            self.player_latency.setdefault(player, LatencySketch()).add(seconds)
+
+    def latency_to_dict(self):
+        return {"songs": {song: sketch.to_dict() for song, sketch in self.song_latency.items()},
+                "players": {player: sketch.to_dict() for player, sketch in self.player_latency.items()}}
+
+    @staticmethod
+    def latency_from_dict(data):
+        """Return (song_latency, player_latency) from a saved snapshot."""
+        return ({song: LatencySketch.from_dict(d) for song, d in data.get("songs", {}).items()},
+                {player: LatencySketch.from_dict(d) for player, d in data.get("players", {}).items()})
+
+    def _apply_game_end(self, score, timed):
+        # Timed rounds score up to 10 points per song, so each mode keeps its own totals
+        mode = "timed" if timed else "untimed"
+        self.game_stats["total_games"] += 1
+        self.game_stats[f"{mode}_games"] += 1
+        self.game_stats[f"{mode}_points"] += score
+        self.game_stats[f"avg_{mode}_score"] = self.game_stats[f"{mode}_points"] / self.game_stats[f"{mode}_games"]
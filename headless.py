@@ -0,0 +1,156 @@
+import os
+import json
+import pygame
+
+
+def configure_headless():
+    """Point SDL at its dummy video and audio drivers; call before pygame.init()."""
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    os.environ["SDL_AUDIODRIVER"] = "dummy"
+
+
+class PygameInput:
+    """Live input straight from pygame (the default event source)."""
+
+    def get_events(self):
+        return pygame.event.get()
+
+    def mouse_pos(self):
+        return pygame.mouse.get_pos()
+
+    def mouse_pressed(self):
+        return pygame.mouse.get_pressed()[0]
+
+    def delay(self, milliseconds):
+        pygame.time.delay(milliseconds)
+
+    def close(self):
+        pass
+
+
+def _event_to_dict(event):
+    """Serialize the event types the applications react to."""
+    data = {"type": event.type}
+    if event.type == pygame.KEYDOWN:
+        data["key"] = event.key
+        data["unicode"] = event.unicode
+    elif event.type == pygame.MOUSEWHEEL:
+        data["y"] = event.y
+    elif event.type == pygame.VIDEORESIZE:
+        data["size"] = list(event.size)
+    elif event.type != pygame.QUIT:
+        return None
+    return data
+
+
+def _event_from_dict(data):
+    """Build a pygame event; types and keys may be ints or names like "KEYDOWN"/"K_a"."""
+    attributes = dict(data)
+    event_type = attributes.pop("type")
+    if isinstance(event_type, str):
+        event_type = getattr(pygame, event_type)
+
+    if isinstance(attributes.get("key"), str):
+        attributes["key"] = getattr(pygame, attributes["key"])
+    if event_type == pygame.KEYDOWN:
+        attributes.setdefault("unicode", "")
+        attributes.setdefault("mod", 0)
+    if "size" in attributes:
+        attributes["size"] = tuple(attributes["size"])
+        attributes.setdefault("w", attributes["size"][0])
+        attributes.setdefault("h", attributes["size"][1])
+
+    return pygame.event.Event(event_type, attributes)
+
+
+class RecordingInput(PygameInput):
+    """Live pygame input that also records every frame to a replayable session file."""
+
+    def __init__(self, path):
+        self.path = path
+        self.frames = []
+
+    def get_events(self):
+        events = pygame.event.get()
+        recorded = [data for data in (_event_to_dict(event) for event in events) if data]
+        self.frames.append({
+            "events": recorded,
+            "mouse": list(pygame.mouse.get_pos()),
+            "pressed": bool(pygame.mouse.get_pressed()[0])
+        })
+        return events
+
+    def close(self):
+        with open(self.path, 'w') as f:
+            json.dump({"frames": self.frames}, f)
+
+
+class ScriptedInput:
+    """
+    Replays input one frame at a time from a recorded session or any iterable
+    of frame dicts: {"events": [...], "mouse": [x, y], "pressed": bool}.
+
+    Mouse position persists between frames, "pressed" only lasts for the frame
+    it appears in, and a QUIT event is sent once the script runs out. Click
+    debouncing delays are skipped so replays run as fast as the app can render.
+    """
+
+    def __init__(self, frames):
+        self.frames = iter(frames)
+        self.frame_count = 0
+        self.finished = False
+        self._mouse_pos = (0, 0)
+        self._pressed = False
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, 'r') as f:
+            session = json.load(f)
+        return cls(session["frames"])
+
+    def get_events(self):
+        self.frame_count += 1
+        frame = next(self.frames, None)
+        if frame is None:
+            self.finished = True
+            self._pressed = False
+            return [pygame.event.Event(pygame.QUIT)]
+
+        if "mouse" in frame:
+            self._mouse_pos = tuple(frame["mouse"])
+        self._pressed = bool(frame.get("pressed", False))
+        return [_event_from_dict(data) for data in frame.get("events", [])]
+
+    def mouse_pos(self):
+        return self._mouse_pos
+
+    def mouse_pressed(self):
+        return self._pressed
+
+    def delay(self, milliseconds):
+        pass
+
+    def close(self):
+        pass
+
+
+def create_input_source():
+    """
+    Pick the input source from the environment:
+    ESC_REPLAY_SESSION=path replays a session, ESC_RECORD_SESSION=path records one,
+    otherwise live pygame input is used.
+    """
+    replay_path = os.environ.get("ESC_REPLAY_SESSION")
+    if replay_path:
+        return ScriptedInput.from_file(replay_path)
+
+    record_path = os.environ.get("ESC_RECORD_SESSION")
+    if record_path:
+        return RecordingInput(record_path)
+
+    return PygameInput()
+
+
+def headless_requested():
+    """True when ESC_HEADLESS=1 asks for the dummy SDL drivers."""
+    return os.environ.get("ESC_HEADLESS") == "1"
@@ -0,0 +1,176 @@
+import os
+import csv
+import json
+import time
+import functools
+from collections import deque
+from time import perf_counter
+
+
+class _NullTimer:
+    """Context manager used while instrumentation is off; does nothing."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.profiler.record(self.name, perf_counter() - self.start)
+        return False
+
+
+class Profiler:
+    """
+    Low-overhead timers for hot paths and per-screen render times.
+
+    While disabled, timer() returns a shared no-op context manager and timed()
+    wrappers only check a flag, so leaving the hooks in place costs close to
+    nothing. Each metric keeps a bounded window of recent samples from which
+    p50/p95/p99 are computed.
+    """
+
+    def __init__(self, enabled=False, window=2048):
+        self.enabled = enabled
+        self.show_overlay = enabled
+        self.window = window
+        self.samples = {}  # metric name -> deque of durations in seconds
+        self.counts = {}  # metric name -> total number of samples ever recorded
+
+    def toggle(self):
+        """Switch instrumentation and its overlay on or off at runtime."""
+        self.enabled = not self.enabled
+        self.show_overlay = self.enabled
+
+    def timer(self, name):
+        """Return a context manager that times its body under the given metric."""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name)
+
+    def record(self, name, seconds):
+        """Add one duration sample to a metric."""
+        if name not in self.samples:
+            self.samples[name] = deque(maxlen=self.window)
+            self.counts[name] = 0
+        self.samples[name].append(seconds)
+        self.counts[name] += 1
+
+    def reset(self):
+        """Drop every recorded sample."""
+        self.samples.clear()
+        self.counts.clear()
+
+    @staticmethod
+    def _percentile(sorted_values, pct):
+        if not sorted_values:
+            return 0.0
+        index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+        return sorted_values[index]
+
+    def summary(self):
+        """Return {metric: {count, mean_ms, p50_ms, p95_ms, p99_ms, max_ms}}."""
+        result = {}
+        for name, values in self.samples.items():
+            ordered = sorted(values)
+            if not ordered:
+                continue
+            result[name] = {
+                "count": self.counts[name],
+                "mean_ms": sum(ordered) / len(ordered) * 1000,
+                "p50_ms": self._percentile(ordered, 50) * 1000,
+                "p95_ms": self._percentile(ordered, 95) * 1000,
+                "p99_ms": self._percentile(ordered, 99) * 1000,
+                "max_ms": ordered[-1] * 1000
+            }
+        return result
+
+    def dump(self, path):
+        """Write the timing summary to a .json or .csv file."""
+        summary = self.summary()
+        if not summary:
+            return
+
+        if path.lower().endswith(".csv"):
+            fields = ["count", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms"]
+            with open(path, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(["metric"] + fields)
+                for name in sorted(summary):
+                    writer.writerow([name] + [summary[name][field] for field in fields])
+        else:
+            with open(path, 'w') as f:
+                json.dump(summary, f, indent=4)
+
+    def render_overlay(self, screen, font, x=10, y=10, max_lines=8):
+        """Draw the slowest metrics (by p95) in the corner of the screen."""
+        if not self.show_overlay:
+            return
+
+        summary = self.summary()
+        lines = sorted(summary.items(), key=lambda x: x[1]["p95_ms"], reverse=True)[:max_lines]
+        for name, stats in lines:
+            text = f"{name}: p50 {stats['p50_ms']:.2f} / p95 {stats['p95_ms']:.2f} / p99 {stats['p99_ms']:.2f} ms"
+            surface = font.render(text, True, (255, 255, 0), (0, 0, 0))
+            screen.blit(surface, (x, y))
+            y += surface.get_height()
+
+
+# Shared profiler for both applications; ESC_INSTRUMENT=1 turns it on at startup
+PROFILER = Profiler(enabled=os.environ.get("ESC_INSTRUMENT") == "1")
+
+# Where the timing summary is written on exit (.json or .csv)
+DUMP_PATH = os.environ.get("ESC_INSTRUMENT_DUMP", "timings.json")
+
+
+_first_frame_marked = False
+
+
+def mark_first_frame():
+    """
+    Report time-to-first-frame once per process.
+
+    When ESC_STARTUP_T0 holds the wall-clock time the process was launched
+    (set by startup_benchmark.py), prints "first_frame_ms=<ms>" on the first call.
+    """
+    global _first_frame_marked
+    if _first_frame_marked:
+        return
+    _first_frame_marked = True
+
+    launched_at = os.environ.get("ESC_STARTUP_T0")
+    if launched_at:
+        print(f"first_frame_ms={(time.time() - float(launched_at)) * 1000:.1f}", flush=True)
+
+
+def timed(name):
+    """Decorator that times a function under the given metric when profiling is on."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not PROFILER.enabled:
+                return func(*args, **kwargs)
+            start = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                PROFILER.record(name, perf_counter() - start)
+        return wrapper
+    return decorator
@@ -0,0 +1,150 @@
+import os
+import json
+import numpy as np
+
+
+class RaschModel:
+    """
+    Item-response (Rasch / 1PL) model of the guessing game.
+
+    P(correct | player, song) = sigmoid(ability[player] - difficulty[song])
+
+    fit() estimates every ability and difficulty jointly from a batch of
+    observations using vectorized diagonal Newton steps on the penalized
+    log-likelihood (a Gaussian prior keeps parameters finite for songs that
+    are always or never guessed). update() folds in a single guess online,
+    scaling the step by the information accumulated for each parameter.
+    """
+
+    PRIOR_PRECISION = 0.5  # 1 / variance of the N(0, 2) prior on every parameter
+
+    def __init__(self):
+        self.players = {}  # player name -> index
+        self.songs = {}  # song filename -> index
+        self.ability = np.zeros(0)
+        self.difficulty = np.zeros(0)
+        self.ability_info = np.zeros(0)  # Accumulated Fisher information per player
+        self.difficulty_info = np.zeros(0)  # Accumulated Fisher information per song
+
+    def _player_index(self, player):
+        if player not in self.players:
+            self.players[player] = len(self.players)
+            self.ability = np.append(self.ability, 0.0)
+            self.ability_info = np.append(self.ability_info, 0.0)
+        return self.players[player]
+
+    def _song_index(self, song):
+        if song not in self.songs:
+            self.songs[song] = len(self.songs)
+            self.difficulty = np.append(self.difficulty, 0.0)
+            self.difficulty_info = np.append(self.difficulty_info, 0.0)
+        return self.songs[song]
+
+    @staticmethod
+    def _sigmoid(x):
+        return 1.0 / (1.0 + np.exp(-x))
+
+    def fit(self, observations, iterations=50, tolerance=1e-6):
+        """
+        Jointly estimate abilities and difficulties.
+
+        observations: iterable of (player, song, correct_count, total_count);
+        a single guess is (player, song, 1 or 0, 1).
+        """
+        rows = [(self._player_index(player), self._song_index(song), correct, total)
+                for player, song, correct, total in observations if total > 0]
+        if not rows:
+            return
+
+        player_idx = np.array([row[0] for row in rows], dtype=np.int64)
+        song_idx = np.array([row[1] for row in rows], dtype=np.int64)
+        correct = np.array([row[2] for row in rows], dtype=float)
+        total = np.array([row[3] for row in rows], dtype=float)
+        n_players = len(self.players)
+        n_songs = len(self.songs)
+
+        for _ in range(iterations):
+            p = self._sigmoid(self.ability[player_idx] - self.difficulty[song_idx])
+            residual = correct - total * p
+            information = total * p * (1 - p)
+
+            # Gradient and curvature of the penalized log-likelihood per parameter
+            ability_grad = np.bincount(player_idx, residual, n_players) - self.PRIOR_PRECISION * self.ability
+            ability_curv = np.bincount(player_idx, information, n_players) + self.PRIOR_PRECISION
+            difficulty_grad = -np.bincount(song_idx, residual, n_songs) - self.PRIOR_PRECISION * self.difficulty
+            difficulty_curv = np.bincount(song_idx, information, n_songs) + self.PRIOR_PRECISION
+
+            ability_step = ability_grad / ability_curv
+            difficulty_step = difficulty_grad / difficulty_curv
+            self.ability += ability_step
+            self.difficulty += difficulty_step
+
+            if max(np.abs(ability_step).max(), np.abs(difficulty_step).max()) < tolerance:
+                break
+
+        # Information at the final estimates sets the step size for online updates
+        p = self._sigmoid(self.ability[player_idx] - self.difficulty[song_idx])
+        information = total * p * (1 - p)
+        self.ability_info = np.bincount(player_idx, information, n_players)
+        self.difficulty_info = np.bincount(song_idx, information, n_songs)
+
+    def update(self, player, song, correct):
+        """Online update after a single guess; O(1) apart from first-seen growth."""
+        i = self._player_index(player)
+        j = self._song_index(song)
+
+        p = float(self._sigmoid(self.ability[i] - self.difficulty[j]))
+        residual = (1.0 if correct else 0.0) - p
+        information = p * (1 - p)
+
+        self.ability_info[i] += information
+        self.difficulty_info[j] += information
+        self.ability[i] += residual / (self.ability_info[i] + self.PRIOR_PRECISION)
+        self.difficulty[j] -= residual / (self.difficulty_info[j] + self.PRIOR_PRECISION)
+
+    def probability(self, player, song):
+        """Predicted chance that the player guesses the song correctly."""
+        ability = self.ability[self.players[player]] if player in self.players else 0.0
+        difficulty = self.difficulty[self.songs[song]] if song in self.songs else 0.0
+        return float(self._sigmoid(ability - difficulty))
+
+    def get_ability(self, player):
+        return float(self.ability[self.players[player]]) if player in self.players else 0.0
+
+    def get_difficulty(self, song):
+        return float(self.difficulty[self.songs[song]]) if song in self.songs else 0.0
+
+    def ranked_songs(self, hardest_first=True):
+        """Return [(song, difficulty)] sorted by difficulty."""
+        return sorted(((song, float(self.difficulty[j])) for song, j in self.songs.items()),
+                      key=lambda x: x[1], reverse=hardest_first)
+
+    def save(self, path):
+        data = {
+            "players": {player: [float(self.ability[i]), float(self.ability_info[i])]
+                        for player, i in self.players.items()},
+            "songs": {song: [float(self.difficulty[j]), float(self.difficulty_info[j])]
+                      for song, j in self.songs.items()}
+        }
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=4)
+
+    @classmethod
+    def load(cls, path):
+        """Load a saved model; returns None if the file does not exist."""
+        if not os.path.exists(path):
+            return None
+
+        with open(path, 'r') as f:
+            data = json.load(f)
+
+        model = cls()
+        for player, (ability, info) in data.get("players", {}).items():
+            i = model._player_index(player)
+            model.ability[i] = ability
+            model.ability_info[i] = info
+        for song, (difficulty, info) in data.get("songs", {}).items():
+            j = model._song_index(song)
+            model.difficulty[j] = difficulty
+            model.difficulty_info[j] = info
+        return model
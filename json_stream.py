@@ -0,0 +1,91 @@
+import json
+
+READ_SIZE = 64 * 1024
+_WHITESPACE = " \t\r\n"
+_DELIMITERS = _WHITESPACE + ",:]}"
+
+
+class _Reader:
+    """Sliding text window over a file; only the unparsed tail is kept in memory."""
+
+    def __init__(self, f):
+        self.f = f
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        """Read more text, dropping what has been consumed; False at end of file."""
+        if self.eof:
+            return False
+        chunk = self.f.read(READ_SIZE)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Next non-whitespace character without consuming it ("" at end of file)."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer) or not self.fill():
+                return self.buffer[self.pos:self.pos + 1]
+
+    def expect(self, chars):
+        char = self.peek()
+        if not char or char not in chars:
+            raise ValueError(f"Expected one of {chars!r} at position {self.pos}, found {char!r}")
+        self.pos += 1
+        return char
+
+    def value(self, decoder=json.JSONDecoder()):
+        """Decode the next JSON value, reading more text until it is complete."""
+        self.peek()
+        while True:
+            try:
+                value, end = decoder.raw_decode(self.buffer, self.pos)
+                # A number cut off by the end of the window (1.5|e10) only counts once a delimiter follows
+                if self.eof or (end < len(self.buffer) and self.buffer[end] in _DELIMITERS):
+                    self.pos = end
+                    return value
+            except ValueError:
+                if self.eof:
+                    raise
+            if not self.fill():
+                continue  # Now at end of file: decode what is there or raise
+
+
+def iter_array(path):
+    """
+    Yield the elements of a top-level JSON array one at a time.
+
+    Memory use is bounded by the largest single element rather than the file,
+    so multi-gigabyte histories can be processed in a single pass.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        reader = _Reader(f)
+        reader.expect("[")
+        if reader.peek() == "]":
+            return
+        while True:
+            yield reader.value()
+            if reader.expect(",]") == "]":
+                return
+
+
+def iter_object(path):
+    """Yield (key, value) pairs of a top-level JSON object one at a time."""
+    with open(path, 'r', encoding='utf-8') as f:
+        reader = _Reader(f)
+        reader.expect("{")
+        if reader.peek() == "}":
+            return
+        while True:
+            key = reader.value()
+            reader.expect(":")
+            yield key, reader.value()
+            if reader.expect(",}") == "}":
+                return
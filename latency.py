@@ -0,0 +1,137 @@
+class P2Quantile:
+    """
+    Streaming estimate of one quantile using the P² algorithm (Jain & Chlamtac).
+
+    Five markers track the minimum, the maximum, the target quantile and the
+    two midpoints around it; each observation nudges their heights with a
+    piecewise-parabolic fit. Memory and update cost are O(1) no matter how many
+    samples are seen. Until five samples arrive the exact quantile is used.
+    """
+
+    def __init__(self, quantile):
+        self.quantile = quantile
+        self.count = 0
+        self.heights = []  # Marker heights (the first samples until there are five)
+        self.positions = [1, 2, 3, 4, 5]  # Actual marker positions
+        self.desired = [1, 1 + 2 * quantile, 1 + 4 * quantile, 3 + 2 * quantile, 5]
+        self.increments = [0, quantile / 2, quantile, (1 + quantile) / 2, 1]
+
+    def add(self, value):
+        self.count += 1
+        if self.count <= 5:
+            self.heights.append(value)
+            self.heights.sort()
+            return
+
+        heights = self.heights
+        positions = self.positions
+
+        # Find the cell the value falls into, stretching the extremes if needed
+        if value < heights[0]:
+            heights[0] = value
+            cell = 0
+        elif value >= heights[4]:
+            heights[4] = value
+            cell = 3
+        else:
+            cell = 0
+            while value >= heights[cell + 1]:
+                cell += 1
+
+        for i in range(cell + 1, 5):
+            positions[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+
+        # Move the three middle markers towards their desired positions
+        for i in range(1, 4):
+            offset = self.desired[i] - positions[i]
+            if ((offset >= 1 and positions[i + 1] - positions[i] > 1) or
+                    (offset <= -1 and positions[i - 1] - positions[i] < -1)):
+                step = 1 if offset > 0 else -1
+                height = self._parabolic(i, step)
+                if not heights[i - 1] < height < heights[i + 1]:
+                    height = self._linear(i, step)
+                heights[i] = height
+                positions[i] += step
+
+    def _parabolic(self, i, step):
+        q, n = self.heights, self.positions
+        return q[i] + step / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + step) * (q[i + 1] - q[i]) / (n[i + 1] - n[i]) +
+            (n[i + 1] - n[i] - step) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+
+    def _linear(self, i, step):
+        q, n = self.heights, self.positions
+        return q[i] + step * (q[i + step] - q[i]) / (n[i + step] - n[i])
+
+    def value(self):
+        """Current estimate, or None before the first sample."""
+        if self.count == 0:
+            return None
+        if self.count <= 5:
+            return self.heights[min(self.count - 1, int(self.quantile * self.count))]
+        return self.heights[2]
+
+    def to_dict(self):
+        return {"count": self.count, "heights": self.heights,
+                "positions": self.positions, "desired": self.desired}
+
+    @classmethod
+    def from_dict(cls, quantile, data):
+        estimator = cls(quantile)
+        estimator.count = data["count"]
+        estimator.heights = list(data["heights"])
+        estimator.positions = list(data["positions"])
+        estimator.desired = list(data["desired"])
+        return estimator
+
+
+class LatencySketch:
+    """Answer-time summary for one song or player: count, mean and streaming p50/p90."""
+
+    QUANTILES = (0.5, 0.9)
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.estimators = {q: P2Quantile(q) for q in self.QUANTILES}
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        for estimator in self.estimators.values():
+            estimator.add(seconds)
+
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    def percentile(self, quantile):
+        return self.estimators[quantile].value()
+
+    def to_dict(self):
+        return {"count": self.count, "total": self.total,
+                "quantiles": {str(q): e.to_dict() for q, e in self.estimators.items()}}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls()
+        sketch.count = data["count"]
+        sketch.total = data["total"]
+        for q in cls.QUANTILES:
+            if str(q) in data.get("quantiles", {}):
+                sketch.estimators[q] = P2Quantile.from_dict(q, data["quantiles"][str(q)])
+        return sketch
+
+
+def speed_points(seconds, max_points=10, full_points_within=3.0, min_points_after=30.0):
+    """
+    Points for a correct timed answer: full marks for answering within a few
+    seconds, then falling linearly to a single point for slow answers.
+    """
+    if seconds is None or seconds <= full_points_within:
+        return max_points
+    if seconds >= min_points_after:
+        return 1
+    fraction = (min_points_after - seconds) / (min_points_after - full_points_within)
+    return max(1, round(1 + (max_points - 1) * fraction))
@@ -0,0 +1,196 @@
+import random
+
+
+class _Node:
+    __slots__ = ("key", "item", "score", "next", "width")
+
+    def __init__(self, key, item, score, level):
+        self.key = key
+        self.item = item
+        self.score = score
+        self.next = [None] * level
+        self.width = [1] * level
+
+
+class Leaderboard:
+    """
+    Items kept in score order (highest first) using an indexable skip list.
+
+    Updating an item's score, looking up its rank, fetching the top/bottom k
+    and finding items near a score all take O(log n) expected time (plus k
+    for the slices), so callers never need to re-sort the whole collection.
+    Ties are broken by the item itself so the order is deterministic.
+    """
+
+    MAX_LEVEL = 32
+
+    def __init__(self, scores=None):
+        self._head = _Node(None, None, None, self.MAX_LEVEL)
+        self._head.width = [1] * self.MAX_LEVEL
+        self._level = 1
+        self._size = 0
+        self._scores = {}  # item -> current score
+
+        if scores:
+            for item, score in scores.items():
+                self.update(item, score)
+
+    def __len__(self):
+        return self._size
+
+    def __contains__(self, item):
+        return item in self._scores
+
+    def score(self, item):
+        """Return the stored score of an item."""
+        return self._scores[item]
+
+    @staticmethod
+    def _key(item, score):
+        # Ascending key order == descending score order
+        return -score, item
+
+    def _random_level(self):
+        level = 1
+        while level < self.MAX_LEVEL and random.random() < 0.5:
+            level += 1
+        return level
+
+    def _insert(self, item, score):
+        key = self._key(item, score)
+        update = [self._head] * self.MAX_LEVEL
+        steps = [0] * self.MAX_LEVEL  # Position reached at each level
+
+        node = self._head
+        position = 0
+        for level in range(self._level - 1, -1, -1):
+            while node.next[level] is not None and node.next[level].key < key:
+                position += node.width[level]
+                node = node.next[level]
+            update[level] = node
+            steps[level] = position
+
+        new_level = self._random_level()
+        if new_level > self._level:
+            for level in range(self._level, new_level):
+                update[level] = self._head
+                steps[level] = 0
+                self._head.width[level] = self._size + 1
+            self._level = new_level
+
+        new_node = _Node(key, item, score, new_level)
+        for level in range(new_level):
+            prev = update[level]
+            new_node.next[level] = prev.next[level]
+            prev.next[level] = new_node
+            # Split the width of the link we just broke
+            new_node.width[level] = prev.width[level] - (position - steps[level])
+            prev.width[level] = position - steps[level] + 1
+
+        # Links above the new node now span one more element
+        for level in range(new_level, self._level):
+            update[level].width[level] += 1
+
+        self._size += 1
+        self._scores[item] = score
+
+    def _delete(self, item):
+        key = self._key(item, self._scores[item])
+        update = [self._head] * self.MAX_LEVEL
+
+        node = self._head
+        for level in range(self._level - 1, -1, -1):
+            while node.next[level] is not None and node.next[level].key < key:
+                node = node.next[level]
+            update[level] = node
+
+        target = update[0].next[0]
+        for level in range(self._level):
+            prev = update[level]
+            if prev.next[level] is target:
+                prev.width[level] += target.width[level] - 1
+                prev.next[level] = target.next[level]
+            else:
+                prev.width[level] -= 1
+
+        while self._level > 1 and self._head.next[self._level - 1] is None:
+            self._level -= 1
+
+        self._size -= 1
+        del self._scores[item]
+
+    def update(self, item, score):
+        """Insert an item or move it to its new score; returns (old_rank, new_rank)."""
+        old_rank = None
+        if item in self._scores:
+            if self._scores[item] == score:
+                rank = self.rank(item)
+                return rank, rank
+            old_rank = self.rank(item)
+            self._delete(item)
+        self._insert(item, score)
+        return old_rank, self.rank(item)
+
+    def remove(self, item):
+        """Remove an item if present."""
+        if item in self._scores:
+            self._delete(item)
+
+    def rank(self, item):
+        """Return the 1-based rank of an item (1 = highest score)."""
+        key = self._key(item, self._scores[item])
+        node = self._head
+        position = 0
+        for level in range(self._level - 1, -1, -1):
+            while node.next[level] is not None and node.next[level].key <= key:
+                position += node.width[level]
+                node = node.next[level]
+        return position
+
+    def _node_at(self, index):
+        """Return the node at a 0-based position."""
+        node = self._head
+        position = -1
+        for level in range(self._level - 1, -1, -1):
+            while node.next[level] is not None and position + node.width[level] <= index:
+                position += node.width[level]
+                node = node.next[level]
+        return node
+
+    def items(self, start=0, stop=None):
+        """Return (item, score) pairs for ranks start+1..stop, like a list slice."""
+        if stop is None or stop > self._size:
+            stop = self._size
+        start = max(0, start)
+        result = []
+        if start >= stop:
+            return result
+
+        node = self._node_at(start)
+        for _ in range(stop - start):
+            result.append((node.item, node.score))
+            node = node.next[0]
+        return result
+
+    def top(self, k):
+        """Return the k highest scoring (item, score) pairs."""
+        return self.items(0, k)
+
+    def bottom(self, k):
+        """Return the k lowest scoring (item, score) pairs, lowest first."""
+        return list(reversed(self.items(self._size - k, self._size)))
+
+    def rank_of_score(self, score):
+        """Return how many items score strictly higher than the given score."""
+        node = self._head
+        position = 0
+        for level in range(self._level - 1, -1, -1):
+            while node.next[level] is not None and node.next[level].score > score:
+                position += node.width[level]
+                node = node.next[level]
+        return position
+
+    def near(self, score, count=5):
+        """Return up to `count` items on each side of the given score."""
+        position = self.rank_of_score(score)
+        return self.items(position - count, position + count)
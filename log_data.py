@@ -1,8 +1,17 @@
-import requests
 import os
 import json
+import time
+import threading
 import subprocess
 
+DEFAULT_LOG_URL = ('https://script.google.com/macros/s/'
+                   'AKfycbzyENowb6sv5-EWqR4hCIFFUg8AwfzVc8gGcnO8SYYgM8w8LPOy8G3z8K1C3MZo1vvRaA/exec')
+DEFAULT_LOCATION_URL = 'https://ipinfo.io'
+
+SPOOL_DIR = "telemetry_spool"
+SPOOL_LIMIT = 20  # Oldest spooled payloads are dropped beyond this many
+REQUEST_TIMEOUT = (2, 3)  # (connect, read) seconds for every telemetry request
+
 
 def get_git_user_info():
     git_info = {
@@ -38,13 +47,27 @@ def get_git_user_info():
     return git_info
 
 
-def send_log():
-    url = ('https://script.google.com/macros/s/'
-           'AKfycbzyENowb6sv5-EWqR4hCIFFUg8AwfzVc8gGcnO8SYYgM8w8LPOy8G3z8K1C3MZo1vvRaA/exec')
+def telemetry_enabled():
+    """Telemetry is opt-in: it only runs when ESC_TELEMETRY=1."""
+    return os.environ.get("ESC_TELEMETRY") == "1"
+
+
+def get_location():
+    """Look up the approximate location; returns an empty dict when offline."""
+    location_url = os.environ.get("ESC_TELEMETRY_LOCATION_URL", DEFAULT_LOCATION_URL)
+
+    # noinspection PyBroadException
+    try:
+        import requests  # Imported lazily so startup never pays for it
+
+        response = requests.get(location_url, timeout=REQUEST_TIMEOUT)
+        return response.json()
+    except Exception:
+        return {}
 
-    location_response = requests.get('https://ipinfo.io')
-    location_data = location_response.json()
 
+def build_payload():
+    location_data = get_location()
     git_info = get_git_user_info()
 
     data = {
@@ -75,8 +98,125 @@ def send_log():
         except Exception:
             pass
 
+    return data
+
+
+def spool_payload(data, spool_dir=SPOOL_DIR, limit=SPOOL_LIMIT):
+    """Keep a payload that could not be sent, dropping the oldest beyond the limit."""
     # noinspection PyBroadException
     try:
-        requests.post(url, json=data)
+        os.makedirs(spool_dir, exist_ok=True)
+        path = os.path.join(spool_dir, f"{time.time_ns()}.json")
+        with open(path, 'w') as f:
+            json.dump(data, f)
+
+        spooled = sorted(os.listdir(spool_dir))
+        for file_name in spooled[:max(0, len(spooled) - limit)]:
+            os.remove(os.path.join(spool_dir, file_name))
     except Exception:
         pass
+
+
+def post_payload(url, data):
+    """POST one payload; returns True if the endpoint accepted it."""
+    # noinspection PyBroadException
+    try:
+        import requests
+
+        response = requests.post(url, json=data, timeout=REQUEST_TIMEOUT)
+        return response.ok
+    except Exception:
+        return False
+
+
+def flush_spool(url, spool_dir=SPOOL_DIR):
+    """Send spooled payloads oldest first; stops at the first failure."""
+    if not os.path.isdir(spool_dir):
+        return True
+
+    for file_name in sorted(os.listdir(spool_dir)):
+        path = os.path.join(spool_dir, file_name)
+        # noinspection PyBroadException
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+        except Exception:
+            os.remove(path)  # Unreadable payloads would block the spool forever
+            continue
+
+        if not post_payload(url, data):
+            return False
+        os.remove(path)
+
+    return True
+
+
+def _send_log_worker(url):
+    data = build_payload()
+    if not flush_spool(url) or not post_payload(url, data):
+        spool_payload(data)
+
+
+def send_log():
+    """
+    Send the usage log on a background thread if telemetry is enabled.
+
+    Returns the started thread (or None when telemetry is off) so callers never
+    wait on the network. Payloads that fail to send are spooled locally and
+    retried before the next one. ESC_TELEMETRY_URL overrides the endpoint.
+    """
+    if not telemetry_enabled():
+        return None
+
+    url = os.environ.get("ESC_TELEMETRY_URL", DEFAULT_LOG_URL)
+    thread = threading.Thread(target=_send_log_worker, args=(url,), daemon=True)
+    thread.start()
+    return thread
+
+
+class LocalTelemetryEndpoint:
+    """
+    Stand-in telemetry endpoint on localhost for tests and offline machines.
+
+    Accepts POSTed payloads into `received` and answers GET requests with a
+    fake location, so it can serve as both ESC_TELEMETRY_URL and
+    ESC_TELEMETRY_LOCATION_URL.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        self.received = []
+        endpoint = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                self._reply({"city": "Local", "region": "Local", "country": "XX", "loc": "0,0"})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                endpoint.received.append(json.loads(self.rfile.read(length) or b"null"))
+                self._reply({"status": "ok"})
+
+            def _reply(self, body):
+                content = json.dumps(body).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.url = f"http://{host}:{self.server.server_address[1]}/"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
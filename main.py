@@ -4,24 +4,69 @@ import random
 import pygame
 import sys
 import math
+import threading
+import time
+from time import perf_counter
+from checkpoints import RatingCheckpoints
+from confidence import RankConfidence
+from headless import configure_headless, create_input_source, headless_requested
+from instrumentation import PROFILER, DUMP_PATH, mark_first_frame, timed
+from leaderboard import Leaderboard
 from log_data import send_log
+from pairwise import WinMatrix
+from profiles import profile_dir, profile_label
+from ratings import DEFAULT_RATING, apply_ranking, entry_order, implied_pairs, new_rating
+from seeding import InsertionSorter, seed_ratings
+from tournament import SwissTournament
 
 
 class SongRanker:
-    def __init__(self):
-        self.recordings_dir = "recordings"
-        self.rankings_file = "song_rankings.json"
-        self.listening_stats_file = "listening_stats.json"
-        self.comparison_history_file = "comparison_history.json"
+    def __init__(self, input_source=None, headless=False):
+        self.recordings_dir = "recordings"  # Shared by every profile
+        self.profile = os.environ.get("ESC_PROFILE", "")  # Each user's data lives in profiles/<name>/
+        data_dir = profile_dir(self.profile)
+        if data_dir:
+            os.makedirs(data_dir, exist_ok=True)
+        self.rankings_file = os.path.join(data_dir, "song_rankings.json")
+        self.listening_stats_file = os.path.join(data_dir, "listening_stats.json")
+        self.comparison_history_file = os.path.join(data_dir, "comparison_history.json")
+        self.sort_state_file = os.path.join(data_dir, "sort_state.json")
+        self.tournament_state_file = os.path.join(data_dir, "tournament_state.json")
+        # Rating snapshots for undo and time travel
+        self.checkpoints = RatingCheckpoints(os.path.join(data_dir, "rating_checkpoints.json"))
         self.songs = []
         self.rankings = {}
         self.listening_stats = {}
         self.comparison_history = []  # Track all comparisons with outcomes
         self.compared_pairs = set()  # Track which pairs have been compared
-
-        # Initialize pygame for audio playback and UI
-        pygame.init()
-        pygame.mixer.init()
+        self.leaderboard = Leaderboard()  # Songs kept in rating order, updated per vote
+        self.last_rank_movements = {}  # song -> (old_rank, new_rank) for the latest vote
+        self.win_matrix = WinMatrix()  # Pairwise win counts, updated per vote
+        self.recheck_rate = 0.2  # Share of comparisons spent re-asking inconsistent pairs
+        self.max_rechecks = 6  # Never re-ask a pair more often than this
+        self._consistency = None  # (win_matrix.version, inconsistency scores, summary)
+        self.rank_confidence = RankConfidence()  # Bootstrap rank intervals, computed in worker processes
+        self.precompute_tolerance = 8.0  # Rating change that makes a precomputed pair involving it stale
+        self._next_pair = None  # (worker thread, result dict) selecting the pair after the current one
+        self.ranking_size = 4  # Songs ordered per ranking round (3-5)
+        self.ranking_songs = []  # Songs of the current ranking round, in display order
+        self.ranking_order = []  # Songs picked so far, most preferred first
+        self.sorter = None  # Quick sort in progress (seeds the ratings when it finishes)
+        self.tournament = None  # Swiss tournament in progress
+        self.redo_stack = []  # Undone history entries, most recently undone last
+        self.decay_half_life = float(os.environ.get("ESC_DECAY_HALF_LIFE_DAYS", "0"))  # Days for a vote's weight to halve; 0 keeps every vote at full weight
+        self.decay = None  # Time-decayed ratings fit, when decay is on
+        self.consensus = None  # Group rankings pooled from every profile, created when first shown
+        self.show_consensus = False  # Rankings screen shows the group rankings instead of this profile's
+        self.consensus_poll_interval = 1.0  # Seconds between checks for other profiles' votes
+        self._consensus_polled = 0.0
+        self.rankings_view = None  # (history index, rankings, leaderboard) when viewing an earlier state
+
+        # Initialize only the pygame subsystems the UI needs; audio starts on first playback
+        if headless or headless_requested():
+            configure_headless()
+        pygame.display.init()
+        pygame.font.init()
 
         # Set up the display
         self.screen_width = 800
@@ -44,6 +89,10 @@ class SongRanker:
         self.GREEN = (50, 200, 50)
         self.RED = (200, 50, 50)
 
+        # Input comes from pygame, a recorder or a scripted session replay
+        self.input = input_source or create_input_source()
+        self.frame_rate = 60  # 0 runs uncapped, e.g. for benchmarks
+
         # UI state
         self.current_screen = "main_menu"
         self.scroll_offset = 0
@@ -51,12 +100,44 @@ class SongRanker:
         self.message_log = []
         self.current_song1 = None
         self.current_song2 = None
-
-        # Load data
-        self.load_songs()
-        self.load_rankings()
-        self.load_listening_stats()
-        self.load_comparison_history()
+        self.row_height = 30
+        self.list_top = 120  # First visible row of the scrollable list views
+        self.list_bottom = 400  # Rows starting below this are off screen
+
+        # Cached sort order for the listening stats view, rebuilt only when the data changes
+        self._sorted_stats = None
+
+        # Load data on a background thread so the main menu renders immediately
+        self._load_error = None
+        self._loader = threading.Thread(target=self.load_data, daemon=True)
+        self._loader.start()
+
+    def load_data(self):
+        """Load songs, rankings, listening stats and history (runs on the loader thread)."""
+        # noinspection PyBroadException
+        try:
+            self.load_songs()
+            self.load_rankings()
+            self.load_listening_stats()
+            self.load_comparison_history()
+            self.load_sort_state()
+            self.load_tournament_state()
+            self.load_decay()
+            self.load_checkpoints()
+        except Exception as e:
+            self._load_error = e
+
+    def ensure_data_loaded(self):
+        """Block until the background load has finished; re-raises any load error."""
+        self._loader.join()
+        if self._load_error is not None:
+            error, self._load_error = self._load_error, None
+            raise error
+
+    def ensure_audio(self):
+        """Start the mixer the first time a song is played."""
+        if not pygame.mixer.get_init():
+            pygame.mixer.init()
 
     def format_name_capitalization(self, name):
         """
@@ -146,12 +227,11 @@ class SongRanker:
         # Initialize rankings for new songs
         for song in self.songs:
             if song not in self.rankings:
-                self.rankings[song] = {
-                    "rating": 1000.0,  # Default rating
-                    "uncertainty": 100.0,  # High initial uncertainty
-                    "comparisons": 0  # No comparisons yet
-                }
+                self.rankings[song] = new_rating()
+
+        self.leaderboard = Leaderboard({song: data["rating"] for song, data in self.rankings.items()})
 
+    @timed("save_rankings")
     def save_rankings(self):
         with open(self.rankings_file, 'w') as f:
             json.dump(self.rankings, f, indent=4)
@@ -170,6 +250,8 @@ class SongRanker:
                     "average_listen_time": 0
                 }
 
+        self.invalidate_stats_view()
+
     def load_comparison_history(self):
         if os.path.exists(self.comparison_history_file):
             with open(self.comparison_history_file, 'r') as f:
@@ -178,9 +260,63 @@ class SongRanker:
             # Rebuild compared_pairs set from history
             self.compared_pairs = set()
             for comp in self.comparison_history:
-                pair = frozenset([comp["song1"], comp["song2"]])
-                self.compared_pairs.add(pair)
+                for winner, loser in implied_pairs(entry_order(comp)):
+                    self.compared_pairs.add(frozenset([winner, loser]))
+            self.win_matrix = WinMatrix.from_history(self.comparison_history)
+
+    def load_sort_state(self):
+        if os.path.exists(self.sort_state_file):
+            with open(self.sort_state_file, 'r') as f:
+                self.sorter = InsertionSorter.from_dict(json.load(f))
+
+    def save_sort_state(self):
+        if self.sorter is None:
+            if os.path.exists(self.sort_state_file):
+                os.remove(self.sort_state_file)
+            return
+        with open(self.sort_state_file, 'w') as f:
+            json.dump(self.sorter.to_dict(), f, indent=4)
 
+    def load_decay(self):
+        """With decay on, refit the ratings from the whole history weighted by age."""
+        if self.decay_half_life <= 0:
+            return
+        from decay import DecayedRatings  # NumPy is only needed with decay on
+
+        self.decay = DecayedRatings.from_history(self.comparison_history, self.decay_half_life)
+        # Warm start from the saved ratings, which are usually the previous session's fit
+        self.decay.strengths = {song: 10 ** ((data["rating"] - DEFAULT_RATING) / 400)
+                                for song, data in self.rankings.items()}
+        self.refit_decay(self.rankings)
+        self.leaderboard = Leaderboard({song: data["rating"] for song, data in self.rankings.items()})
+
+    @timed("refit_decay")
+    def refit_decay(self, rankings, now=None):
+        """Write the time-decayed fit of the comparisons into `rankings`."""
+        now = time.time() if now is None else now
+        self.decay.fit(rankings, now)
+        self.decay.apply(rankings)
+
+    def load_checkpoints(self):
+        self.checkpoints.load(self.comparison_history)
+        if self.checkpoints.earliest() is None:
+            # Undo and time travel reach back to the state at the first snapshot
+            self.checkpoints.record(self.comparison_history, self.rankings, force=True)
+
+    def load_tournament_state(self):
+        if os.path.exists(self.tournament_state_file):
+            with open(self.tournament_state_file, 'r') as f:
+                self.tournament = SwissTournament.from_dict(json.load(f))
+
+    def save_tournament_state(self):
+        if self.tournament is None:
+            if os.path.exists(self.tournament_state_file):
+                os.remove(self.tournament_state_file)
+            return
+        with open(self.tournament_state_file, 'w') as f:
+            json.dump(self.tournament.to_dict(), f, indent=4)
+
+    @timed("save_comparison_history")
     def save_comparison_history(self):
         with open(self.comparison_history_file, 'w') as f:
             json.dump(self.comparison_history, f, indent=4)
@@ -199,15 +335,48 @@ class SongRanker:
                 self.listening_stats[song]["total_listen_time"] /
                 self.listening_stats[song]["listen_count"]
         )
+        self.invalidate_stats_view()
 
         # Save stats after each update
         self.save_listening_stats()
 
+    @timed("save_listening_stats")
     def save_listening_stats(self):
         with open(self.listening_stats_file, 'w') as f:
             json.dump(self.listening_stats, f, indent=4)
 
+    # Cached list views
+    def invalidate_stats_view(self):
+        """Drop the cached listening stats order; the next render re-sorts once."""
+        self._sorted_stats = None
+
+    def get_sorted_stats(self):
+        """Return listened songs sorted by average listen time, re-sorting only after a change."""
+        if self._sorted_stats is None:
+            self._sorted_stats = sorted(
+                [(song, stats) for song, stats in self.listening_stats.items()
+                 if stats["listen_count"] > 0],
+                key=lambda x: x[1]["average_listen_time"],
+                reverse=True
+            )
+        return self._sorted_stats
+
+    def visible_row_range(self, total_rows):
+        """Return the (start, stop) slice of rows that fall inside the scroll window."""
+        first_y = self.list_top - self.scroll_offset
+        start = max(0, (self.list_top - self.row_height - first_y) // self.row_height + 1)
+        stop = min(total_rows, max(start, (self.list_bottom - first_y - 1) // self.row_height + 1))
+        return start, stop
+
     # UI Helper Methods
+    def render_timed(self, render):
+        """Draw the current screen with a render_* method, timing only the drawing for the profiler."""
+        start = perf_counter()
+        result = render()
+        if PROFILER.enabled:
+            PROFILER.record("render." + self.current_screen, perf_counter() - start)
+        return result
+
     def log_message(self, message):
         """Add a message to the log (hidden, but kept for compatibility)"""
         self.message_log.append(message)
@@ -232,7 +401,7 @@ class SongRanker:
 
     def create_button(self, text, font, x, y, width, height, inactive_color, active_color):
         """Create a clickable button"""
-        mouse_pos = pygame.mouse.get_pos()
+        mouse_pos = self.input.mouse_pos()
         button_rect = pygame.Rect(x, y, width, height)
 
         if button_rect.collidepoint(mouse_pos):
@@ -258,6 +427,7 @@ class SongRanker:
         self.log_message("- Press RIGHT ARROW or 'D' to skip forward 5 seconds")
         self.log_message("- Press LEFT ARROW or 'A' to rewind 5 seconds")
 
+        self.ensure_audio()
         pygame.mixer.music.load(song_path)
         # Start playing from the beginning
         pygame.mixer.music.play()
@@ -267,19 +437,22 @@ class SongRanker:
         actual_listen_time = 0  # Track actual listening time
 
         playing = True
-        last_time_check = pygame.time.get_ticks() / 1000
+        # perf_counter, not pygame.time.get_ticks: the timer subsystem is never initialised, so ticks stay at 0
+        last_time_check = perf_counter()
         self.current_screen = "playback"
 
         while playing and self.current_screen == "playback":
-            current_time = pygame.time.get_ticks() / 1000
+            current_time = perf_counter()
             # Only count time when music is actually playing
             if pygame.mixer.music.get_busy():
                 actual_listen_time += current_time - last_time_check
             last_time_check = current_time
 
             # Handle all pygame events
-            for event in pygame.event.get():
+            for event in self.input.get_events():
                 if event.type == pygame.QUIT:
+                    PROFILER.dump(DUMP_PATH)  # The run loop's own shutdown is skipped
+                    self.input.close()
                     pygame.quit()
                     sys.exit()
                 elif event.type == pygame.KEYDOWN:
@@ -306,6 +479,7 @@ class SongRanker:
                         self.log_message(f"Rewound to {new_pos:.1f} seconds")
 
             # Render the playback screen
+            render_start = perf_counter()
             self.screen.fill(self.WHITE)
 
             # Parse song information
@@ -340,12 +514,16 @@ class SongRanker:
                                              self.screen_width // 2 - 100, 400, 200, 50,
                                              self.GRAY, self.LIGHT_BLUE)
 
+            if PROFILER.enabled:
+                PROFILER.record("render.playback", perf_counter() - render_start)
+                PROFILER.render_overlay(self.screen, self.font_small)
+
             # Update the display
             pygame.display.flip()
 
             # Check for button clicks
-            if pygame.mouse.get_pressed()[0]:  # Left mouse button
-                pos = pygame.mouse.get_pos()
+            if self.input.mouse_pressed():  # Left mouse button
+                pos = self.input.mouse_pos()
                 if stop_button.collidepoint(pos):
                     playing = False
                     self.log_message("Stopping playback and returning...")
@@ -356,7 +534,7 @@ class SongRanker:
                 self.log_message("Song finished playing")
 
             # Small delay to reduce CPU usage
-            pygame.time.delay(10)
+            self.input.delay(10)
 
         pygame.mixer.music.stop()
 
@@ -364,124 +542,241 @@ class SongRanker:
         self.update_listening_stats(song_name, actual_listen_time)
 
     # IMPROVED: Update TrueSkill-inspired ranking system with uncertainty
-    def update_ranking(self, winner, loser):
-        # Get current ratings and uncertainties
-        winner_data = self.rankings[winner]
-        loser_data = self.rankings[loser]
+    @timed("update_ranking")
+    def update_ranking(self, winner, loser, kind=None):
+        self.redo_stack = []  # A new vote replaces the undone ones
+        entry = {
+            "song1": winner,
+            "song2": loser,
+            "winner": winner,
+            "timestamp": time.time()  # Wall-clock time, for decay and analysis
+        }
+        if kind is not None:
+            entry["kind"] = kind
+        return self.record_order([winner, loser], entry)
+
+    @timed("update_ranking_round")
+    def update_ranking_round(self, order):
+        """Apply a ranking round: `order` lists its songs from most to least preferred."""
+        self.redo_stack = []
+        return self.record_order(order, {
+            "kind": "ranking",
+            "order": list(order),
+            "timestamp": time.time()
+        })
 
-        # Adaptive K-factor based on uncertainty - higher uncertainty means more dramatic updates
-        base_k = 32
-        winner_k = min(base_k * 1.5, base_k * (1 + winner_data["uncertainty"] / 100))
-        loser_k = min(base_k * 1.5, base_k * (1 + loser_data["uncertainty"] / 100))
+    def record_order(self, order, entry):
+        """Update ratings from a preference order, then append its history entry and save."""
+        # Update the songs' ratings and uncertainties (see ratings.apply_ranking)
+        old_ranks = {song: self.leaderboard.rank(song) if song in self.leaderboard else None
+                     for song in order}
+        old_rating = self.rankings.get(order[0], new_rating())["rating"]
+        rating_change = apply_ranking(self.rankings, order)
+        moved = order
+        if self.decay is not None:
+            # The update above still counts the comparisons; the ratings come from the decayed fit
+            self.decay.add(entry)
+            self.refit_decay(self.rankings)
+            rating_change = abs(self.rankings[order[0]]["rating"] - old_rating)
+            # A refit nudges every rating; only move songs that drifted visibly from their leaderboard score
+            moved = [song for song, data in self.rankings.items()
+                     if song not in self.leaderboard or abs(self.leaderboard.score(song) - data["rating"]) > 0.01]
+
+        # Move the songs in the leaderboard
+        for song in moved:
+            self.leaderboard.update(song, self.rankings[song]["rating"])
+        self.last_rank_movements = {song: (old_rank, self.leaderboard.rank(song))
+                                    for song, old_rank in old_ranks.items()}
+        self.win_matrix.add_order(order)
 
-        # Calculate expected outcome (using Elo formula)
-        winner_rating = winner_data["rating"]
-        loser_rating = loser_data["rating"]
+        # Add to comparison history
+        self.comparison_history.append(entry)
 
-        expected_win = 1 / (1 + 10 ** ((loser_rating - winner_rating) / 400))
+        # Save comparison history
+        self.save_comparison_history()
+        self.checkpoints.record(self.comparison_history, self.rankings)
 
-        # Update ratings based on actual vs expected outcome
-        new_winner_rating = winner_rating + winner_k * (1 - expected_win)
-        new_loser_rating = loser_rating + loser_k * (0 - (1 - expected_win))
+        # Save updated rankings
+        self.save_rankings()
 
-        # Update uncertainties - decrease based on number of comparisons and certainty of outcome
-        certainty_factor = abs(0.5 - expected_win) * 2  # How certain we were of the outcome
-        uncertainty_reduction = 0.85 - (certainty_factor * 0.1)  # Between 0.75 and 0.85
+        return rating_change  # Return the top song's rating change magnitude
+
+    @timed("undo_vote")
+    def undo_vote(self):
+        """Take back the latest vote; returns its history entry, or None if there is nothing to undo."""
+        history = self.comparison_history
+        if not history:
+            self.log_message("Nothing to undo.")
+            return None
+        entry = history[-1]
+        if entry.get("kind") == "seed":
+            self.log_message("Quick sort answers cannot be undone.")
+            return None
+        if entry.get("kind") == "tournament":
+            # Later rounds were paired from this result, so the tournament cannot take it back
+            self.log_message("Tournament matches cannot be undone.")
+            return None
+        rankings = self.checkpoints.rankings_at(history, len(history) - 1, self.songs)
+        if rankings is None:
+            self.log_message("Votes from before the first rating checkpoint cannot be undone.")
+            return None
+
+        self.collect_next_pair()  # The worker reads the data being rolled back
+        history.pop()
+        self.checkpoints.truncate(len(history))
+        if self.decay is not None:
+            self.decay.remove(entry)
+            self.refit_decay(rankings)
+        order = entry_order(entry)
+        self.win_matrix.remove_order(order)
+        for song1, song2 in implied_pairs(order):
+            if not self.win_matrix.pair_count(song1, song2):
+                self.compared_pairs.discard(frozenset([song1, song2]))
+        self.restore_rankings(rankings)
+        self.redo_stack.append(entry)
 
-        winner_data["uncertainty"] = max(15, winner_data["uncertainty"] * uncertainty_reduction)
-        loser_data["uncertainty"] = max(15, loser_data["uncertainty"] * uncertainty_reduction)
+        self.save_comparison_history()
+        self.save_rankings()
+        return entry
+
+    def redo_vote(self):
+        """Record the most recently undone vote again; returns its history entry, or None."""
+        if not self.redo_stack:
+            self.log_message("Nothing to redo.")
+            return None
+        entry = self.redo_stack.pop()
+        self.collect_next_pair()
+        self.record_order(entry_order(entry), entry)
+        return entry
+
+    def restore_rankings(self, rankings):
+        """Replace the ratings, moving only the songs whose rating changed in the leaderboard."""
+        for song, data in rankings.items():
+            if song not in self.rankings or self.rankings[song]["rating"] != data["rating"]:
+                self.leaderboard.update(song, data["rating"])
+        for song in self.rankings:
+            if song not in rankings:
+                self.leaderboard.remove(song)
+        self.rankings = rankings
+        self.last_rank_movements = {}
+
+    def refresh_consensus(self, force=False):
+        """Pick up new votes from every profile, at most once per poll interval unless forced."""
+        now = perf_counter()
+        if not force and now - self._consensus_polled < self.consensus_poll_interval:
+            return
+        self._consensus_polled = now
+        if self.consensus is None:
+            from consensus import ConsensusRanking  # NumPy is only needed once the group rankings are shown
+
+            self.consensus = ConsensusRanking(half_life_days=self.decay_half_life)
+        self.consensus.refresh(self.songs)
+
+    def view_rankings_at(self, index):
+        """Show the rankings as they were after `index` history entries (None or the latest index: now)."""
+        latest = len(self.comparison_history)
+        earliest = self.checkpoints.earliest()
+        if index is None or index >= latest or earliest is None:
+            self.rankings_view = None
+            return
+        index = max(index, earliest)
+        rankings = self.checkpoints.rankings_at(self.comparison_history, index, self.songs)
+        if self.decay is not None:
+            # Fit the votes up to then, with the weights they had at the time
+            history = self.comparison_history[:index]
+            then = history[-1].get("timestamp", self.decay.legacy_time) if history else self.decay.legacy_time
+            decay = type(self.decay).from_history(history, self.decay_half_life, now=then)
+            decay.strengths = dict(self.decay.strengths)
+            decay.fit(rankings, then)
+            decay.apply(rankings)
+        leaderboard = Leaderboard({song: data["rating"] for song, data in rankings.items()})
+        self.rankings_view = (index, rankings, leaderboard)
+        self.scroll_offset = 0
 
-        # Increment comparison counters
-        winner_data["comparisons"] = winner_data.get("comparisons", 0) + 1
-        loser_data["comparisons"] = loser_data.get("comparisons", 0) + 1
+    def song_comparison_counts(self, songs):
+        """Number of distinct songs each song has been compared with."""
+        song_comparison_count = {song: 0 for song in songs}
+        for pair in self.compared_pairs:
+            pair_list = list(pair)
+            song_comparison_count[pair_list[0]] = song_comparison_count.get(pair_list[0], 0) + 1
+            song_comparison_count[pair_list[1]] = song_comparison_count.get(pair_list[1], 0) + 1
+        return song_comparison_count
 
-        # Update the ratings
-        winner_data["rating"] = new_winner_rating
-        loser_data["rating"] = new_loser_rating
+    def pair_score(self, song1, song2, song_comparison_count):
+        """How informative comparing the two songs would be; None if they were compared too often."""
+        times_compared = self.win_matrix.pair_count(song1, song2)
 
-        # Add to comparison history
-        self.comparison_history.append({
-            "song1": winner,
-            "song2": loser,
-            "winner": winner,
-            "time": pygame.time.get_ticks() / 1000  # Timestamp
-        })
+        # Limit repeated comparisons of the same pair
+        if times_compared >= 3:
+            return None
 
-        # Save comparison history
-        self.save_comparison_history()
+        s1_data = self.rankings[song1]
+        s2_data = self.rankings[song2]
 
-        # Save updated rankings
-        self.save_rankings()
+        # Calculate how informative this comparison would be
+
+        # 1. Uncertainty score - higher is better (prioritize uncertain songs)
+        uncertainty_score = (s1_data["uncertainty"] + s2_data["uncertainty"]) / 2
+
+        # 2. Rating proximity score - higher when ratings are close
+        rating_diff = abs(s1_data["rating"] - s2_data["rating"])
+        # Sigmoid function to prioritize songs with similar ratings
+        proximity_score = 200 / (1 + math.exp(rating_diff / 100))
 
-        return abs(new_winner_rating - winner_rating)  # Return rating change magnitude
+        # 3. Novelty score - prioritize pairs that haven't been compared
+        novelty_score = 100 if times_compared == 0 else (30 if times_compared == 1 else 10)
+
+        # 4. Undersampled score - prioritize songs with fewer comparisons
+        comp_deficit = max(0, 5 - min(song_comparison_count[song1], song_comparison_count[song2]))
+        undersampled_score = comp_deficit * 15
+
+        # Combine all factors with weights
+        total_score = (
+                uncertainty_score * 1.0 +
+                proximity_score * 0.8 +
+                novelty_score * 1.2 +
+                undersampled_score * 1.5
+        )
+
+        return total_score
 
     # IMPROVED: Smarter comparison selection that balances exploration and refinement
-    def select_comparison_pair(self):
-        if len(self.songs) < 2:
+    @timed("select_comparison_pair")
+    def select_comparison_pair(self, exclude=()):
+        # Songs in `exclude` are left out entirely (used for a backup pair that no vote can make stale)
+        songs = [s for s in self.songs if s not in exclude] if exclude else self.songs
+        if len(songs) < 2:
             return None, None
 
         # Calculate "Information Gain" for each potential pairing
         pair_scores = []
 
         # Track how many times each song has been compared
-        song_comparison_count = {song: 0 for song in self.songs}
-        for pair in self.compared_pairs:
-            pair_list = list(pair)
-            song_comparison_count[pair_list[0]] = song_comparison_count.get(pair_list[0], 0) + 1
-            song_comparison_count[pair_list[1]] = song_comparison_count.get(pair_list[1], 0) + 1
+        song_comparison_count = self.song_comparison_counts(songs)
 
         # First prioritize songs that have never been compared
-        uncomp_songs = [s for s in self.songs if song_comparison_count[s] == 0]
+        uncomp_songs = [s for s in songs if song_comparison_count[s] == 0]
         if len(uncomp_songs) >= 2:
             # Randomly select two uncompared songs
             return random.sample(uncomp_songs, 2)
         elif len(uncomp_songs) == 1:
             # Pair the uncompared song with another song that has been compared least
-            other_songs = sorted([s for s in self.songs if s != uncomp_songs[0]],
+            other_songs = sorted([s for s in songs if s != uncomp_songs[0]],
                                  key=lambda s: song_comparison_count[s])
             return uncomp_songs[0], other_songs[0]
 
-        # Generate all possible pairs for scoring
-        for i, song1 in enumerate(self.songs):
-            for song2 in self.songs[i + 1:]:
-                # Skip pairs that have been compared too many times
-                pair = frozenset([song1, song2])
-                times_compared = sum(1 for comp in self.comparison_history
-                                     if frozenset([comp["song1"], comp["song2"]]) == pair)
-
-                # Limit repeated comparisons of the same pair
-                if times_compared >= 3:
-                    continue
-
-                s1_data = self.rankings[song1]
-                s2_data = self.rankings[song2]
-
-                # Calculate how informative this comparison would be
-
-                # 1. Uncertainty score - higher is better (prioritize uncertain songs)
-                uncertainty_score = (s1_data["uncertainty"] + s2_data["uncertainty"]) / 2
+        # Now and then re-ask the pair whose results are most inconsistent
+        if random.random() < self.recheck_rate:
+            pair = self.most_inconsistent_pair(exclude)
+            if pair is not None:
+                return pair
 
-                # 2. Rating proximity score - higher when ratings are close
-                rating_diff = abs(s1_data["rating"] - s2_data["rating"])
-                # Sigmoid function to prioritize songs with similar ratings
-                proximity_score = 200 / (1 + math.exp(rating_diff / 100))
-
-                # 3. Novelty score - prioritize pairs that haven't been compared
-                novelty_score = 100 if times_compared == 0 else (30 if times_compared == 1 else 10)
-
-                # 4. Undersampled score - prioritize songs with fewer comparisons
-                comp_deficit = max(0, 5 - min(song_comparison_count[song1], song_comparison_count[song2]))
-                undersampled_score = comp_deficit * 15
-
-                # Combine all factors with weights
-                total_score = (
-                        uncertainty_score * 1.0 +
-                        proximity_score * 0.8 +
-                        novelty_score * 1.2 +
-                        undersampled_score * 1.5
-                )
-
-                pair_scores.append((song1, song2, total_score))
+        # Generate all possible pairs for scoring
+        for i, song1 in enumerate(songs):
+            for song2 in songs[i + 1:]:
+                total_score = self.pair_score(song1, song2, song_comparison_count)
+                if total_score is not None:
+                    pair_scores.append((song1, song2, total_score))
 
         # If we have valid pairs to compare
         if pair_scores:
@@ -494,16 +789,122 @@ class SongRanker:
             return selected_pair[0], selected_pair[1]
 
         # Fallback: just pick two random songs
-        return random.sample(self.songs, 2)
+        return random.sample(songs, 2)
+
+    @timed("select_ranking_subset")
+    def select_ranking_subset(self, size):
+        """
+        Pick songs for a ranking round: the pair select_comparison_pair would
+        offer, grown one song at a time by a candidate whose pairs with the
+        songs already chosen are among the most informative.
+        """
+        size = max(3, min(5, size, len(self.songs)))
+        subset = list(self.select_comparison_pair())
+        if None in subset:
+            return []
+
+        song_comparison_count = self.song_comparison_counts(self.songs)
+        while len(subset) < size:
+            candidates = []
+            for song in self.songs:
+                if song in subset:
+                    continue
+                # Pairs compared too often add nothing, the rest add their information score
+                scores = [self.pair_score(song, member, song_comparison_count) or 0 for member in subset]
+                candidates.append((sum(scores) / len(scores), song))
+            candidates.sort(reverse=True)
+            subset.append(random.choice(candidates[:3])[1])
+
+        random.shuffle(subset)  # Show them in no particular order
+        return subset
+
+    def consistency(self):
+        """
+        Inconsistency scores per pair plus a summary of preference cycles and
+        contradicted pairs, recomputed only after new votes.
+        """
+        if self._consistency is None or self._consistency[0] != self.win_matrix.version:
+            ratings = {song: data["rating"] for song, data in self.rankings.items()}
+            components = self.win_matrix.components()
+            summary = {
+                "cycles": len(components),
+                "songs_in_cycles": sum(len(component) for component in components),
+                "contradicted": len(self.win_matrix.contradicted_pairs(ratings))
+            }
+            self._consistency = (self.win_matrix.version, self.win_matrix.inconsistency(ratings), summary)
+        return self._consistency[1], self._consistency[2]
+
+    def most_inconsistent_pair(self, exclude=()):
+        """The current songs' most inconsistent pair that may still be re-asked, or None."""
+        scores, _ = self.consistency()
+        current = frozenset([self.current_song1, self.current_song2])
+        songs = set(self.songs) - set(exclude)
+        best = None
+        best_score = 0
+        for pair, score in scores.items():
+            if score <= best_score or pair == current or not pair <= songs:
+                continue
+            song1, song2 = pair
+            if self.win_matrix.pair_count(song1, song2) < self.max_rechecks:
+                best, best_score = (song1, song2), score
+        return best
+
+    def precompute_next_pair(self):
+        """
+        Select the next pair on a worker thread while the user judges the current one,
+        plus a backup pair without the current songs that the vote cannot make stale.
+        """
+        result = {}
+        current = (self.current_song1, self.current_song2)
+
+        def work():
+            result["pair"] = self.select_comparison_pair()
+            result["backup"] = self.select_comparison_pair(exclude=current)
+
+        thread = threading.Thread(target=work, daemon=True)
+        self._next_pair = (thread, result)
+        thread.start()
+
+    def collect_next_pair(self):
+        """Wait for the precomputation (it reads the data a vote changes) and return its pairs, or None."""
+        if self._next_pair is None:
+            return None
+        thread, result = self._next_pair
+        self._next_pair = None
+        thread.join()
+        return result
+
+    def reuse_next_pair(self, candidates, rating_change):
+        """
+        Return a pair precomputed before the vote on the current pair, or None if both are stale.
+
+        A vote lowers the two songs' uncertainty and raises their comparison counts,
+        which only makes pairs with them less attractive; a big rating jump can
+        still reorder their pairs, so then the backup pair without them is used.
+        """
+        voted = {self.current_song1, self.current_song2}
+        songs = set(self.songs)
+        for key in ("pair", "backup"):
+            pair = (candidates or {}).get(key)
+            if not pair or None in pair or not set(pair) <= songs or set(pair) == voted:
+                continue
+            if voted & set(pair) and rating_change > self.precompute_tolerance:
+                continue
+            return pair
+        return None
 
     # Modified to use the UI
-    def run_comparison(self):
+    @timed("run_comparison")
+    def run_comparison(self, next_pair=None):
         if len(self.songs) < 2:
             self.log_message("Need at least 2 songs to compare. Please add songs to the 'recordings' folder.")
             self.current_screen = "main_menu"
             return
 
-        self.current_song1, self.current_song2 = self.select_comparison_pair()
+        if next_pair is None:
+            self.collect_next_pair()  # Drop a precomputation for an outdated state
+            next_pair = self.select_comparison_pair()
+        self.current_song1, self.current_song2 = next_pair
 
         if self.current_song1 is None or self.current_song2 is None:
             self.log_message("Could not select a valid song pair for comparison.")
@@ -514,6 +915,163 @@ class SongRanker:
         self.compared_pairs.add(frozenset([self.current_song1, self.current_song2]))
 
         self.current_screen = "comparison"
+        self.precompute_next_pair()
+
+    def run_ranking_round(self):
+        if len(self.songs) < 3:
+            self.log_message("Need at least 3 songs for a ranking round.")
+            self.current_screen = "main_menu"
+            return
+
+        self.collect_next_pair()  # Drop a precomputed comparison; the data is about to change
+        self.ranking_songs = self.select_ranking_subset(self.ranking_size)
+        self.ranking_order = []
+        if not self.ranking_songs:
+            self.log_message("Could not select songs for a ranking round.")
+            self.current_screen = "main_menu"
+            return
+
+        # Every pair in the round counts as compared
+        for song1, song2 in implied_pairs(self.ranking_songs):
+            self.compared_pairs.add(frozenset([song1, song2]))
+
+        self.current_screen = "ranking"
+
+    def pick_ranking_song(self, song):
+        """Place a song next in the round's order; returns the rating change once the round is complete."""
+        if song in self.ranking_order:
+            return None
+        self.ranking_order.append(song)
+        if len(self.ranking_order) < len(self.ranking_songs) - 1:
+            return None
+
+        # The last song left is the least preferred
+        self.ranking_order += [s for s in self.ranking_songs if s not in self.ranking_order]
+        return self.update_ranking_round(self.ranking_order)
+
+    def start_quick_sort(self):
+        """Start sorting every song by binary insertion, or resume the saved sort."""
+        if len(self.songs) < 2:
+            self.log_message("Need at least 2 songs to sort.")
+            self.current_screen = "main_menu"
+            return
+
+        self.collect_next_pair()  # Drop a precomputed comparison; the data is about to change
+        if self.sorter is None:
+            songs = list(self.songs)
+            random.shuffle(songs)
+            self.sorter = InsertionSorter(songs)
+        else:
+            self.sorter.sync(self.songs)
+        self.save_sort_state()
+
+        if self.sorter.done():
+            self.finish_quick_sort()
+            return
+        self.current_screen = "quick_sort"
+
+    @timed("answer_quick_sort")
+    def answer_quick_sort(self, preferred):
+        """Record the answer to the current sort question; seeds the ratings once the order is complete."""
+        song, pivot = self.sorter.question()
+        loser = pivot if preferred == song else song
+        self.sorter.answer(preferred)
+
+        # Sort answers are comparisons too, kept in the history for analysis and refinement
+        self.comparison_history.append({
+            "kind": "seed",
+            "song1": song,
+            "song2": pivot,
+            "winner": preferred,
+            "timestamp": time.time()
+        })
+        self.compared_pairs.add(frozenset([song, pivot]))
+        self.win_matrix.add(preferred, loser)
+        if self.decay is not None:
+            self.decay.add(self.comparison_history[-1])  # Fitted once the sort finishes
+        self.redo_stack = []
+        self.save_comparison_history()
+        self.checkpoints.record(self.comparison_history, self.rankings)
+
+        if self.sorter.done():
+            self.finish_quick_sort()
+        else:
+            self.save_sort_state()
+
+    def finish_quick_sort(self):
+        """Seed the ratings from the sorted order and hand over to adaptive comparisons."""
+        order = self.sorter.order
+        seeded = seed_ratings(self.rankings, order, self.sorter.questions)
+        if self.decay is not None:
+            self.refit_decay(self.rankings)  # The sort answers are already comparisons in the fit
+        self.leaderboard = Leaderboard({song: data["rating"] for song, data in self.rankings.items()})
+        self.last_rank_movements = {}
+        self.save_rankings()
+        # Seeding is not a history entry, so only a snapshot lets undo and time travel see it
+        self.checkpoints.record(self.comparison_history, self.rankings, force=True)
+        self.log_message(f"Quick sort finished: {len(order)} songs ordered with {self.sorter.answers} answers, "
+                         f"{len(seeded)} new songs rated.")
+        self.sorter = None
+        self.save_sort_state()
+        self.current_screen = "main_menu"
+
+    def start_tournament(self):
+        """Start a Swiss tournament over every song, or resume the saved one."""
+        if len(self.songs) < 2:
+            self.log_message("Need at least 2 songs for a tournament.")
+            self.current_screen = "main_menu"
+            return
+
+        self.collect_next_pair()  # Drop a precomputed comparison; the data is about to change
+        if self.tournament is not None and any(song not in self.songs for song in self.tournament.songs):
+            self.log_message("Songs of the saved tournament are missing; starting a new one.")
+            self.tournament = None
+        if self.tournament is None:
+            # Seeded by rating, so the first round already pairs songs of similar strength
+            songs = sorted(self.songs, key=lambda s: -self.rankings.get(s, {}).get("rating", 0))
+            self.tournament = SwissTournament(songs)
+        if self.tournament.round_complete():
+            self.schedule_tournament_round()
+        self.current_screen = "tournament"
+
+    @timed("schedule_tournament_round")
+    def schedule_tournament_round(self):
+        """Pair every song for the next round, avoiding rematches and favouring new pairs."""
+        ratings = {song: data["rating"] for song, data in self.rankings.items()}
+        pairs = self.tournament.schedule_round(ratings, self.win_matrix.pair_count)
+        self.save_tournament_state()
+        self.log_message(f"Tournament round {self.tournament.round} of {self.tournament.rounds}: "
+                         f"{len(pairs)} matches.")
+
+    def answer_tournament(self, winner, loser):
+        """Record the current match as a regular comparison and move on; returns the rating change."""
+        self.tournament.record(winner, loser)
+        rating_change = self.update_ranking(winner, loser, kind="tournament")
+
+        if not self.tournament.round_complete():
+            self.save_tournament_state()
+        elif self.tournament.done():
+            standings = self.tournament.standings()
+            self.log_message(f"Tournament finished: {standings[0]} wins with "
+                             f"{self.tournament.scores[standings[0]]:g} points.")
+            self.tournament = None
+            self.save_tournament_state()
+            self.current_screen = "main_menu"
+        else:
+            self.schedule_tournament_round()
+        return rating_change
+
+    def describe_rank_movements(self):
+        """Summarize how the last vote moved the two songs in the rankings."""
+        parts = []
+        for song, (old_rank, new_rank) in self.last_rank_movements.items():
+            country, _, _ = self.parse_song_info(song)
+            label = country or os.path.splitext(song)[0]
+            if old_rank is None or old_rank == new_rank:
+                parts.append(f"{label} #{new_rank}")
+            else:
+                parts.append(f"{label} #{old_rank} -> #{new_rank}")
+        return "Last vote: " + ", ".join(parts)
 
     # Screen rendering methods
     def render_comparison_screen(self):
@@ -559,73 +1117,184 @@ class SongRanker:
                                           self.screen_width // 2 + 50, y_pos + 70,
                                           200, 50, self.GRAY, self.GREEN)
 
-        # Return button
+        # Return button, between undo and redo
         back_button = self.create_button("Back to Main Menu", self.font_medium,
                                          self.screen_width // 2 - 150, 450,
                                          300, 50, self.GRAY, self.LIGHT_BLUE)
+        undo_button = self.create_button("Undo Vote", self.font_medium,
+                                         self.screen_width // 2 - 330, 450,
+                                         160, 50, self.GRAY, self.LIGHT_BLUE)
+        redo_button = self.create_button("Redo Vote", self.font_medium,
+                                         self.screen_width // 2 + 170, 450,
+                                         160, 50, self.GRAY if self.redo_stack else self.WHITE, self.LIGHT_BLUE)
 
-        return play1_button, vote1_button, play2_button, vote2_button, back_button
+        # Rank movements caused by the previous vote
+        if self.last_rank_movements:
+            self.render_text(self.describe_rank_movements(), self.font_small, self.DARK_GRAY,
+                             self.screen_width // 2, 515, "center")
 
-    def render_main_menu(self):
+        return play1_button, vote1_button, play2_button, vote2_button, back_button, undo_button, redo_button
+
+    def render_quick_sort_screen(self):
         self.screen.fill(self.WHITE)
 
         # Title
-        self.render_text("SONG RANKER", self.font_large, self.BLACK,
+        self.render_text("QUICK SORT", self.font_large, self.BLACK,
                          self.screen_width // 2, 30, "center")
+        song, pivot = self.sorter.question()
+        placed = len(self.sorter.order)
+        total = placed + len(self.sorter.pending) + 1
+        self.render_text(f"{placed} of {total} songs placed, at most {self.sorter.questions_left()} questions left",
+                         self.font_small, self.DARK_GRAY, self.screen_width // 2, 65, "center")
+
+        buttons = []
+        for number, (y_pos, name) in enumerate(((100, song), (250, pivot)), start=1):
+            self.render_text(f"Song {number}: {name}", self.font_medium, self.BLACK,
+                             self.screen_width // 2, y_pos, "center")
+            buttons.append(self.create_button(f"Play Song {number}", self.font_medium,
+                                              self.screen_width // 2 - 250, y_pos + 70,
+                                              200, 50, self.GRAY, self.LIGHT_BLUE))
+            buttons.append(self.create_button(f"Prefer Song {number}", self.font_medium,
+                                              self.screen_width // 2 + 50, y_pos + 70,
+                                              200, 50, self.GRAY, self.GREEN))
+
+        # Progress is saved after every answer
+        buttons.append(self.create_button("Pause and Return", self.font_medium,
+                                          self.screen_width // 2 - 150, 450,
+                                          300, 50, self.GRAY, self.LIGHT_BLUE))
+
+        return tuple(buttons)
+
+    def render_tournament_screen(self):
+        self.screen.fill(self.WHITE)
 
-        # Menu options
-        y_pos = 120
-        button_height = 60
-        button_spacing = 20
-
-        compare_button = self.create_button("1. Compare Songs", self.font_medium,
-                                            self.screen_width // 2 - 150, y_pos,
-                                            300, button_height, self.GRAY, self.LIGHT_BLUE)
-        y_pos += button_height + button_spacing
+        # Title
+        self.render_text("SWISS TOURNAMENT", self.font_large, self.BLACK,
+                         self.screen_width // 2, 30, "center")
+        tournament = self.tournament
+        song1, song2 = tournament.current_match()
+        self.render_text(f"Round {tournament.round} of {tournament.rounds}, "
+                         f"match {tournament.next_match + 1} of {len(tournament.matches)}",
+                         self.font_small, self.DARK_GRAY, self.screen_width // 2, 65, "center")
+
+        buttons = []
+        for number, (y_pos, name) in enumerate(((100, song1), (250, song2)), start=1):
+            self.render_text(f"Song {number}: {name} ({tournament.scores[name]:g} pts)", self.font_medium,
+                             self.BLACK, self.screen_width // 2, y_pos, "center")
+            buttons.append(self.create_button(f"Play Song {number}", self.font_medium,
+                                              self.screen_width // 2 - 250, y_pos + 70,
+                                              200, 50, self.GRAY, self.LIGHT_BLUE))
+            buttons.append(self.create_button(f"Prefer Song {number}", self.font_medium,
+                                              self.screen_width // 2 + 50, y_pos + 70,
+                                              200, 50, self.GRAY, self.GREEN))
+
+        # Progress is saved after every match
+        buttons.append(self.create_button("Pause and Return", self.font_medium,
+                                          self.screen_width // 2 - 150, 450,
+                                          300, 50, self.GRAY, self.LIGHT_BLUE))
+
+        leaders = tournament.standings()[:3]
+        self.render_text("Leading: " + ", ".join(f"{os.path.splitext(song)[0]} {tournament.scores[song]:g}"
+                                                 for song in leaders),
+                         self.font_small, self.DARK_GRAY, self.screen_width // 2, 515, "center")
+
+        return tuple(buttons)
+
+    def render_ranking_screen(self):
+        self.screen.fill(self.WHITE)
 
-        rankings_button = self.create_button("2. View Rankings", self.font_medium,
-                                             self.screen_width // 2 - 150, y_pos,
-                                             300, button_height, self.GRAY, self.LIGHT_BLUE)
-        y_pos += button_height + button_spacing
+        # Title
+        self.render_text("RANK THESE SONGS", self.font_large, self.BLACK,
+                         self.screen_width // 2, 30, "center")
+        self.render_text("Pick your favourite first, then the next one, and so on", self.font_small,
+                         self.DARK_GRAY, self.screen_width // 2, 62, "center")
+
+        play_buttons = []
+        pick_buttons = []
+        y_pos = 90
+        for song in self.ranking_songs:
+            display_name = song if len(song) <= 42 else song[:39] + "..."
+            self.render_text(display_name, self.font_small, self.BLACK, 50, y_pos + 14)
+
+            play_buttons.append(self.create_button("Play", self.font_medium,
+                                                   self.screen_width // 2 + 20, y_pos,
+                                                   150, 45, self.GRAY, self.LIGHT_BLUE))
+            if song in self.ranking_order:
+                label, color = f"#{self.ranking_order.index(song) + 1}", self.GREEN
+            else:
+                label, color = "Pick", self.GRAY
+            pick_buttons.append(self.create_button(label, self.font_medium,
+                                                   self.screen_width // 2 + 190, y_pos,
+                                                   170, 45, color, self.GREEN))
+            y_pos += 68
+
+        clear_button = self.create_button("Clear Order", self.font_medium,
+                                          self.screen_width // 2 - 310, 450,
+                                          300, 50, self.GRAY, self.LIGHT_BLUE)
+        back_button = self.create_button("Back to Main Menu", self.font_medium,
+                                         self.screen_width // 2 + 10, 450,
+                                         300, 50, self.GRAY, self.LIGHT_BLUE)
 
-        stats_button = self.create_button("3. View Listening Statistics", self.font_medium,
-                                          self.screen_width // 2 - 150, y_pos,
-                                          300, button_height, self.GRAY, self.LIGHT_BLUE)
-        y_pos += button_height + button_spacing
+        # Rank movements caused by the previous round
+        if self.last_rank_movements:
+            self.render_text(self.describe_rank_movements(), self.font_small, self.DARK_GRAY,
+                             self.screen_width // 2, 515, "center")
 
-        progress_button = self.create_button("4. View Ranking Confidence", self.font_medium,
-                                             self.screen_width // 2 - 150, y_pos,
-                                             300, button_height, self.GRAY, self.LIGHT_BLUE)
-        y_pos += button_height + button_spacing
+        return play_buttons, pick_buttons, clear_button, back_button
 
-        refresh_button = self.create_button("5. Refresh Song List", self.font_medium,
-                                            self.screen_width // 2 - 150, y_pos,
-                                            300, button_height, self.GRAY, self.LIGHT_BLUE)
-        y_pos += button_height + button_spacing
+    def render_main_menu(self):
+        self.screen.fill(self.WHITE)
 
-        exit_button = self.create_button("6. Exit", self.font_medium,
-                                         self.screen_width // 2 - 150, y_pos,
-                                         300, button_height, self.GRAY, self.LIGHT_BLUE)
+        # Title
+        self.render_text("SONG RANKER", self.font_large, self.BLACK,
+                         self.screen_width // 2, 30, "center")
 
-        return compare_button, rankings_button, stats_button, progress_button, refresh_button, exit_button
+        # Menu options
+        y_pos = 120
+        button_height = 42
+        button_spacing = 8
+
+        labels = ["1. Compare Songs",
+                  f"2. Rank {self.ranking_size} Songs",
+                  "3. Quick Sort" if self.sorter is None
+                  else f"3. Resume Sort ({self.sorter.questions_left()} left)",
+                  "4. Swiss Tournament" if self.tournament is None
+                  else f"4. Resume Tournament (round {self.tournament.round})",
+                  "5. View Rankings",
+                  "6. View Listening Statistics",
+                  "7. View Ranking Confidence",
+                  "8. Refresh Song List",
+                  "9. Exit"]
+        buttons = []
+        for label in labels:
+            buttons.append(self.create_button(label, self.font_medium,
+                                              self.screen_width // 2 - 150, y_pos,
+                                              300, button_height, self.GRAY, self.LIGHT_BLUE))
+            y_pos += button_height + button_spacing
+
+        return tuple(buttons)
 
     def render_rankings_screen(self):
         self.screen.fill(self.WHITE)
 
-        # Title
-        self.render_text("CURRENT SONG RANKINGS", self.font_large, self.BLACK,
+        # Title; the group rankings or an earlier state can be shown instead of the current one
+        if self.show_consensus:
+            votes = self.consensus.votes()
+            title = f"GROUP RANKINGS ({len(votes)} PROFILES)"
+            rankings, leaderboard = self.consensus.rankings, self.consensus.leaderboard
+        elif self.rankings_view is None:
+            title = "CURRENT SONG RANKINGS"
+            rankings, leaderboard = self.rankings, self.leaderboard
+        else:
+            index, rankings, leaderboard = self.rankings_view
+            title = f"RANKINGS AFTER VOTE {index} OF {len(self.comparison_history)}"
+        self.render_text(title, self.font_large, self.BLACK,
                          self.screen_width // 2, 30, "center")
 
-        if not self.rankings:
+        if not rankings:
             self.render_text("No rankings available yet.", self.font_medium, self.BLACK,
                              self.screen_width // 2, 100, "center")
         else:
-            # Sort by rating
-            sorted_rankings = sorted(
-                self.rankings.items(),
-                key=lambda x: x[1]["rating"] if isinstance(x[1], dict) else x[1],
-                reverse=True
-            )
 
             # Header
             self.render_text("Rank", self.font_medium, self.BLACK, 50, 80)
@@ -634,48 +1303,60 @@ class SongRanker:
             self.render_text("Confidence", self.font_medium, self.BLACK, 600, 80)
             pygame.draw.line(self.screen, self.BLACK, (50, 105), (self.screen_width - 50, 105), 2)
 
-            # Display rankings in a scrollable area
-            y_pos = 120 - self.scroll_offset
-            for rank, (song, data) in enumerate(sorted_rankings, 1):
-                if y_pos + 30 > 120 and y_pos < 400:  # Only render visible items
-                    if isinstance(data, dict):
-                        rating = data["rating"]
-                        uncertainty = data["uncertainty"]
-                        comparisons = data.get("comparisons", 0)
-
-                        # Calculate confidence as inverse of uncertainty (0-100%)
-                        confidence = max(0, min(100, 100 - uncertainty))
-                        confidence_color = (
-                            int(255 - confidence * 2.55),  # More red when less confident
-                            int(confidence * 2.55),  # More green when more confident
-                            0
-                        )
-
-                        self.render_text(f"{rank}.", self.font_medium, self.BLACK, 50, y_pos)
-
-                        # Truncate long song names
-                        display_name = song
-                        if len(display_name) > 30:
-                            display_name = display_name[:27] + "..."
-                        self.render_text(display_name, self.font_medium, self.BLACK, 120, y_pos)
-
-                        self.render_text(f"{rating:.1f}", self.font_medium, self.BLACK, 500, y_pos)
-                        self.render_text(f"{confidence:.0f}%", self.font_medium, confidence_color, 600, y_pos)
-                    else:
-                        # Handle old format (just a number)
-                        self.render_text(f"{rank}. {song} (Rating: {data})",
-                                         self.font_medium, self.BLACK, 50, y_pos)
-                y_pos += 30
+            # Display only the rows inside the scrollable area
+            start, stop = self.visible_row_range(len(leaderboard))
+            y_pos = self.list_top - self.scroll_offset + start * self.row_height
+            for rank, (song, _) in enumerate(leaderboard.items(start, stop), start + 1):
+                data = rankings[song]
+                if isinstance(data, dict):
+                    rating = data["rating"]
+                    uncertainty = data["uncertainty"]
+
+                    # Calculate confidence as inverse of uncertainty (0-100%)
+                    confidence = max(0, min(100, 100 - uncertainty))
+                    confidence_color = (
+                        int(255 - confidence * 2.55),  # More red when less confident
+                        int(confidence * 2.55),  # More green when more confident
+                        0
+                    )
+
+                    self.render_text(f"{rank}.", self.font_medium, self.BLACK, 50, y_pos)
+
+                    # Truncate long song names
+                    display_name = song
+                    if len(display_name) > 30:
+                        display_name = display_name[:27] + "..."
+                    self.render_text(display_name, self.font_medium, self.BLACK, 120, y_pos)
+
+                    self.render_text(f"{rating:.1f}", self.font_medium, self.BLACK, 500, y_pos)
+                    self.render_text(f"{confidence:.0f}%", self.font_medium, confidence_color, 600, y_pos)
+                else:
+                    # Handle old format (just a number)
+                    self.render_text(f"{rank}. {song} (Rating: {data})",
+                                     self.font_medium, self.BLACK, 50, y_pos)
+                y_pos += self.row_height
 
             # Calculate max scroll
-            self.max_scroll = max(0, len(sorted_rankings) * 30 - 280)
+            self.max_scroll = max(0, len(leaderboard) * self.row_height - 280)
 
-        # Back button
+        # Back button, between the time travel buttons
         back_button = self.create_button("Back to Main Menu", self.font_medium,
                                          self.screen_width // 2 - 150, 450,
                                          300, 50, self.GRAY, self.LIGHT_BLUE)
-
-        return back_button
+        earlier_button = self.create_button("< Earlier", self.font_medium,
+                                            self.screen_width // 2 - 330, 450,
+                                            160, 50, self.WHITE if self.show_consensus else self.GRAY, self.LIGHT_BLUE)
+        later_button = self.create_button("Later >", self.font_medium,
+                                          self.screen_width // 2 + 170, 450,
+                                          160, 50, self.GRAY if self.rankings_view and not self.show_consensus
+                                          else self.WHITE, self.LIGHT_BLUE)
+        # Switch between this profile's rankings and the group's
+        group_button = self.create_button(f"Mine ({profile_label(self.profile)})" if self.show_consensus
+                                          else "Group Rankings", self.font_small,
+                                          self.screen_width // 2 - 100, 510,
+                                          200, 35, self.GRAY, self.LIGHT_BLUE)
+
+        return back_button, earlier_button, later_button, group_button
 
     def render_stats_screen(self):
         self.screen.fill(self.WHITE)
@@ -688,12 +1369,8 @@ class SongRanker:
             self.render_text("No listening statistics available yet.", self.font_medium, self.BLACK,
                              self.screen_width // 2, 100, "center")
         else:
-            # Sort by average listen time (descending)
-            sorted_stats = sorted(
-                self.listening_stats.items(),
-                key=lambda x: x[1]["average_listen_time"],
-                reverse=True
-            )
+            # Listened songs sorted by average listen time (descending)
+            sorted_stats = self.get_sorted_stats()
 
             # Header
             self.render_text("Song", self.font_medium, self.BLACK, 50, 80)
@@ -702,29 +1379,28 @@ class SongRanker:
             self.render_text("Total", self.font_medium, self.BLACK, 600, 80)
             pygame.draw.line(self.screen, self.BLACK, (50, 105), (self.screen_width - 50, 105), 2)
 
-            # Display stats in a scrollable area
-            y_pos = 120 - self.scroll_offset
-            for song, stats in sorted_stats:
-                if stats["listen_count"] > 0:
-                    if y_pos + 30 > 120 and y_pos < 400:  # Only render visible items
-                        avg_time = stats["average_listen_time"]
-                        count = stats["listen_count"]
-                        total = stats["total_listen_time"]
+            # Display only the rows inside the scrollable area
+            start, stop = self.visible_row_range(len(sorted_stats))
+            y_pos = self.list_top - self.scroll_offset + start * self.row_height
+            for song, stats in sorted_stats[start:stop]:
+                avg_time = stats["average_listen_time"]
+                count = stats["listen_count"]
+                total = stats["total_listen_time"]
 
-                        # Truncate long song names
-                        display_name = song
-                        if len(display_name) > 25:
-                            display_name = display_name[:22] + "..."
+                # Truncate long song names
+                display_name = song
+                if len(display_name) > 25:
+                    display_name = display_name[:22] + "..."
 
-                        self.render_text(display_name, self.font_medium, self.BLACK, 50, y_pos)
-                        self.render_text(f"{avg_time:.1f}s", self.font_medium, self.BLACK, 400, y_pos)
-                        self.render_text(f"{count}", self.font_medium, self.BLACK, 500, y_pos)
-                        self.render_text(f"{total:.1f}s", self.font_medium, self.BLACK, 600, y_pos)
+                self.render_text(display_name, self.font_medium, self.BLACK, 50, y_pos)
+                self.render_text(f"{avg_time:.1f}s", self.font_medium, self.BLACK, 400, y_pos)
+                self.render_text(f"{count}", self.font_medium, self.BLACK, 500, y_pos)
+                self.render_text(f"{total:.1f}s", self.font_medium, self.BLACK, 600, y_pos)
 
-                    y_pos += 30  # Less space between entries for more compact view
+                y_pos += self.row_height  # Less space between entries for more compact view
 
             # Calculate max scroll
-            self.max_scroll = max(0, sum(30 for song, stats in sorted_stats if stats["listen_count"] > 0) - 280)
+            self.max_scroll = max(0, len(sorted_stats) * self.row_height - 280)
 
         # Back button
         back_button = self.create_button("Back to Main Menu", self.font_medium,
@@ -768,6 +1444,13 @@ class SongRanker:
             self.render_text(f"Unique pairs compared: {unique_pairs}/{total_possible_pairs} ({coverage_pct:.1f}%)",
                              self.font_medium, self.BLACK, 50, 160)
 
+            # How consistent the votes are with each other and with the ratings
+            _, consistency = self.consistency()
+            self.render_text(f"Preference cycles: {consistency['cycles']} ({consistency['songs_in_cycles']} songs)",
+                             self.font_small, self.DARK_GRAY, self.screen_width // 2 + 40, 100)
+            self.render_text(f"Pairs contradicting ratings: {consistency['contradicted']}",
+                             self.font_small, self.DARK_GRAY, self.screen_width // 2 + 40, 125)
+
             # Display confidence measure
             confidence_color = (
                 int(255 - adjusted_confidence * 2.55),  # Red component
@@ -816,7 +1499,29 @@ class SongRanker:
                 self.render_text(f"Suggestion: Compare at least {suggested_comparisons} more pairs",
                                  self.font_small, self.BLACK, 50, 320)
 
-                # Find songs with the highest uncertainty
+            # Bootstrap rank intervals, computed in worker processes; recomputed after new votes
+            self.rank_confidence.refresh(self.comparison_history, self.songs,
+                                         (self.win_matrix.version, len(self.songs)))
+            bootstrap = self.rank_confidence.poll()
+            if bootstrap:
+                least_stable = sorted(bootstrap["songs"].items(),
+                                      key=lambda item: (item[1]["high"] - item[1]["low"], -item[1]["median"]),
+                                      reverse=True)[:3]
+                updating = " (updating...)" if self.rank_confidence.computing() else ""
+                self.render_text(f"Least stable ranks ({bootstrap['interval']:.0%} range over "
+                                 f"{bootstrap['samples']} resamples){updating}:",
+                                 self.font_small, self.BLACK, 50, 350)
+
+                y_pos = 380
+                for i, (song, ranks) in enumerate(least_stable):
+                    display_name = song if len(song) <= 40 else song[:37] + "..."
+                    self.render_text(f"{i + 1}. {display_name}  #{ranks['low']}-#{ranks['high']}, "
+                                     f"top {bootstrap['top_k']}: {ranks['top_k']:.0%}",
+                                     self.font_small, self.BLACK, 70, y_pos)
+                    y_pos += 25
+
+            elif adjusted_confidence < 90:
+                # Until the first result arrives, find songs with the highest uncertainty
                 high_uncertainty = sorted(
                     [(song, data["uncertainty"]) for song, data in self.rankings.items()],
                     key=lambda x: x[1], reverse=True
@@ -845,10 +1550,18 @@ class SongRanker:
         clock = pygame.time.Clock()
 
         while running:
+            frame_start = perf_counter()
+            if self.current_screen != "main_menu":
+                # Every other screen reads the rankings and songs, so the loader must have finished
+                self.ensure_data_loaded()
+
             # Handle events
-            for event in pygame.event.get():
+            for event in self.input.get_events():
                 if event.type == pygame.QUIT:
                     running = False
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                    # Toggle the profiling overlay and timers
+                    PROFILER.toggle()
                 elif event.type == pygame.MOUSEWHEEL:
                     self.scroll_offset -= event.y * 30  # Adjust scroll speed
                     # Clamp scroll offset
@@ -860,98 +1573,227 @@ class SongRanker:
                                                           pygame.RESIZABLE)
 
             # Handle mouse clicks - we do this separately to avoid multiple clicks
-            mouse_clicked = pygame.mouse.get_pressed()[0]  # Left mouse button
-            mouse_pos = pygame.mouse.get_pos()
+            mouse_clicked = self.input.mouse_pressed()  # Left mouse button
+            mouse_pos = self.input.mouse_pos()
 
             # Render the current screen
             if self.current_screen == "main_menu":
-                buttons = self.render_main_menu()
+                buttons = self.render_timed(self.render_main_menu)
 
                 # Check for button clicks
                 if mouse_clicked:
+                    self.ensure_data_loaded()
                     if buttons[0].collidepoint(mouse_pos):  # Compare Songs
                         self.run_comparison()
-                        pygame.time.delay(200)  # Prevent double-clicks
-                    elif buttons[1].collidepoint(mouse_pos):  # View Rankings
+                        self.input.delay(200)  # Prevent double-clicks
+                    elif buttons[1].collidepoint(mouse_pos):  # Rank Several Songs
+                        self.run_ranking_round()
+                        self.input.delay(200)
+                    elif buttons[2].collidepoint(mouse_pos):  # Quick Sort
+                        self.start_quick_sort()
+                        self.input.delay(200)
+                    elif buttons[3].collidepoint(mouse_pos):  # Swiss Tournament
+                        self.start_tournament()
+                        self.input.delay(200)
+                    elif buttons[4].collidepoint(mouse_pos):  # View Rankings
                         self.current_screen = "rankings"
                         self.scroll_offset = 0
-                        pygame.time.delay(200)
-                    elif buttons[2].collidepoint(mouse_pos):  # View Listening Statistics
+                        self.input.delay(200)
+                    elif buttons[5].collidepoint(mouse_pos):  # View Listening Statistics
                         self.current_screen = "stats"
                         self.scroll_offset = 0
-                        pygame.time.delay(200)
-                    elif buttons[3].collidepoint(mouse_pos):  # View Ranking Confidence
+                        self.input.delay(200)
+                    elif buttons[6].collidepoint(mouse_pos):  # View Ranking Confidence
                         self.current_screen = "progress"
                         self.scroll_offset = 0
-                        pygame.time.delay(200)
-                    elif buttons[4].collidepoint(mouse_pos):  # Refresh Song List
+                        self.input.delay(200)
+                    elif buttons[7].collidepoint(mouse_pos):  # Refresh Song List
+                        self.collect_next_pair()
                         self.load_songs()
                         self.load_rankings()
                         self.load_listening_stats()
                         self.log_message("Song list refreshed.")
-                        pygame.time.delay(200)
-                    elif buttons[5].collidepoint(mouse_pos):  # Exit
+                        self.input.delay(200)
+                    elif buttons[8].collidepoint(mouse_pos):  # Exit
                         running = False
 
             elif self.current_screen == "comparison":
-                buttons = self.render_comparison_screen()
+                buttons = self.render_timed(self.render_comparison_screen)
 
                 # Check for button clicks
                 if mouse_clicked:
                     if buttons[0].collidepoint(mouse_pos):  # Play Song 1
                         self.play_song(os.path.join(self.recordings_dir, self.current_song1))
                         self.current_screen = "comparison"  # Return to comparison after playback
-                        pygame.time.delay(200)
+                        self.input.delay(200)
                     elif buttons[1].collidepoint(mouse_pos):  # Prefer Song 1
+                        candidates = self.collect_next_pair()
                         rating_change = self.update_ranking(self.current_song1, self.current_song2)
                         self.log_message(f"You preferred: {self.current_song1} (Rating +{rating_change:.1f})")
-                        # Continue with a new comparison
-                        self.run_comparison()
-                        pygame.time.delay(200)
+                        self.log_message(self.describe_rank_movements())
+                        # Continue with a new comparison, precomputed while this one was judged if still valid
+                        self.run_comparison(self.reuse_next_pair(candidates, rating_change))
+                        self.input.delay(200)
                     elif buttons[2].collidepoint(mouse_pos):  # Play Song 2
                         self.play_song(os.path.join(self.recordings_dir, self.current_song2))
                         self.current_screen = "comparison"  # Return to comparison after playback
-                        pygame.time.delay(200)
+                        self.input.delay(200)
                     elif buttons[3].collidepoint(mouse_pos):  # Prefer Song 2
+                        candidates = self.collect_next_pair()
                         rating_change = self.update_ranking(self.current_song2, self.current_song1)
                         self.log_message(f"You preferred: {self.current_song2} (Rating +{rating_change:.1f})")
-                        # Continue with a new comparison
-                        self.run_comparison()
-                        pygame.time.delay(200)
+                        self.log_message(self.describe_rank_movements())
+                        # Continue with a new comparison, precomputed while this one was judged if still valid
+                        self.run_comparison(self.reuse_next_pair(candidates, rating_change))
+                        self.input.delay(200)
                     elif buttons[4].collidepoint(mouse_pos):  # Back to Main Menu
                         self.current_screen = "main_menu"
-                        pygame.time.delay(200)
+                        self.input.delay(200)
+                    elif buttons[5].collidepoint(mouse_pos):  # Undo Vote
+                        entry = self.undo_vote()
+                        if entry is not None:
+                            self.log_message("Vote undone.")
+                            # Ask the undone pair again; after a ranking round, continue with a new pair
+                            self.run_comparison(None if entry.get("kind") else (entry["song1"], entry["song2"]))
+                        self.input.delay(200)
+                    elif buttons[6].collidepoint(mouse_pos):  # Redo Vote
+                        if self.redo_vote() is not None:
+                            self.log_message("Vote redone.")
+                            self.run_comparison()
+                        self.input.delay(200)
+
+            elif self.current_screen == "quick_sort":
+                buttons = self.render_timed(self.render_quick_sort_screen)
+
+                # Check for button clicks
+                if mouse_clicked:
+                    song, pivot = self.sorter.question()
+                    if buttons[0].collidepoint(mouse_pos) or buttons[2].collidepoint(mouse_pos):  # Play a song
+                        self.play_song(os.path.join(self.recordings_dir,
+                                                    song if buttons[0].collidepoint(mouse_pos) else pivot))
+                        self.current_screen = "quick_sort"  # Return to the question after playback
+                        self.input.delay(200)
+                    elif buttons[1].collidepoint(mouse_pos):  # Prefer Song 1
+                        self.answer_quick_sort(song)
+                        self.input.delay(200)
+                    elif buttons[3].collidepoint(mouse_pos):  # Prefer Song 2
+                        self.answer_quick_sort(pivot)
+                        self.input.delay(200)
+                    elif buttons[4].collidepoint(mouse_pos):  # Pause and Return
+                        self.current_screen = "main_menu"
+                        self.input.delay(200)
+
+            elif self.current_screen == "tournament":
+                buttons = self.render_timed(self.render_tournament_screen)
+
+                # Check for button clicks
+                if mouse_clicked:
+                    song1, song2 = self.tournament.current_match()
+                    if buttons[0].collidepoint(mouse_pos) or buttons[2].collidepoint(mouse_pos):  # Play a song
+                        self.play_song(os.path.join(self.recordings_dir,
+                                                    song1 if buttons[0].collidepoint(mouse_pos) else song2))
+                        self.current_screen = "tournament"  # Return to the match after playback
+                        self.input.delay(200)
+                    elif buttons[1].collidepoint(mouse_pos) or buttons[3].collidepoint(mouse_pos):  # Prefer a song
+                        winner, loser = (song1, song2) if buttons[1].collidepoint(mouse_pos) else (song2, song1)
+                        rating_change = self.answer_tournament(winner, loser)
+                        self.log_message(f"You preferred: {winner} (Rating +{rating_change:.1f})")
+                        self.input.delay(200)
+                    elif buttons[4].collidepoint(mouse_pos):  # Pause and Return
+                        self.current_screen = "main_menu"
+                        self.input.delay(200)
+
+            elif self.current_screen == "ranking":
+                play_buttons, pick_buttons, clear_button, back_button = self.render_timed(self.render_ranking_screen)
+
+                # Check for button clicks
+                if mouse_clicked:
+                    for song, play_button, pick_button in zip(self.ranking_songs, play_buttons, pick_buttons):
+                        if play_button.collidepoint(mouse_pos):
+                            self.play_song(os.path.join(self.recordings_dir, song))
+                            self.current_screen = "ranking"  # Return to the round after playback
+                            self.input.delay(200)
+                            break
+                        if pick_button.collidepoint(mouse_pos):
+                            rating_change = self.pick_ranking_song(song)
+                            if rating_change is not None:
+                                self.log_message(f"Your favourite: {self.ranking_order[0]} "
+                                                 f"(Rating +{rating_change:.1f})")
+                                self.log_message(self.describe_rank_movements())
+                                # Continue with a new round
+                                self.run_ranking_round()
+                            self.input.delay(200)
+                            break
+                    else:
+                        if clear_button.collidepoint(mouse_pos):
+                            self.ranking_order = []
+                            self.input.delay(200)
+                        elif back_button.collidepoint(mouse_pos):
+                            self.current_screen = "main_menu"
+                            self.input.delay(200)
 
             elif self.current_screen == "rankings":
-                back_button = self.render_rankings_screen()
+                if self.show_consensus:
+                    self.refresh_consensus()  # Other users' votes show up while the screen is open
+                back_button, earlier_button, later_button, group_button = self.render_timed(self.render_rankings_screen)
 
                 # Check for button clicks
-                if mouse_clicked and back_button.collidepoint(mouse_pos):
-                    self.current_screen = "main_menu"
-                    pygame.time.delay(200)
+                if mouse_clicked:
+                    # Step through the history one checkpoint interval at a time
+                    index = self.rankings_view[0] if self.rankings_view else len(self.comparison_history)
+                    if back_button.collidepoint(mouse_pos):
+                        self.rankings_view = None
+                        self.show_consensus = False
+                        self.current_screen = "main_menu"
+                        self.input.delay(200)
+                    elif group_button.collidepoint(mouse_pos):
+                        self.show_consensus = not self.show_consensus
+                        if self.show_consensus:
+                            self.refresh_consensus(force=True)
+                        self.scroll_offset = 0
+                        self.input.delay(200)
+                    elif self.show_consensus:
+                        pass  # Time travel only applies to this profile's own rankings
+                    elif earlier_button.collidepoint(mouse_pos):
+                        self.view_rankings_at(index - self.checkpoints.interval)
+                        self.input.delay(200)
+                    elif later_button.collidepoint(mouse_pos):
+                        self.view_rankings_at(index + self.checkpoints.interval)
+                        self.input.delay(200)
 
             elif self.current_screen == "stats":
-                back_button = self.render_stats_screen()
+                back_button = self.render_timed(self.render_stats_screen)
 
                 # Check for button clicks
                 if mouse_clicked and back_button.collidepoint(mouse_pos):
                     self.current_screen = "main_menu"
-                    pygame.time.delay(200)
+                    self.input.delay(200)
 
             elif self.current_screen == "progress":
-                back_button = self.render_progress_screen()
+                back_button = self.render_timed(self.render_progress_screen)
 
                 # Check for button clicks
                 if mouse_clicked and back_button.collidepoint(mouse_pos):
                     self.current_screen = "main_menu"
-                    pygame.time.delay(200)
+                    self.input.delay(200)
+
+            if PROFILER.enabled:
+                PROFILER.render_overlay(self.screen, self.font_small)
 
             # Update the display
             pygame.display.flip()
+            mark_first_frame()
+
+            if PROFILER.enabled:
+                PROFILER.record("frame", perf_counter() - frame_start)
 
             # Cap the frame rate
-            clock.tick(60)
+            clock.tick(self.frame_rate)
 
+        PROFILER.dump(DUMP_PATH)
+        self.collect_next_pair()
+        self.rank_confidence.close()
+        self.input.close()
         pygame.quit()
         print("Thanks for using Song Ranker!")
 
@@ -0,0 +1,625 @@
+"""
+LAN multiplayer for the Song Guessing Game.
+
+An asyncio server runs synchronized rounds for everyone connected: each round
+one song plays, every player gets a single guess, guesses are scored the moment
+they arrive (faster correct answers earn more, as in timed rounds) and the
+leaderboard is streamed to all players while the round is running.
+
+Clients talk to the server over TCP with one JSON object per line.
+
+Client -> server:
+    {"type": "join", "name": "Alice"}
+    {"type": "guess", "round": 3, "answer": "Suomi"}
+
+Server -> client:
+    welcome, game_start, round_start, result, leaderboard, round_end, game_over, error
+
+With --stream the server also serves each round's recording in byte ranges
+(see audio_stream.py) on a second port announced in the welcome message.
+round_start then carries a start_at time in the server's clock, a few seconds
+ahead, so every client can buffer the song and start it at the same moment.
+
+Examples:
+    python multiplayer.py serve --port 5555 --rounds 10 --play
+    python multiplayer.py serve --stream
+    python multiplayer.py join --host 192.168.1.20 --name Alice --listen
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import asyncio
+import argparse
+
+from audio_stream import AudioCache, AudioStreamClient, AudioStreamServer
+from country_matcher import CountryMatcher
+from instrumentation import PROFILER
+from latency import speed_points
+from leaderboard import Leaderboard
+
+DEFAULT_PORT = 5555
+MAX_MESSAGE_BYTES = 4096  # Longest line a client may send
+SEND_QUEUE_LIMIT = 256  # Messages buffered for one client before it counts as stalled
+AUDIO_EXTENSIONS = ('.mp3', '.wav', '.ogg', '.flac')
+
+
+def encode(message):
+    """Serialize one protocol message as a JSON line."""
+    return (json.dumps(message, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+def song_country(filename):
+    """Country part of a Country_Artist_Song filename, or "" if it has none."""
+    parts = os.path.splitext(os.path.basename(filename))[0].split('_')
+    return parts[0] if len(parts) >= 3 else ""
+
+
+def load_catalog(recordings_dir="recordings"):
+    """Return the songs in the recordings directory that carry a country."""
+    if not os.path.isdir(recordings_dir):
+        return []
+    return sorted(f for f in os.listdir(recordings_dir)
+                  if f.lower().endswith(AUDIO_EXTENSIONS) and song_country(f))
+
+
+class Player:
+    """One connected client and its outgoing message queue."""
+
+    def __init__(self, player_id, name, writer):
+        self.player_id = player_id
+        self.name = name
+        self.writer = writer
+        self.queue = asyncio.Queue(SEND_QUEUE_LIMIT)
+        self.sender = None  # Task draining the queue into the socket
+        self.score = 0
+        self.connected = True
+
+    def send(self, data):
+        """Queue encoded bytes for sending; False if the client has stopped reading."""
+        try:
+            self.queue.put_nowait(data)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+
+class Round:
+    """State of the round currently being played."""
+
+    def __init__(self, number, song, started_at, deadline, start_at):
+        self.number = number
+        self.song = song
+        self.country = song_country(song)
+        self.token = uuid.uuid4().hex[:12]  # Names the song to clients without giving away the answer
+        self.started_at = started_at  # Event loop clock
+        self.deadline = deadline
+        self.start_at = start_at  # Wall-clock start sent to clients
+        self.answered = set()  # Player ids that already guessed
+        self.all_answered = asyncio.Event()
+        self.open = True
+
+
+class GuessingServer:
+    """
+    Runs multiplayer games over TCP.
+
+    Every client gets its own send queue drained by a writer task, so a slow
+    or stalled client never holds up a broadcast; a client whose queue fills
+    up is disconnected. Broadcasts are encoded once and shared by every queue.
+    Scoring a guess is a matcher lookup plus an O(log n) leaderboard update,
+    so per-guess latency stays flat as the number of players grows.
+
+    With streaming on, each round is announced `start_delay` seconds before
+    it starts so clients can buffer the audio; only the current round's song
+    can be streamed, and the next one is read ahead into the cache.
+    """
+
+    def __init__(self, songs, rounds=10, round_seconds=20.0, intermission=5.0, min_players=1,
+                 match_mode="fuzzy", leaderboard_size=10, leaderboard_interval=0.5,
+                 recordings_dir="recordings", play_audio=False, stream_audio=False, start_delay=None,
+                 cache_bytes=64 * 1024 * 1024):
+        self.songs = list(songs)
+        self.rounds = rounds
+        self.round_seconds = round_seconds
+        self.intermission = intermission
+        self.min_players = min_players
+        self.match_mode = match_mode
+        self.leaderboard_size = leaderboard_size
+        self.leaderboard_interval = leaderboard_interval  # Seconds between live leaderboard updates
+        self.recordings_dir = recordings_dir
+        self.play_audio = play_audio
+        self.audio = AudioStreamServer(self.resolve_audio, AudioCache(cache_bytes)) if stream_audio else None
+        self.start_delay = start_delay if start_delay is not None else (2.0 if stream_audio else 0.0)
+
+        self.matcher = CountryMatcher(sorted({song_country(song) for song in self.songs} - {""}))
+        self.players = {}  # player id -> Player
+        self.standings = Leaderboard()  # player id -> score for the current game
+        self.standings_changed = False
+        self.round = None
+        self.players_changed = asyncio.Event()
+        self.server = None
+        self.port = None
+        self._handlers = set()  # Open connection handler tasks
+        self._next_id = 1
+
+    async def start(self, host="0.0.0.0", port=DEFAULT_PORT):
+        """Start listening; port 0 picks a free port (see self.port)."""
+        self.server = await asyncio.start_server(self.handle_client, host, port,
+                                                 limit=MAX_MESSAGE_BYTES, backlog=1024)
+        self.port = self.server.sockets[0].getsockname()[1]
+        if self.audio is not None:
+            await self.audio.start(host, self.port + 1 if port else 0)
+        return self.server
+
+    async def stop(self):
+        """Flush what is queued for each player, then close every connection."""
+        players = list(self.players.values())
+        for player in players:
+            self.disconnect(player)
+        await asyncio.gather(*(player.sender for player in players if player.sender), return_exceptions=True)
+        for player in players:
+            player.writer.close()
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+        if self.audio is not None:
+            await self.audio.stop()
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+
+    # Connections
+
+    async def handle_client(self, reader, writer):
+        """Serve one client connection from join to disconnect."""
+        player = None
+        self._handlers.add(asyncio.current_task())
+        try:
+            line = await reader.readline()
+            message = json.loads(line) if line else None
+            if not isinstance(message, dict) or message.get("type") != "join":
+                writer.write(encode({"type": "error", "message": "expected a join message"}))
+                await writer.drain()
+                return
+
+            player = Player(f"p{self._next_id}", str(message.get("name") or f"Player {self._next_id}")[:32], writer)
+            self._next_id += 1
+            self.players[player.player_id] = player
+            self.standings.update(player.player_id, 0)
+            player.sender = asyncio.create_task(self._send_loop(player))
+
+            player.send(encode({"type": "welcome", "player_id": player.player_id,
+                                "server_time": time.time(), "players": len(self.players),
+                                "audio_port": self.audio.port if self.audio else None}))
+            if self.round is not None and self.round.open:
+                player.send(encode(self.round_start_message()))
+            self.players_changed.set()
+
+            while player.connected:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    player.send(encode({"type": "error", "message": "invalid JSON"}))
+                    continue
+                if isinstance(message, dict) and message.get("type") == "guess":
+                    self.handle_guess(player, message)
+                else:
+                    player.send(encode({"type": "error", "message": "unknown message"}))
+        except (ConnectionError, ValueError, asyncio.IncompleteReadError):
+            pass  # Disconnected, or a line longer than MAX_MESSAGE_BYTES
+        finally:
+            if player is not None:
+                self.disconnect(player)
+                await player.sender
+            writer.close()
+            self._handlers.discard(asyncio.current_task())
+
+    async def _send_loop(self, player):
+        """Write queued messages to the client, coalescing whatever is waiting."""
+        try:
+            while True:
+                data = await player.queue.get()
+                if data is None:
+                    break
+                chunks = [data]
+                while not player.queue.empty():
+                    extra = player.queue.get_nowait()
+                    if extra is None:
+                        player.connected = False
+                        break
+                    chunks.append(extra)
+                player.writer.write(b"".join(chunks))
+                await player.writer.drain()
+                if not player.connected:
+                    break
+        except (ConnectionError, OSError):
+            player.connected = False
+
+    def disconnect(self, player):
+        """Forget a player and stop its writer task."""
+        if self.players.pop(player.player_id, None) is None:
+            return
+        player.connected = False
+        self.standings.remove(player.player_id)
+        self.standings_changed = True
+        # The sentinel wakes the writer; if the queue is full the writer is stuck anyway
+        if not player.send(None):
+            player.writer.transport.abort()
+        self.players_changed.set()
+        self._check_all_answered()
+
+    def broadcast(self, message):
+        """Send one message to every player, dropping clients that stopped reading."""
+        data = encode(message)
+        for player in list(self.players.values()):
+            if not player.send(data):
+                self.disconnect(player)
+
+    # Games and rounds
+
+    async def run(self, games=0):
+        """Run games back to back (forever when games is 0), waiting for enough players."""
+        played = 0
+        while games == 0 or played < games:
+            while len(self.players) < self.min_players:
+                self.players_changed.clear()
+                await self.players_changed.wait()
+            await self.run_game()
+            played += 1
+
+    async def run_game(self):
+        order = random.sample(self.songs, min(self.rounds, len(self.songs)))
+        for player in self.players.values():
+            player.score = 0
+            self.standings.update(player.player_id, 0)
+        self.broadcast({"type": "game_start", "rounds": len(order)})
+
+        self._read_ahead(order[0] if order else None)
+        for number, song in enumerate(order, 1):
+            await self.run_round(number, song, order[number] if number < len(order) else None)
+            if number < len(order):
+                await asyncio.sleep(self.intermission)
+
+        self.broadcast({"type": "game_over", "leaderboard": self.top_players()})
+
+    async def run_round(self, number, song, next_song=None):
+        loop = asyncio.get_running_loop()
+        started_at = loop.time() + self.start_delay
+        self.round = Round(number, song, started_at, started_at + self.round_seconds,
+                           time.time() + self.start_delay)
+        self.broadcast(self.round_start_message())
+        loop.call_later(self.start_delay, self._play, song)
+        self._read_ahead(next_song)
+
+        streamer = asyncio.create_task(self._stream_leaderboard())
+        try:
+            await asyncio.wait_for(self.round.all_answered.wait(), self.start_delay + self.round_seconds)
+        except asyncio.TimeoutError:
+            pass
+        self.round.open = False
+        streamer.cancel()
+
+        self.broadcast({"type": "round_end", "round": number, "country": self.round.country,
+                        "song": os.path.splitext(song)[0], "leaderboard": self.top_players()})
+        self.standings_changed = False
+
+    def round_start_message(self):
+        remaining = max(0.0, self.round.deadline - asyncio.get_running_loop().time())
+        return {"type": "round_start", "round": self.round.number, "song_id": self.round.token,
+                "duration": self.round_seconds, "remaining": remaining, "server_time": time.time(),
+                "start_at": self.round.start_at}
+
+    def resolve_audio(self, song_id):
+        """Path of the song a client may stream for this token (only the current round's)."""
+        if self.round is not None and self.round.open and song_id == self.round.token:
+            return os.path.join(self.recordings_dir, self.round.song)
+        return None
+
+    def _read_ahead(self, song):
+        """Warm the audio cache with an upcoming song."""
+        if self.audio is not None and song is not None:
+            self.audio.cache.prefetch(os.path.join(self.recordings_dir, song))
+
+    def _play(self, song):
+        """Play the round's song on the server machine (for a shared speaker)."""
+        if not self.play_audio:
+            return
+        import pygame  # Only the host that plays audio needs pygame
+        if not pygame.mixer.get_init():
+            pygame.mixer.init()
+        pygame.mixer.music.load(os.path.join(self.recordings_dir, song))
+        pygame.mixer.music.play()
+
+    async def _stream_leaderboard(self):
+        """Push the top of the leaderboard while scores are changing."""
+        while True:
+            await asyncio.sleep(self.leaderboard_interval)
+            if self.standings_changed:
+                self.standings_changed = False
+                self.broadcast({"type": "leaderboard", "round": self.round.number,
+                                "leaderboard": self.top_players()})
+
+    def top_players(self):
+        return [{"rank": i + 1, "name": self.players[player_id].name, "score": score}
+                for i, (player_id, score) in enumerate(self.standings.top(self.leaderboard_size))
+                if player_id in self.players]
+
+    def handle_guess(self, player, message):
+        """Score a guess as soon as it arrives and answer the guessing player."""
+        with PROFILER.timer("multiplayer.handle_guess"):
+            current = self.round
+            if current is None or not current.open or message.get("round") != current.number:
+                player.send(encode({"type": "error", "message": "round is not open",
+                                    "round": message.get("round")}))
+                return
+            now = asyncio.get_running_loop().time()
+            if now < current.started_at:
+                player.send(encode({"type": "error", "message": "round has not started",
+                                    "round": current.number}))
+                return
+            if player.player_id in current.answered:
+                player.send(encode({"type": "error", "message": "already answered",
+                                    "round": current.number}))
+                return
+
+            time_to_answer = now - current.started_at
+            answer = str(message.get("answer", ""))
+            correct = self.matcher.is_correct(answer, current.country, self.match_mode)
+            points = speed_points(time_to_answer) if correct else 0
+
+            current.answered.add(player.player_id)
+            if points:
+                player.score += points
+                self.standings.update(player.player_id, player.score)
+                self.standings_changed = True
+
+            player.send(encode({"type": "result", "round": current.number, "correct": correct,
+                                "points": points, "score": player.score,
+                                "rank": self.standings.rank(player.player_id),
+                                "time_to_answer": round(time_to_answer, 3)}))
+            self._check_all_answered()
+
+    def _check_all_answered(self):
+        if self.round is not None and self.round.open and self.players and \
+                all(player_id in self.round.answered for player_id in self.players):
+            self.round.all_answered.set()
+
+
+class GuessingClient:
+    """Minimal asyncio client for the multiplayer protocol."""
+
+    def __init__(self, name):
+        self.name = name
+        self.reader = None
+        self.writer = None
+        self.player_id = None
+        self.clock_offset = 0.0  # Server clock minus local clock, in seconds
+
+    async def connect(self, host="127.0.0.1", port=DEFAULT_PORT):
+        """Connect and join; returns the server's welcome message."""
+        self.reader, self.writer = await asyncio.open_connection(host, port, limit=1 << 20)
+        sent = time.time()
+        await self.send({"type": "join", "name": self.name})
+        welcome = await self.receive()
+        received = time.time()
+        if welcome is None or welcome.get("type") != "welcome":
+            raise ConnectionError(f"Server refused to join: {welcome}")
+        self.player_id = welcome["player_id"]
+        # Assume the welcome was stamped halfway through the round trip
+        self.clock_offset = welcome["server_time"] - (sent + received) / 2
+        return welcome
+
+    def local_time(self, server_time):
+        """Convert a server timestamp to this machine's clock."""
+        return server_time - self.clock_offset
+
+    async def send(self, message):
+        self.writer.write(encode(message))
+        await self.writer.drain()
+
+    async def guess(self, round_number, answer):
+        await self.send({"type": "guess", "round": round_number, "answer": answer})
+
+    async def receive(self):
+        """Next message from the server, or None once the connection closes."""
+        line = await self.reader.readline()
+        return json.loads(line) if line else None
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except ConnectionError:
+                pass
+
+
+class RoundListener:
+    """Streams each round's song from the server and plays it in sync with everyone else."""
+
+    def __init__(self, client, audio, prebuffer=256 * 1024):
+        self.client = client
+        self.audio = audio
+        self.prebuffer = prebuffer
+        self.buffer = None
+        self.filling = None
+        self.task = None
+
+    def start(self, message):
+        self.stop()
+        self.task = asyncio.ensure_future(self._listen(message))
+
+    async def _listen(self, message):
+        import pygame  # Only listening clients need audio
+        loop = asyncio.get_running_loop()
+        try:
+            self.buffer, self.filling = await self.audio.open(message["song_id"], self.prebuffer)
+        except (OSError, ValueError, asyncio.IncompleteReadError) as e:
+            print(f"Could not stream the song: {e}")
+            return
+
+        start_at = self.client.local_time(message["start_at"])
+        ready = await loop.run_in_executor(None, self.buffer.wait_ready, max(1.0, start_at - time.time()) + 5.0)
+        if not ready:
+            if self.buffer.error is not None:
+                print(f"Could not stream the song: {self.buffer.error}")
+            return
+        delay = start_at - time.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        late = max(0.0, -delay)  # Buffered or joined late: skip ahead to stay in sync
+
+        def begin():
+            if not pygame.mixer.get_init():
+                pygame.mixer.init()
+            pygame.mixer.music.load(self.buffer, self.buffer.name_hint)
+            if late < 0.25:
+                pygame.mixer.music.play()
+                return
+            try:
+                pygame.mixer.music.play(start=late)
+            except pygame.error:
+                pygame.mixer.music.play()  # Formats that cannot seek start from the beginning
+
+        await loop.run_in_executor(None, begin)
+
+    def stop(self):
+        """Stop playback and abandon the current stream."""
+        if self.buffer is not None:
+            self.buffer.fail()  # Unblock a decoder waiting for data before stopping it
+        for task in (self.task, self.filling):
+            if task is not None and not task.done():
+                task.cancel()
+        if self.buffer is not None:
+            import pygame
+            if pygame.mixer.get_init():
+                pygame.mixer.music.stop()
+                pygame.mixer.music.unload()
+        self.buffer = self.filling = self.task = None
+
+
+async def play_in_terminal(host, port, name, listen=False):
+    """Join a game and type guesses in the terminal, optionally hearing the songs."""
+    client = GuessingClient(name)
+    welcome = await client.connect(host, port)
+    print(f"Joined as {name} ({welcome['players']} players connected)")
+    loop = asyncio.get_running_loop()
+    current_round = None
+
+    listener = None
+    if listen:
+        if welcome.get("audio_port"):
+            listener = RoundListener(client, AudioStreamClient(host, welcome["audio_port"]))
+        else:
+            print("This server does not stream audio; listen on the host's speakers.")
+
+    async def read_guesses():
+        # Each typed line is a guess for whichever round is open
+        while True:
+            line = await loop.run_in_executor(None, sys.stdin.readline)
+            if not line:
+                break
+            if current_round is not None:
+                await client.guess(current_round, line.strip())
+
+    reader = asyncio.create_task(read_guesses())
+    try:
+        while True:
+            message = await client.receive()
+            if message is None:
+                print("Server closed the connection.")
+                break
+            kind = message["type"]
+            if kind == "round_start":
+                current_round = message["round"]
+                print(f"\nRound {current_round}: which country is this song from? "
+                      f"({message['remaining']:.0f}s)")
+                if listener is not None:
+                    listener.start(message)
+            elif kind == "result":
+                verdict = "Correct" if message["correct"] else "Wrong"
+                print(f"{verdict}! +{message['points']} points in {message['time_to_answer']:.2f}s "
+                      f"(score {message['score']}, rank {message['rank']})")
+            elif kind == "round_end":
+                current_round = None
+                if listener is not None:
+                    listener.stop()
+                print(f"It was {message['song']} from {message['country']}.")
+                for entry in message["leaderboard"][:5]:
+                    print(f"  {entry['rank']}. {entry['name']}: {entry['score']}")
+            elif kind == "game_over":
+                print("\nGame over! Final standings:")
+                for entry in message["leaderboard"]:
+                    print(f"  {entry['rank']}. {entry['name']}: {entry['score']}")
+            elif kind == "error":
+                print(f"({message['message']})")
+    finally:
+        reader.cancel()
+        if listener is not None:
+            listener.stop()
+            await listener.audio.close()
+        await client.close()
+
+
+async def serve(args):
+    songs = load_catalog(args.recordings)
+    if not songs:
+        print(f"No Country_Artist_Song recordings found in '{args.recordings}'.")
+        return 1
+
+    server = GuessingServer(songs, rounds=args.rounds, round_seconds=args.round_seconds,
+                            intermission=args.intermission, min_players=args.min_players,
+                            match_mode=args.match_mode, recordings_dir=args.recordings,
+                            play_audio=args.play, stream_audio=args.stream, start_delay=args.start_delay)
+    await server.start(args.host, args.port)
+    print(f"Serving {len(songs)} songs on {args.host}:{server.port}; "
+          f"games start once {args.min_players} player(s) join")
+    if server.audio is not None:
+        print(f"Streaming audio on port {server.audio.port}")
+    try:
+        await server.run(args.games)
+    finally:
+        await server.stop()
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LAN multiplayer for the Song Guessing Game")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = commands.add_parser("serve", help="Host games for players on the network")
+    serve_parser.add_argument("--host", default="0.0.0.0")
+    serve_parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    serve_parser.add_argument("--recordings", default="recordings")
+    serve_parser.add_argument("--rounds", type=int, default=10)
+    serve_parser.add_argument("--round-seconds", type=float, default=20.0)
+    serve_parser.add_argument("--intermission", type=float, default=5.0)
+    serve_parser.add_argument("--min-players", type=int, default=1)
+    serve_parser.add_argument("--games", type=int, default=0, help="Stop after this many games (0 = run forever)")
+    serve_parser.add_argument("--match-mode", choices=["strict", "exact", "fuzzy"], default="fuzzy")
+    serve_parser.add_argument("--play", action="store_true", help="Play each round's song on this machine")
+    serve_parser.add_argument("--stream", action="store_true", help="Stream each round's song to players (port + 1)")
+    serve_parser.add_argument("--start-delay", type=float,
+                              help="Seconds between announcing a round and starting it (default 2 when streaming)")
+
+    join_parser = commands.add_parser("join", help="Join a game from the terminal")
+    join_parser.add_argument("--host", default="127.0.0.1")
+    join_parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    join_parser.add_argument("--name", default=os.environ.get("ESC_PLAYER", "player"))
+    join_parser.add_argument("--listen", action="store_true", help="Stream and play the songs on this machine")
+
+    args = parser.parse_args()
+    try:
+        if args.command == "serve":
+            return asyncio.run(serve(args))
+        return asyncio.run(play_in_terminal(args.host, args.port, args.name, args.listen))
+    except KeyboardInterrupt:
+        return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,226 @@
+"""
+Load test for the multiplayer guessing server.
+
+Starts a server on the loopback interface (or targets a running one with
+--port), connects many simulated players at once and has each of them guess
+every round after a random think time. Reports guess round-trip latency
+percentiles, measured from sending a guess to receiving its scored result.
+
+With --stream every player also downloads each round's song through the
+audio stream, reporting how long it took to fill the jitter buffer and to
+fetch the whole file, plus the server's audio cache hit rate.
+
+Examples:
+    python multiplayer_loadtest.py --clients 200 --rounds 5
+    python multiplayer_loadtest.py --clients 500 --max-p99-ms 50 --output load.json
+    python multiplayer_loadtest.py --clients 200 --stream --song-kb 4096
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import asyncio
+import argparse
+import tempfile
+from time import perf_counter
+
+from country_matcher import COUNTRY_ALIASES
+from instrumentation import Profiler, PROFILER
+from audio_stream import AudioStreamClient
+from multiplayer import GuessingServer, GuessingClient
+
+COUNTRIES = sorted(COUNTRY_ALIASES)
+
+
+def synthetic_catalog(count):
+    """Song filenames spread over every known country (no audio files needed)."""
+    return [f"{COUNTRIES[i % len(COUNTRIES)]}_Artist{i}_Song{i}.wav" for i in range(count)]
+
+
+def write_catalog(directory, songs, size):
+    """Write placeholder files of `size` random bytes for streaming (never decoded)."""
+    for song in songs:
+        with open(os.path.join(directory, song), 'wb') as f:
+            f.write(os.urandom(size))
+
+
+async def stream_song(audio, song_id, profiler, counters):
+    """Download one song through a jitter buffer, timing the prebuffer and the full fetch."""
+    start = perf_counter()
+    buffer, filling = await audio.open(song_id)
+    ready_recorded = buffer.ready()
+    if ready_recorded:
+        profiler.record("stream_ready", perf_counter() - start)
+    while not filling.done():
+        await asyncio.sleep(0.005)
+        if not ready_recorded and buffer.ready():
+            profiler.record("stream_ready", perf_counter() - start)
+            ready_recorded = True
+    await filling
+    profiler.record("stream_complete", perf_counter() - start)
+    counters["streamed_bytes"] += buffer.available
+
+
+async def simulated_player(index, host, port, profiler, answer_for, think_time, accuracy, counters, stream=False):
+    """Join, guess once per round and record each guess's round-trip time."""
+    rng = random.Random(index)
+    client = GuessingClient(f"bot{index}")
+    welcome = await client.connect(host, port)
+    audio = AudioStreamClient(host, welcome["audio_port"]) if stream and welcome.get("audio_port") else None
+    sent_at = {}
+
+    async def guess_later(message):
+        round_number = message["round"]
+        if audio is not None:
+            await stream_song(audio, message["song_id"], profiler, counters)
+        # Guess once the round has started, after some thinking
+        delay = client.local_time(message["start_at"]) - time.time()
+        await asyncio.sleep(max(0.0, delay) + rng.uniform(0, think_time))
+        country = answer_for(round_number)
+        answer = country if country and rng.random() < accuracy else rng.choice(COUNTRIES)
+        sent_at[round_number] = perf_counter()
+        await client.guess(round_number, answer)
+
+    try:
+        while True:
+            message = await client.receive()
+            if message is None or message["type"] == "game_over":
+                break
+            if message["type"] == "round_start":
+                asyncio.ensure_future(guess_later(message))
+            elif message["type"] == "result":
+                profiler.record("guess_rtt", perf_counter() - sent_at.pop(message["round"]))
+                counters["guesses"] += 1
+                counters["correct"] += message["correct"]
+            elif message["type"] == "leaderboard":
+                counters["leaderboards"] += 1
+            elif message["type"] == "error":
+                counters["errors"] += 1
+    finally:
+        if audio is not None:
+            await audio.close()
+        await client.close()
+
+
+async def run_load_test(clients=200, rounds=5, round_seconds=3.0, think_time=1.0, accuracy=0.6,
+                        songs=200, host="127.0.0.1", port=0, stream=False, song_kb=1024):
+    """Run one game with simulated players and return the report dict."""
+    profiler = Profiler(enabled=True)
+    counters = {"guesses": 0, "correct": 0, "leaderboards": 0, "errors": 0, "streamed_bytes": 0}
+    server = None
+    recordings = None
+
+    if port == 0:
+        PROFILER.reset()
+        PROFILER.enabled = True
+        catalog = synthetic_catalog(songs)
+        if stream:
+            recordings = tempfile.mkdtemp(prefix="esc_stream_")
+            write_catalog(recordings, catalog, song_kb * 1024)
+        server = GuessingServer(catalog, rounds=rounds, round_seconds=round_seconds,
+                                intermission=0.2, min_players=clients, leaderboard_interval=0.25,
+                                recordings_dir=recordings or "recordings", stream_audio=stream)
+        await server.start(host, 0)
+        port = server.port
+        game = asyncio.create_task(server.run(games=1))
+
+    def answer_for(round_number):
+        # Against an in-process server the bots can peek at the answer to be right at the chosen rate
+        if server is not None and server.round is not None and server.round.number == round_number:
+            return server.round.country
+        return None
+
+    start = perf_counter()
+    tasks = [asyncio.create_task(simulated_player(i, host, port, profiler, answer_for,
+                                                 min(think_time, round_seconds * 0.8), accuracy, counters,
+                                                 stream))
+             for i in range(clients)]
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    elapsed = perf_counter() - start
+    failures = [r for r in results if isinstance(r, BaseException)]
+
+    server_timings = {}
+    cache = {}
+    if server is not None:
+        await game
+        if server.audio is not None:
+            cache = {"hits": server.audio.cache.hits, "misses": server.audio.cache.misses,
+                     "bytes_sent": server.audio.bytes_sent}
+        await server.stop()
+        server_timings = PROFILER.summary()
+        PROFILER.enabled = False
+    if recordings:
+        shutil.rmtree(recordings, ignore_errors=True)
+    client_timings = profiler.summary()
+
+    return {
+        "clients": clients,
+        "failed_clients": len(failures),
+        "first_failure": repr(failures[0]) if failures else None,
+        "rounds": rounds,
+        "elapsed_s": elapsed,
+        "counters": counters,
+        "guess_rtt_ms": client_timings.get("guess_rtt", {}),
+        "stream_ready_ms": client_timings.get("stream_ready", {}),
+        "stream_complete_ms": client_timings.get("stream_complete", {}),
+        "audio_cache": cache,
+        "server_ms": server_timings
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multiplayer server load test")
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--round-seconds", type=float, default=3.0)
+    parser.add_argument("--think-time", type=float, default=1.0, help="Longest random delay before a bot guesses")
+    parser.add_argument("--accuracy", type=float, default=0.6, help="Share of bot guesses that are correct")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=0, help="Target a running server instead of starting one")
+    parser.add_argument("--stream", action="store_true", help="Have every player stream each round's song")
+    parser.add_argument("--song-kb", type=int, default=1024, help="Size of the generated songs when streaming")
+    parser.add_argument("--max-p99-ms", type=float, help="Exit with status 1 if the p99 round trip is slower")
+    parser.add_argument("--output", help="Write the full report to this JSON file")
+    args = parser.parse_args()
+
+    report = asyncio.run(run_load_test(args.clients, args.rounds, args.round_seconds, args.think_time,
+                                       args.accuracy, host=args.host, port=args.port, stream=args.stream,
+                                       song_kb=args.song_kb))
+
+    rtt = report["guess_rtt_ms"]
+    counters = report["counters"]
+    print(f"{report['clients']} clients ({report['failed_clients']} failed), {report['rounds']} rounds "
+          f"in {report['elapsed_s']:.2f}s")
+    print(f"guesses: {counters['guesses']} ({counters['correct']} correct), errors: {counters['errors']}, "
+          f"leaderboard updates: {counters['leaderboards']}")
+    if rtt:
+        print(f"guess round trip: p50 {rtt['p50_ms']:.2f}ms, p95 {rtt['p95_ms']:.2f}ms, "
+              f"p99 {rtt['p99_ms']:.2f}ms, max {rtt['max_ms']:.2f}ms")
+    for name in ("stream_ready", "stream_complete"):
+        timing = report[name + "_ms"]
+        if timing:
+            print(f"{name.replace('_', ' ')}: p50 {timing['p50_ms']:.1f}ms, p95 {timing['p95_ms']:.1f}ms, "
+                  f"max {timing['max_ms']:.1f}ms")
+    cache = report["audio_cache"]
+    if cache:
+        print(f"audio cache: {cache['hits']} hits, {cache['misses']} misses, "
+              f"{cache['bytes_sent'] / 1e6:.1f} MB sent")
+    handling = report["server_ms"].get("multiplayer.handle_guess")
+    if handling:
+        print(f"server scoring time: p50 {handling['p50_ms']:.3f}ms, p99 {handling['p99_ms']:.3f}ms")
+    if report["first_failure"]:
+        print(f"first failure: {report['first_failure']}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=4)
+
+    if report["failed_clients"] or (args.max_p99_ms is not None and rtt and rtt["p99_ms"] > args.max_p99_ms):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,223 @@
+from collections import deque
+
+from ratings import entry_order, implied_pairs
+
+
+class WinMatrix:
+    """
+    Sparse pairwise win counts, updated one comparison at a time.
+
+    Only pairs that have actually been compared are stored, so memory grows
+    with the comparison history rather than with songs squared. Each pair's
+    majority result forms a directed "preferred over" graph; a strongly
+    connected component of more than one song in that graph means the
+    preferences loop (A > B > C > A) and cannot all be satisfied by any ranking.
+    """
+
+    def __init__(self):
+        self.wins = {}  # winner -> {loser: times winner was preferred}
+        self.total = 0
+        self.version = 0  # Bumped on every comparison
+        self._components = None  # Cached cycles; only stale when some pair's majority changes
+
+    @classmethod
+    def from_history(cls, history):
+        matrix = cls()
+        for entry in history:
+            matrix.add_order(entry_order(entry))
+        return matrix
+
+    def add(self, winner, loser):
+        """Record one comparison; returns True if it changed which song the pair favours."""
+        before = self.majority(winner, loser)
+        row = self.wins.setdefault(winner, {})
+        row[loser] = row.get(loser, 0) + 1
+        self.wins.setdefault(loser, {})
+        self.total += 1
+        self.version += 1
+        changed = self.majority(winner, loser) != before
+        if changed:
+            self._components = None
+        return changed
+
+    def add_order(self, order):
+        """Record a ranking round as every pairwise result it implies."""
+        changed = False
+        for winner, loser in implied_pairs(order):
+            changed = self.add(winner, loser) or changed
+        return changed
+
+    def remove(self, winner, loser):
+        """Take back one recorded comparison (an undone vote); returns True if the pair's majority changed."""
+        if self.count(winner, loser) == 0:
+            raise ValueError(f"No comparison of {winner!r} over {loser!r} to remove")
+        before = self.majority(winner, loser)
+        row = self.wins[winner]
+        row[loser] -= 1
+        if row[loser] == 0:
+            del row[loser]
+        self.total -= 1
+        self.version += 1
+        changed = self.majority(winner, loser) != before
+        if changed:
+            self._components = None
+        return changed
+
+    def remove_order(self, order):
+        """Take back every pairwise result of a ranking round."""
+        changed = False
+        for winner, loser in implied_pairs(order):
+            changed = self.remove(winner, loser) or changed
+        return changed
+
+    def count(self, winner, loser):
+        """Times `winner` was preferred over `loser`."""
+        return self.wins.get(winner, {}).get(loser, 0)
+
+    def pair_count(self, song1, song2):
+        """Times the two songs have been compared, in either order."""
+        return self.count(song1, song2) + self.count(song2, song1)
+
+    def majority(self, song1, song2):
+        """The song that won the pair more often, or None if they are level."""
+        difference = self.count(song1, song2) - self.count(song2, song1)
+        if difference == 0:
+            return None
+        return song1 if difference > 0 else song2
+
+    def preferred_over(self, song):
+        """Songs that `song` beats on the majority of their comparisons."""
+        return [other for other, won in self.wins.get(song, {}).items() if won > self.count(other, song)]
+
+    def pairs(self):
+        """Yield (song1, song2, song1_wins, song2_wins) once per compared pair."""
+        for song1, row in self.wins.items():
+            for song2, won in row.items():
+                lost = self.count(song2, song1)
+                # Report each pair from one side only
+                if lost == 0 or song1 < song2:
+                    yield song1, song2, won, lost
+
+    def components(self):
+        """
+        Groups of songs whose majority preferences form cycles, largest first.
+
+        Iterative Tarjan's algorithm: O(songs + compared pairs) and no
+        recursion limit on long preference chains.
+        """
+        if self._components is not None:
+            return self._components
+
+        index = {}
+        lowlink = {}
+        stack = []
+        on_stack = set()
+        found = []
+        counter = 0
+
+        for root in self.wins:
+            if root in index:
+                continue
+            work = [(root, iter(self.preferred_over(root)))]
+            index[root] = lowlink[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack.add(root)
+
+            while work:
+                song, edges = work[-1]
+                advanced = False
+                for other in edges:
+                    if other not in index:
+                        index[other] = lowlink[other] = counter
+                        counter += 1
+                        stack.append(other)
+                        on_stack.add(other)
+                        work.append((other, iter(self.preferred_over(other))))
+                        advanced = True
+                        break
+                    if other in on_stack:
+                        lowlink[song] = min(lowlink[song], index[other])
+                if advanced:
+                    continue
+
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[song])
+                if lowlink[song] == index[song]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == song:
+                            break
+                    if len(component) > 1:
+                        found.append(component)
+
+        found.sort(key=len, reverse=True)
+        self._components = found
+        return found
+
+    def shortest_cycle(self, component):
+        """One shortest preference loop through the component's first song, as a list of songs."""
+        members = set(component)
+        start = component[0]
+        previous = {start: None}
+        queue = deque([start])
+        while queue:
+            song = queue.popleft()
+            for other in self.preferred_over(song):
+                if other == start:
+                    cycle = [song]
+                    while previous[cycle[-1]] is not None:
+                        cycle.append(previous[cycle[-1]])
+                    return cycle[::-1]
+                if other in members and other not in previous:
+                    previous[other] = song
+                    queue.append(other)
+        return []
+
+    def contradicted_pairs(self, ratings):
+        """
+        Pairs whose majority result disagrees with the current ratings.
+
+        Returns (preferred, rated_higher, preferred_wins, rated_higher_wins, rating_gap)
+        tuples, biggest rating gap first. `ratings` maps song -> rating.
+        """
+        contradicted = []
+        for song1, song2, won, lost in self.pairs():
+            if won == lost or song1 not in ratings or song2 not in ratings:
+                continue
+            preferred, other = (song1, song2) if won > lost else (song2, song1)
+            gap = ratings[other] - ratings[preferred]
+            if gap > 0:
+                contradicted.append((preferred, other, max(won, lost), min(won, lost), gap))
+        contradicted.sort(key=lambda c: c[4], reverse=True)
+        return contradicted
+
+    def inconsistency(self, ratings):
+        """
+        Score every pair worth comparing again: split results, pairs inside a
+        preference cycle and pairs the ratings contradict. Higher is more
+        inconsistent. Returns {frozenset(pair): score}.
+        """
+        scores = {}
+        for song1, song2, won, lost in self.pairs():
+            if won and lost:
+                # Closer to an even split means less is known about the pair
+                scores[frozenset((song1, song2))] = 2 * min(won, lost) / (won + lost)
+
+        for component in self.components():
+            members = set(component)
+            for song in component:
+                for other in self.preferred_over(song):
+                    if other in members:
+                        pair = frozenset((song, other))
+                        scores[pair] = scores.get(pair, 0) + 1
+
+        for preferred, other, _, _, gap in self.contradicted_pairs(ratings):
+            pair = frozenset((preferred, other))
+            scores[pair] = scores.get(pair, 0) + min(1.0, gap / 200)
+        return scores
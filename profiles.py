@@ -0,0 +1,26 @@
+import os
+
+PROFILES_DIR = "profiles"
+HISTORY_FILE = "comparison_history.json"
+DEFAULT_PROFILE = ""  # The data files in the working directory itself, from before profiles existed
+
+
+def profile_dir(name, root=""):
+    """Directory holding a profile's data files (the root itself for the default profile)."""
+    return os.path.join(root, PROFILES_DIR, name) if name else root
+
+
+def profile_label(name):
+    return name or "(default)"
+
+
+def list_profiles(root=""):
+    """Profiles with a comparison history: the default one, then every profiles/<name>/, by name."""
+    names = []
+    if os.path.exists(os.path.join(root, HISTORY_FILE)):
+        names.append(DEFAULT_PROFILE)
+    directory = os.path.join(root, PROFILES_DIR)
+    if os.path.isdir(directory):
+        names += sorted(name for name in os.listdir(directory)
+                        if os.path.exists(os.path.join(directory, name, HISTORY_FILE)))
+    return names
@@ -0,0 +1,134 @@
+DEFAULT_RATING = 1000.0
+DEFAULT_UNCERTAINTY = 100.0  # High initial uncertainty
+MIN_UNCERTAINTY = 15
+BASE_K = 32
+
+
+def new_rating():
+    """Rating entry for a song that has never been compared."""
+    return {
+        "rating": DEFAULT_RATING,
+        "uncertainty": DEFAULT_UNCERTAINTY,
+        "comparisons": 0
+    }
+
+
+def expected_score(rating, opponent_rating):
+    """Elo probability that a song rated `rating` beats one rated `opponent_rating`."""
+    return 1 / (1 + 10 ** ((opponent_rating - rating) / 400))
+
+
+def apply_comparison(rankings, winner, loser):
+    """
+    Update two songs' rating entries in place after `winner` was preferred over `loser`.
+
+    The K-factor grows with each song's uncertainty (more dramatic updates while
+    a rating is still unsure), and uncertainty shrinks with every comparison.
+    Returns the magnitude of the winner's rating change.
+    """
+    winner_data = rankings.setdefault(winner, new_rating())
+    loser_data = rankings.setdefault(loser, new_rating())
+
+    # Adaptive K-factor based on uncertainty - higher uncertainty means more dramatic updates
+    winner_k = min(BASE_K * 1.5, BASE_K * (1 + winner_data["uncertainty"] / 100))
+    loser_k = min(BASE_K * 1.5, BASE_K * (1 + loser_data["uncertainty"] / 100))
+
+    # Calculate expected outcome (using Elo formula)
+    winner_rating = winner_data["rating"]
+    loser_rating = loser_data["rating"]
+    expected_win = expected_score(winner_rating, loser_rating)
+
+    # Update uncertainties - decrease based on number of comparisons and certainty of outcome
+    certainty_factor = abs(0.5 - expected_win) * 2  # How certain we were of the outcome
+    uncertainty_reduction = 0.85 - (certainty_factor * 0.1)  # Between 0.75 and 0.85
+    winner_data["uncertainty"] = max(MIN_UNCERTAINTY, winner_data["uncertainty"] * uncertainty_reduction)
+    loser_data["uncertainty"] = max(MIN_UNCERTAINTY, loser_data["uncertainty"] * uncertainty_reduction)
+
+    # Increment comparison counters
+    winner_data["comparisons"] = winner_data.get("comparisons", 0) + 1
+    loser_data["comparisons"] = loser_data.get("comparisons", 0) + 1
+
+    # Update ratings based on actual vs expected outcome
+    winner_data["rating"] = winner_rating + winner_k * (1 - expected_win)
+    loser_data["rating"] = loser_rating + loser_k * (0 - (1 - expected_win))
+
+    return abs(winner_data["rating"] - winner_rating)
+
+
+def apply_ranking(rankings, order):
+    """
+    Update the rating entries of songs ordered from most to least preferred.
+
+    Plackett-Luce: the order is read as successive choices, the top song
+    picked from all of them, the second from the rest and so on. Each song
+    moves by its K-factor times (choices it won - choices it was expected to
+    win), with expectations from Elo strengths 10^(rating / 400). For two
+    songs this is exactly apply_comparison. Returns the magnitude of the top
+    song's rating change.
+    """
+    if len(order) == 2:
+        return apply_comparison(rankings, order[0], order[1])
+
+    entries = [rankings.setdefault(song, new_rating()) for song in order]
+    old_ratings = [entry["rating"] for entry in entries]
+    strengths = [10 ** (rating / 400) for rating in old_ratings]
+    stages = len(order) - 1  # The last song is left over, not chosen
+
+    # Expected choices: each song's chance of being picked in every stage it is still available
+    expected = [0.0] * len(order)
+    remaining = sum(strengths)
+    for stage in range(stages):
+        for position in range(stage, len(order)):
+            expected[position] += strengths[position] / remaining
+        remaining -= strengths[stage]
+
+    for position, entry in enumerate(entries):
+        k = min(BASE_K * 1.5, BASE_K * (1 + entry["uncertainty"] / 100))
+        won = 1 if position < stages else 0
+        entry["rating"] = old_ratings[position] + k * (won - expected[position])
+
+        # Every choice the song took part in counts as a comparison
+        taken_part = min(position + 1, stages)
+        entry["uncertainty"] = max(MIN_UNCERTAINTY, entry["uncertainty"] * 0.85 ** taken_part)
+        entry["comparisons"] = entry.get("comparisons", 0) + taken_part
+
+    return abs(entries[0]["rating"] - old_ratings[0])
+
+
+def comparison_outcome(entry):
+    """Return (winner, loser) for a pairwise comparison history entry."""
+    winner = entry["winner"]
+    loser = entry["song2"] if winner == entry["song1"] else entry["song1"]
+    return winner, loser
+
+
+def entry_order(entry):
+    """Songs of any history entry (a pair or a ranking round), most preferred first."""
+    if entry.get("kind") == "ranking":
+        return entry["order"]
+    return list(comparison_outcome(entry))
+
+
+def implied_pairs(order):
+    """Yield (winner, loser) for every pair of songs in a preference order."""
+    for index, winner in enumerate(order):
+        for loser in order[index + 1:]:
+            yield winner, loser
+
+
+def replay(history, rankings=None):
+    """
+    Re-apply history entries in order, starting from default ratings.
+
+    Yields (entry, order, rankings) after each pair or ranking round so callers
+    can follow ratings over time; history may be any iterable (e.g. a streamed file).
+    Quick sort answers are skipped, as in the ranker: they only reach the
+    ratings through the seeding when the sort finishes.
+    """
+    rankings = {} if rankings is None else rankings
+    for entry in history:
+        if entry.get("kind") == "seed":
+            continue
+        order = entry_order(entry)
+        apply_ranking(rankings, order)
+        yield entry, order, rankings
@@ -0,0 +1,118 @@
+import random
+
+
+class FenwickSampler:
+    """
+    Weighted sampler over a fixed number of slots backed by a Fenwick tree.
+
+    Setting a weight and drawing a weighted random slot are both O(log n),
+    so weights can change after every guess without rebuilding anything.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.weights = [0.0] * size
+        self.tree = [0.0] * (size + 1)
+        self._top_bit = 1 << max(0, size.bit_length() - 1) if size else 0
+
+    def set(self, index, weight):
+        """Set the weight of a slot."""
+        delta = weight - self.weights[index]
+        if delta == 0:
+            return
+        self.weights[index] = weight
+        i = index + 1
+        while i <= self.size:
+            self.tree[i] += delta
+            i += i & -i
+
+    def total(self):
+        """Return the sum of all weights."""
+        result = 0.0
+        i = self.size
+        while i > 0:
+            result += self.tree[i]
+            i -= i & -i
+        return result
+
+    def find(self, target):
+        """Return the slot whose cumulative weight range contains target."""
+        position = 0
+        step = self._top_bit
+        while step:
+            nxt = position + step
+            if nxt <= self.size and self.tree[nxt] <= target:
+                position = nxt
+                target -= self.tree[nxt]
+            step >>= 1
+        return min(position, self.size - 1)
+
+    def sample(self, rng=random):
+        """Draw a slot with probability proportional to its weight; None if all are zero."""
+        total = self.total()
+        if total <= 0:
+            return None
+        index = self.find(rng.random() * total)
+        # Guard against float drift landing on a zero-weight slot
+        while self.weights[index] <= 0 and index > 0:
+            index -= 1
+        return index if self.weights[index] > 0 else None
+
+
+class AdaptiveScheduler:
+    """
+    Spaced-repetition song order for the guessing game.
+
+    Each song's weight comes from its own guess statistics: songs the player
+    often gets wrong are drawn more often, and every consecutive correct
+    guess ("streak") halves the weight so mastered songs come up less and
+    less. Only the guessed song's weight changes after a guess, so updates
+    are O(log n) regardless of catalog size.
+    """
+
+    MIN_WEIGHT = 0.02  # Even mastered songs keep a small chance of showing up
+    MAX_STREAK = 6  # Spacing stops growing after this many correct guesses in a row
+
+    def __init__(self, songs, guess_stats, rng=random):
+        self.songs = list(songs)
+        self.index = {song: i for i, song in enumerate(self.songs)}
+        self.sampler = FenwickSampler(len(self.songs))
+        self.rng = rng
+        self.drawn = set()  # Indexes already used in the current game
+
+        for song in self.songs:
+            self.sampler.set(self.index[song], self.weight(guess_stats.get(song)))
+
+    @classmethod
+    def weight(cls, stats):
+        """Sampling weight for one song's statistics."""
+        if not stats or stats.get("total_guesses", 0) == 0:
+            return 1.0  # Never guessed: treat as maximally uncertain
+
+        # Laplace-smoothed miss rate in (0, 1)
+        miss_rate = 1 - (stats["correct_guesses"] + 1) / (stats["total_guesses"] + 2)
+        streak = min(stats.get("streak", 0), cls.MAX_STREAK)
+        return max(cls.MIN_WEIGHT, (0.1 + miss_rate) / (2 ** streak))
+
+    def update(self, song, stats):
+        """Refresh one song's weight after its statistics changed."""
+        if song not in self.index:
+            return
+        if self.index[song] in self.drawn:
+            return  # Stays excluded until the current game ends; restored by reset_game()
+        self.sampler.set(self.index[song], self.weight(stats))
+
+    def next_song(self):
+        """Draw the next song for the current game (without repeats); None when exhausted."""
+        index = self.sampler.sample(self.rng)
+        if index is None:
+            return None
+        self.drawn.add(index)
+        self.sampler.set(index, 0.0)
+        return self.songs[index]
+
+    def reset_game(self, guess_stats):
+        """Put every song drawn in the last game back into the pool with fresh weights."""
+        for index in self.drawn:
+            self.sampler.set(index, self.weight(guess_stats.get(self.songs[index])))
+        self.drawn.clear()
@@ -0,0 +1,139 @@
+import math
+
+from ratings import DEFAULT_RATING
+
+SEED_SPREAD = 500.0  # Rating gap between the first and last song of a sorted order
+SEED_UNCERTAINTY = 50.0  # Medium uncertainty: the order is known, the gaps are not
+
+
+class InsertionSorter:
+    """
+    Binary insertion sort driven by the user's answers, one question at a time.
+
+    Each song is inserted into the sorted list by binary search, so a full
+    order of n songs takes about n*log2(n) questions. The whole state is a
+    small dict (to_dict/from_dict), so sorting can stop after any answer and
+    resume in a later session.
+    """
+
+    def __init__(self, songs):
+        self.order = []  # Sorted so far, most preferred first
+        self.pending = list(songs)  # Still to be inserted
+        self.current = None  # Song being inserted
+        self.low = 0  # Binary search bounds within order
+        self.high = 0
+        self.answers = 0
+        self.questions = {}  # song -> questions it took part in
+        self._next_song()
+
+    def _next_song(self):
+        if self.current is None and not self.order and self.pending:
+            self.order.append(self.pending.pop(0))  # The first song needs no questions
+        self.current = self.pending.pop(0) if self.pending else None
+        self.low, self.high = 0, len(self.order)
+
+    def done(self):
+        return self.current is None
+
+    def question(self):
+        """Return (song being inserted, song to compare it with), or None when sorted."""
+        if self.done():
+            return None
+        return self.current, self.order[(self.low + self.high) // 2]
+
+    def answer(self, preferred):
+        """Record which song of the current question the user preferred."""
+        song, pivot = self.question()
+        middle = (self.low + self.high) // 2
+        if preferred == song:
+            self.high = middle
+        elif preferred == pivot:
+            self.low = middle + 1
+        else:
+            raise ValueError(f"{preferred!r} is not part of the current question")
+        self.answers += 1
+        for asked in (song, pivot):
+            self.questions[asked] = self.questions.get(asked, 0) + 1
+
+        if self.low == self.high:
+            self.order.insert(self.low, song)
+            self._next_song()
+
+    def questions_left(self):
+        """Upper bound on the questions still needed."""
+        if self.done():
+            return 0
+        left = math.ceil(math.log2(self.high - self.low + 1))
+        size = len(self.order) + 1
+        for _ in self.pending:
+            left += math.ceil(math.log2(size + 1))
+            size += 1
+        return left
+
+    def sync(self, songs):
+        """Follow changes to the song list: queue new songs and forget removed ones."""
+        songs = set(songs)
+        known = set(self.order) | set(self.pending) | {self.current}
+        if self.current is not None and self.current not in songs:
+            self.current = None
+        self.order = [song for song in self.order if song in songs]
+        self.pending = [song for song in self.pending if song in songs]
+        self.pending += sorted(songs - known)
+        if self.current is None:
+            self._next_song()
+        else:
+            # A removed song may have shifted the search range; restart this insertion
+            self.low, self.high = 0, len(self.order)
+
+    def to_dict(self):
+        return {"order": self.order, "pending": self.pending, "current": self.current,
+                "low": self.low, "high": self.high, "answers": self.answers, "questions": self.questions}
+
+    @classmethod
+    def from_dict(cls, data):
+        sorter = cls([])
+        sorter.order = data["order"]
+        sorter.pending = data["pending"]
+        sorter.current = data["current"]
+        sorter.low = data["low"]
+        sorter.high = data["high"]
+        sorter.answers = data.get("answers", 0)
+        sorter.questions = data.get("questions", {})
+        return sorter
+
+
+def seed_ratings(rankings, order, comparisons=None):
+    """
+    Give the songs of a sorted order (best first) that were never compared
+    ratings that fit the order, so adaptive comparisons start from it. Songs
+    that already have comparisons keep their ratings; new songs are spaced
+    evenly between their nearest compared neighbours in the order. Without
+    any compared song the order gets evenly spaced ratings centred on the
+    default rating. `comparisons` maps song -> questions it took part in.
+    Returns the seeded songs.
+    """
+    step = SEED_SPREAD / (len(order) - 1) if len(order) > 1 else 0.0
+    anchors = [index for index, song in enumerate(order) if rankings.get(song, {}).get("comparisons", 0) > 0]
+    seeded = []
+    later = iter(anchors)
+    above, below = None, next(later, None)  # Nearest compared songs before and after the current one
+    for index, song in enumerate(order):
+        if index == below:
+            above, below = index, next(later, None)
+            continue
+        if above is None and below is None:
+            rating = DEFAULT_RATING + SEED_SPREAD / 2 - index * step
+        elif below is None:
+            rating = rankings[order[above]]["rating"] - (index - above) * step
+        elif above is None:
+            rating = rankings[order[below]]["rating"] + (below - index) * step
+        else:
+            top, bottom = rankings[order[above]]["rating"], rankings[order[below]]["rating"]
+            rating = top + (bottom - top) * (index - above) / (below - above)
+        rankings[song] = {
+            "rating": rating,
+            "uncertainty": SEED_UNCERTAINTY,
+            "comparisons": (comparisons or {}).get(song, 0)
+        }
+        seeded.append(song)
+    return seeded
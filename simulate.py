@@ -0,0 +1,167 @@
+"""
+Simulated listener for the Song Ranker.
+
+Gives every song a hidden true score, then lets a simulated user answer the
+ranker's own pair and ranking-round selections (choices follow a
+Plackett-Luce model on the true scores, so close songs are often ordered
+"wrongly"). Reports how many interactions and how many song listens each
+round type needs before the ranker's order reaches a target Kendall tau
+against the true order, optionally after seeding the ratings with a quick sort.
+
+Examples:
+    python simulate.py
+    python simulate.py --songs 60 --sizes 2 3 4 5 --target 0.8 --runs 5
+    python simulate.py --noise 1.0 --max-interactions 1000 --output simulate.json
+    python simulate.py --quick-sort --sizes 2 4
+"""
+import os
+import sys
+import json
+import math
+import random
+import shutil
+import argparse
+import tempfile
+
+from benchmark import generate_silent_catalog
+from headless import ScriptedInput, configure_headless
+
+
+def kendall_tau(order, true_scores):
+    """Kendall rank correlation between an order (best first) and true scores."""
+    concordant = discordant = 0
+    for i, song1 in enumerate(order):
+        for song2 in order[i + 1:]:
+            if true_scores[song1] > true_scores[song2]:
+                concordant += 1
+            elif true_scores[song1] < true_scores[song2]:
+                discordant += 1
+    pairs = concordant + discordant
+    return (concordant - discordant) / pairs if pairs else 1.0
+
+
+def simulated_order(songs, true_scores, noise, rng):
+    """A listener's preference order: Gumbel noise on the true scores samples Plackett-Luce."""
+    return sorted(songs, key=lambda song: true_scores[song] - noise * math.log(-math.log(rng.random())),
+                  reverse=True)
+
+
+def simulate(app, size, true_scores, target, max_interactions, noise, rng, quick_sort=False):
+    """Run one session; returns (interactions, listens) to reach the target (None if never) and the final tau."""
+    interaction = listens = 0
+    if quick_sort:
+        # The seeded order only reaches the ratings once the sort is complete
+        app.start_quick_sort()
+        while app.sorter is not None and interaction < max_interactions:
+            app.answer_quick_sort(simulated_order(app.sorter.question(), true_scores, noise, rng)[0])
+            interaction += 1
+            listens += 2
+        tau = kendall_tau([song for song, _ in app.leaderboard.items()], true_scores)
+        if tau >= target:
+            return (interaction, listens), tau
+
+    if size == 2:
+        app.run_comparison()
+    while interaction < max_interactions:
+        interaction += 1
+        if size == 2:
+            # Same flow as a vote in the UI, including the pair precomputed meanwhile
+            songs = [app.current_song1, app.current_song2]
+            candidates = app.collect_next_pair()
+            rating_change = app.update_ranking(*simulated_order(songs, true_scores, noise, rng))
+            app.run_comparison(app.reuse_next_pair(candidates, rating_change))
+        else:
+            app.run_ranking_round()
+            songs = app.ranking_songs
+            app.update_ranking_round(simulated_order(songs, true_scores, noise, rng))
+        listens += len(songs)
+
+        tau = kendall_tau([song for song, _ in app.leaderboard.items()], true_scores)
+        if tau >= target:
+            app.collect_next_pair()
+            return (interaction, listens), tau
+
+    app.collect_next_pair()
+    return None, tau
+
+
+def run_simulation(songs=40, sizes=(2, 3, 4, 5), target=0.8, max_interactions=600, noise=0.5, runs=3, seed=0,
+                   quick_sort=False):
+    """Simulate every round size `runs` times; returns the report dict."""
+    configure_headless()
+    original_cwd = os.getcwd()
+    report = {"songs": songs, "target_tau": target, "noise": noise, "runs": runs, "quick_sort": quick_sort,
+              "sizes": {}}
+
+    from main import SongRanker
+
+    for size in sizes:
+        results = []
+        for run in range(runs):
+            scratch = tempfile.mkdtemp(prefix="esc_sim_")
+            try:
+                os.chdir(scratch)
+                generate_silent_catalog("recordings", songs)
+                rng = random.Random(seed * 1000 + run)
+                random.seed(seed * 1000 + run)  # The ranker's own choices
+                app = SongRanker(input_source=ScriptedInput([]), headless=True)
+                app.ensure_data_loaded()
+                app.ranking_size = size
+                true_scores = {song: rng.gauss(0, 1) for song in app.songs}
+                reached, tau = simulate(app, size, true_scores, target, max_interactions, noise, rng, quick_sort)
+                results.append({"interactions": reached[0] if reached else None,
+                                "listens": reached[1] if reached else None,
+                                "final_tau": tau})
+            finally:
+                os.chdir(original_cwd)
+                shutil.rmtree(scratch, ignore_errors=True)
+
+        finished = [r for r in results if r["interactions"] is not None]
+        report["sizes"][size] = {
+            "runs": results,
+            "reached": len(finished),
+            "mean_interactions": sum(r["interactions"] for r in finished) / len(finished) if finished else None,
+            "mean_listens": sum(r["listens"] for r in finished) / len(finished) if finished else None
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare pairwise and ranking rounds on a simulated listener")
+    parser.add_argument("--songs", type=int, default=40)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[2, 3, 4, 5],
+                        help="Songs per interaction; 2 is the pairwise comparison")
+    parser.add_argument("--target", type=float, default=0.8, help="Kendall tau to reach against the true order")
+    parser.add_argument("--max-interactions", type=int, default=600)
+    parser.add_argument("--noise", type=float, default=0.5, help="How inconsistent the listener is")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--quick-sort", action="store_true", help="Seed the ratings with a quick sort first")
+    parser.add_argument("--output", help="Write the full report to this JSON file")
+    args = parser.parse_args()
+
+    if any(size < 2 or size > 5 for size in args.sizes):
+        parser.error("--sizes must be between 2 and 5")
+
+    report = run_simulation(args.songs, args.sizes, args.target, args.max_interactions, args.noise,
+                            args.runs, args.seed, args.quick_sort)
+
+    print(f"{report['songs']} songs, target tau {report['target_tau']}, noise {report['noise']}, "
+          f"{report['runs']} runs each" + (", seeded by quick sort" if args.quick_sort else ""))
+    for size, result in report["sizes"].items():
+        label = "pairs" if size == 2 else f"rank {size}"
+        if result["reached"]:
+            print(f"{label:>7}: {result['mean_interactions']:.0f} interactions, {result['mean_listens']:.0f} listens "
+                  f"({result['reached']}/{report['runs']} reached the target)")
+        else:
+            final = sum(r["final_tau"] for r in result["runs"]) / len(result["runs"])
+            print(f"{label:>7}: target not reached in {args.max_interactions} interactions (tau {final:.2f})")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=4)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,31 +1,65 @@
 import os
 import json
-import random
+import math
+import time
+import uuid
+import threading
 import pygame
-from log_data import send_log
+from time import perf_counter
+from headless import configure_headless, create_input_source, headless_requested
+from instrumentation import PROFILER, DUMP_PATH, mark_first_frame, timed
+from autocomplete import build_country_trie
+from country_matcher import CountryMatcher, COUNTRY_ALIASES, MATCH_MODES
+from guess_log import (SNAPSHOT_OFFSET, GuessLog, GuessViews, new_game_stats, new_song_stats, upgrade_game_stats,
+                       write_snapshot)
+from latency import speed_points
+from log_data import send_log, get_git_user_info
+from scheduler import AdaptiveScheduler
 
 
 class SongGuessingGame:
-    def __init__(self):
+    def __init__(self, input_source=None, headless=False):
         # Game directories and files
         self.recordings_dir = "recordings"
         self.guess_stats_file = "song_guess_stats.json"
         self.game_stats_file = "game_stats.json"
+        self.irt_model_file = "irt_model.json"
+        self.guess_log_file = "guess_events.jsonl"
+        self.latency_file = "answer_times.json"
+
+        # Every guess is appended to an event log; the stats below are views derived from it
+        self.guess_log = GuessLog(self.guess_log_file)
+        self.views = None
+        self.log_offset = 0  # Byte offset of the log covered by the in-memory views
+        self.events_since_snapshot = 0
+        self.snapshot_interval = 50  # Rewrite the JSON snapshots after this many events
 
         # Game data
         self.songs = []
         self.guess_stats = {}  # Per-song guess statistics
-        self.game_stats = {  # Overall game statistics
-            "total_games": 0,
-            "total_points": 0,
-            "avg_score": 0.0,
-        }
+        self.game_stats = new_game_stats()  # Overall game statistics
+
+        # Difficulty model: per-song difficulty and per-player ability (built on the loader thread)
+        self.player_name = os.environ.get("ESC_PLAYER", "")
+        self.irt = None
 
         # Game state variables
         self.current_screen = "main_menu"  # main_menu, game, statistics
         self.current_song = None
         self.current_song_index = 0
-        self.songs_for_current_game = []
+        self.songs_for_current_game = []  # Songs drawn so far in the current game
+        self.game_length = 0
+        self.max_game_length = int(os.environ.get("ESC_GAME_LENGTH", "20"))  # Songs per game (0 = whole collection)
+        self.scheduler = None  # Spaced-repetition song order, built once stats are loaded
+        self.matcher = CountryMatcher()  # Alias index for checking guesses
+        self.match_mode = "fuzzy"  # strict, exact or fuzzy (see country_matcher)
+        self.timed_mode = False  # Timed rounds score correct answers by how fast they come
+        self.last_points = 0  # Points awarded for the last guess
+        self.last_answer_time = None  # Seconds from song start to the last submitted guess
+        self.country_trie = build_country_trie([], COUNTRY_ALIASES)  # Autocomplete over catalog countries
+        self.suggestions = []  # (label, value) pairs for the current input
+        self.suggestion_index = -1  # Highlighted suggestion, -1 for none
+        self.suggestion_rects = []  # Clickable dropdown rows from the last render
         self.current_game_score = 0
         self.current_game_guesses = 0
         self.user_input = ""
@@ -35,10 +69,19 @@ class SongGuessingGame:
         self.game_in_progress = False
         self.position_offset = 0.0  # Track position for skip/rewind
         self.warning_message = None  # Added for input validation warning
+        self.session_id = None  # Identifies the current game in the guess log
+        self.song_started_at = None  # perf_counter() when the current song started playing
+        self.stats_view = "raw"  # raw or adjusted (difficulty-adjusted) statistics
+
+        # Input comes from pygame, a recorder or a scripted session replay
+        self.input = input_source or create_input_source()
+        self.frame_rate = 60  # 0 runs uncapped, e.g. for benchmarks
 
-        # Initialize pygame
-        pygame.init()
-        pygame.mixer.init()
+        # Initialize only the pygame subsystems the UI needs; audio starts with the first song
+        if headless or headless_requested():
+            configure_headless()
+        pygame.display.init()
+        pygame.font.init()
 
         # Set up the display
         self.screen_width = 800
@@ -64,10 +107,35 @@ class SongGuessingGame:
         self.CORRECT_BG = (200, 255, 200)  # Pastel green
         self.INCORRECT_BG = (255, 200, 200)  # Pastel red
 
-        # Load data
-        self.load_songs()
-        self.load_guess_stats()
-        self.load_game_stats()
+        # Load data on a background thread so the main menu renders immediately
+        self._load_error = None
+        self._loader = threading.Thread(target=self.load_data, daemon=True)
+        self._loader.start()
+
+    def load_data(self):
+        """Load songs and statistics (runs on the loader thread)."""
+        # noinspection PyBroadException
+        try:
+            self.load_songs()
+            self.load_guess_stats()
+            self.load_game_stats()
+            self.load_guess_log()
+            self.scheduler = AdaptiveScheduler(self.songs, self.guess_stats)
+            self.load_irt_model()
+        except Exception as e:
+            self._load_error = e
+
+    def ensure_data_loaded(self):
+        """Block until the background load has finished; re-raises any load error."""
+        self._loader.join()
+        if self._load_error is not None:
+            error, self._load_error = self._load_error, None
+            raise error
+
+    def ensure_audio(self):
+        """Start the mixer the first time a song is played."""
+        if not pygame.mixer.get_init():
+            pygame.mixer.init()
 
     def format_name_capitalization(self, name):
         """
@@ -108,20 +176,24 @@ class SongGuessingGame:
             print(f"Directory '{self.recordings_dir}' not found.")
             os.makedirs(self.recordings_dir)
 
+        # Make sure every country in the catalog is known to the matcher and autocomplete
+        countries = sorted({self.parse_song_info(song)[0] for song in self.songs} - {""})
+        self.matcher = CountryMatcher(countries)
+        self.country_trie = build_country_trie(countries, COUNTRY_ALIASES, self.format_name_capitalization)
+
     def load_guess_stats(self):
         """Load song guessing statistics from file."""
         if os.path.exists(self.guess_stats_file):
             with open(self.guess_stats_file, 'r') as f:
                 self.guess_stats = json.load(f)
 
-        # Initialize stats for new songs
+        self.initialize_song_stats()
+
+    def initialize_song_stats(self):
+        """Add empty stats for songs that have never been guessed."""
         for song in self.songs:
             if song not in self.guess_stats:
-                self.guess_stats[song] = {
-                    "correct_guesses": 0,
-                    "total_guesses": 0,
-                    "correct_rate": 0.0
-                }
+                self.guess_stats[song] = new_song_stats()
 
     def load_game_stats(self):
         """Load game statistics from file."""
@@ -129,49 +201,136 @@ class SongGuessingGame:
             with open(self.game_stats_file, 'r') as f:
                 self.game_stats = json.load(f)
 
+    def load_guess_log(self):
+        """
+        Bring the stats snapshots up to date with the guess event log.
+
+        The JSON stats files are snapshots that each record how far into the
+        log they reach ("log_offset"); only newer events are replayed. If any
+        snapshot is missing, or the offsets disagree because the app stopped
+        between writing them, the views are rebuilt from the whole log. A
+        missing log is started from the current totals.
+        """
+        offsets = {self.game_stats.pop(SNAPSHOT_OFFSET, None), self.guess_stats.pop(SNAPSHOT_OFFSET, None)}
+        latency = None
+        if os.path.exists(self.latency_file):
+            with open(self.latency_file, 'r') as f:
+                latency = json.load(f)
+            offsets.add(latency.pop(SNAPSHOT_OFFSET, None))
+        offset = offsets.pop() if len(offsets) == 1 else None
+
+        if not self.guess_log.exists():
+            # Start the log with the totals gathered before it existed
+            upgrade_game_stats(self.game_stats)
+            self.log_offset = self.guess_log.append({
+                "type": "baseline",
+                "ts": time.time(),
+                "guess_stats": {song: stats for song, stats in self.guess_stats.items()
+                                if stats["total_guesses"] > 0},
+                "game_stats": dict(self.game_stats)
+            })
+            self.views = GuessViews(self.guess_stats, self.game_stats)
+            self.save_views()
+            return
+
+        # Snapshots without per-mode totals may have mixed timed and untimed points, so they are rebuilt too
+        stale = (offset is None or offset > self.guess_log.size() or latency is None or
+                 not os.path.exists(self.guess_stats_file) or "untimed_games" not in self.game_stats)
+        if stale:
+            self.views, self.log_offset = GuessViews.rebuild(self.guess_log)
+            self.guess_stats = self.views.guess_stats
+            self.game_stats = self.views.game_stats
+            self.initialize_song_stats()
+        else:
+            song_latency, player_latency = GuessViews.latency_from_dict(latency)
+            self.views = GuessViews(self.guess_stats, self.game_stats, song_latency, player_latency)
+            self.log_offset = offset
+            for event, self.log_offset in self.guess_log.read(offset):
+                self.views.apply(event)
+
+    def load_irt_model(self):
+        """Load the difficulty model, or fit it from the full guess log if none was saved."""
+        from irt import RaschModel  # NumPy is only needed once the loader thread gets here
+
+        if not self.player_name:
+            username = get_git_user_info()["username"]
+            self.player_name = username if username != "Unknown" else "player"
+
+        self.irt = RaschModel.load(self.irt_model_file)
+        if self.irt is None:
+            self.irt = RaschModel()
+            self.irt.fit(self.irt_observations())
+
+    def irt_observations(self):
+        """Yield (player, song, correct, total) rows from the guess log for model fitting."""
+        for event, _ in self.guess_log.read():
+            if event["type"] == "baseline":
+                # Totals from before the log existed belong to the local player
+                for song, stats in event["guess_stats"].items():
+                    yield self.player_name, song, stats["correct_guesses"], stats["total_guesses"]
+            elif event["type"] == "guess":
+                yield event.get("player", self.player_name), event["song"], int(event["correct"]), 1
+
+    def save_irt_model(self):
+        """Save the difficulty model to file."""
+        if self.irt is not None:
+            self.irt.save(self.irt_model_file)
+
+    def save_views(self):
+        """Snapshot the derived stats, each file tagged with the log offset it covers."""
+        self.save_guess_stats()
+        self.save_game_stats()
+        write_snapshot(self.latency_file, self.views.latency_to_dict(), self.log_offset)
+        self.events_since_snapshot = 0
+
+    def record_event(self, event):
+        """Append an event to the guess log and fold it into the in-memory views."""
+        event["ts"] = time.time()
+        event["session"] = self.session_id
+        event["player"] = self.player_name
+        self.log_offset = self.guess_log.append(event)
+        self.views.apply(event)
+
+        self.events_since_snapshot += 1
+        if self.events_since_snapshot >= self.snapshot_interval:
+            self.save_views()
+
+    @timed("save_guess_stats")
     def save_guess_stats(self):
         """Save song guessing statistics to file."""
-        with open(self.guess_stats_file, 'w') as f:
-            json.dump(self.guess_stats, f, indent=4)
+        write_snapshot(self.guess_stats_file, self.guess_stats, self.log_offset, indent=4)
 
+    @timed("save_game_stats")
     def save_game_stats(self):
         """Save game statistics to file."""
-        with open(self.game_stats_file, 'w') as f:
-            json.dump(self.game_stats, f, indent=4)
-
-    def update_guess_stats(self, song, correct):
-        """Update the guessing statistics for a song."""
-        if song not in self.guess_stats:
-            self.guess_stats[song] = {
-                "correct_guesses": 0,
-                "total_guesses": 0,
-                "correct_rate": 0.0
-            }
-
-        self.guess_stats[song]["total_guesses"] += 1
-        if correct:
-            self.guess_stats[song]["correct_guesses"] += 1
-
-        # Update correct rate
-        self.guess_stats[song]["correct_rate"] = (
-                                                         self.guess_stats[song]["correct_guesses"] /
-                                                         self.guess_stats[song]["total_guesses"]
-                                                 ) * 100.0
-
-        # Save the updated stats
-        self.save_guess_stats()
+        write_snapshot(self.game_stats_file, self.game_stats, self.log_offset, indent=4)
+
+    @timed("update_guess_stats")
+    def update_guess_stats(self, song, correct, raw_input="", matched=None, time_to_answer=None, points=0):
+        """Log a guess and update the statistics derived from it."""
+        self.record_event({
+            "type": "guess",
+            "song": song,
+            "input": raw_input,
+            "matched": matched,
+            "mode": self.match_mode,
+            "correct": bool(correct),
+            "time_to_answer": time_to_answer,
+            "timed": self.timed_mode,
+            "points": points
+        })
+        self.scheduler.update(song, self.guess_stats[song])
+        self.irt.update(self.player_name, song, correct)
 
     def update_game_stats(self):
-        """Update overall game statistics."""
-        self.game_stats["total_games"] += 1
-        self.game_stats["total_points"] += self.current_game_score
-        self.game_stats["avg_score"] = (
-                self.game_stats["total_points"] /
-                self.game_stats["total_games"]
-        )
-
-        # Save the updated stats
-        self.save_game_stats()
+        """Log the end of a game and snapshot the overall statistics."""
+        self.record_event({
+            "type": "game_end",
+            "score": self.current_game_score,
+            "guesses": self.current_game_guesses,
+            "timed": self.timed_mode
+        })
+        self.save_views()
 
     def parse_song_info(self, filename):
         """Parse song filename to extract country, artist, and song name."""
@@ -199,6 +358,7 @@ class SongGuessingGame:
 
         return country, artist, song_name
 
+    @timed("start_new_game")
     def start_new_game(self):
         """Start a new guessing game."""
         if not self.songs:
@@ -206,20 +366,24 @@ class SongGuessingGame:
             return
 
         # Reset game state
+        self.session_id = uuid.uuid4().hex
         self.current_game_score = 0
         self.current_game_guesses = 0
         self.current_song_index = 0
         self.warning_message = None  # Clear any warning messages
 
-        # Shuffle songs for this game
-        self.songs_for_current_game = self.songs.copy()
-        random.shuffle(self.songs_for_current_game)
+        # Songs are drawn one at a time, favouring the ones the player gets wrong
+        self.scheduler.reset_game(self.guess_stats)
+        # A game draws only part of the collection, so low-weight (mastered) songs can sit a game out
+        self.game_length = min(len(self.songs), self.max_game_length or len(self.songs))
+        self.songs_for_current_game = [self.scheduler.next_song()]
 
         # Start with the first song
         self.current_song = self.songs_for_current_game[0]
         self.guess_result = None
         self.show_answer = False
         self.user_input = ""
+        self.suggestions = []
         self.game_in_progress = True
         self.position_offset = 0.0
 
@@ -229,12 +393,15 @@ class SongGuessingGame:
         # Change screen to game
         self.current_screen = "game"
 
+    @timed("play_current_song")
     def play_current_song(self):
         """Play the current song."""
         if self.current_song:
             song_path = os.path.join(self.recordings_dir, self.current_song)
+            self.ensure_audio()
             pygame.mixer.music.load(song_path)
             pygame.mixer.music.play()
+            self.song_started_at = perf_counter()
 
     def next_song(self):
         """Move to the next song in the game."""
@@ -243,15 +410,18 @@ class SongGuessingGame:
         self.warning_message = None  # Clear any warning messages
 
         # Check if we've gone through all songs
-        if self.current_song_index >= len(self.songs_for_current_game):
+        next_song = self.scheduler.next_song() if self.current_song_index < self.game_length else None
+        if next_song is None:
             self.end_game()
             return
 
         # Set the next song
-        self.current_song = self.songs_for_current_game[self.current_song_index]
+        self.songs_for_current_game.append(next_song)
+        self.current_song = next_song
         self.guess_result = None
         self.show_answer = False
         self.user_input = ""
+        self.suggestions = []
         self.position_offset = 0.0
 
         # Play the song
@@ -261,15 +431,18 @@ class SongGuessingGame:
         """End the current game and update statistics."""
         if self.game_in_progress and self.current_game_guesses > 0:
             self.update_game_stats()
+            self.save_irt_model()
 
         # Reset game state
         self.game_in_progress = False
         self.current_song = None
-        pygame.mixer.music.stop()
+        if pygame.mixer.get_init():
+            pygame.mixer.music.stop()
 
         # Return to main menu
         self.current_screen = "main_menu"
 
+    @timed("check_guess")
     def check_guess(self):
         """Check if the user's guess is correct."""
         if not self.current_song:
@@ -277,25 +450,35 @@ class SongGuessingGame:
 
         country, _, _ = self.parse_song_info(self.current_song)
 
-        # Check if input is at least 3 characters
-        if len(self.user_input.strip()) < 3:
+        # Check if input is at least 2 characters (ISO codes are the shortest accepted answers)
+        if len(self.user_input.strip()) < 2:
             # Set a warning message but don't count this attempt
-            self.warning_message = "Input must be at least 3 characters"
+            self.warning_message = "Input must be at least 2 characters"
             return
         else:
             self.warning_message = None  # Clear any warning
 
-        # Check if guess is correct (as a substring, case-insensitive)
-        user_input_lower = self.user_input.strip().lower()
-        country_lower = country.lower()
-        is_correct = user_input_lower in country_lower
+        # Check the guess against the country's names, native names and codes
+        time_to_answer = perf_counter() - self.song_started_at if self.song_started_at is not None else None
+        matched = self.matcher.lookup(self.user_input, self.match_mode)  # One lookup, even for a fuzzy match
+        is_correct = matched == self.matcher.canonical_country(country)
+
+        # Timed rounds reward fast answers; untimed rounds give a point per correct guess
+        if not is_correct:
+            self.last_points = 0
+        elif self.timed_mode:
+            self.last_points = speed_points(time_to_answer)
+        else:
+            self.last_points = 1
 
         # Update stats
-        self.update_guess_stats(self.current_song, is_correct)
+        self.update_guess_stats(self.current_song, is_correct, self.user_input, matched, time_to_answer,
+                                self.last_points)
         self.current_game_guesses += 1
+        self.last_answer_time = time_to_answer
 
         if is_correct:
-            self.current_game_score += 1
+            self.current_game_score += self.last_points
             self.guess_result = True
         else:
             self.guess_result = False
@@ -303,6 +486,26 @@ class SongGuessingGame:
         # Show the answer
         self.show_answer = True
 
+    def update_suggestions(self):
+        """Refresh the autocomplete dropdown for the current input (one trie walk)."""
+        self.suggestions = self.country_trie.suggest(self.user_input)
+        self.suggestion_index = -1
+
+    def move_suggestion(self, step):
+        """Move the dropdown highlight up or down, wrapping around."""
+        if self.suggestions:
+            self.suggestion_index = (self.suggestion_index + step) % len(self.suggestions)
+
+    def accept_suggestion(self, index=None):
+        """Fill the input with a suggestion (the highlighted or first one by default)."""
+        if not self.suggestions:
+            return
+        if index is None:
+            index = max(0, self.suggestion_index)
+        self.user_input = self.suggestions[index][1]
+        self.suggestions = []
+        self.suggestion_index = -1
+
     # UI Rendering Methods
     def render_text(self, text, font, color, x, y, align="left"):
         """Render text with alignment options."""
@@ -321,7 +524,7 @@ class SongGuessingGame:
 
     def create_button(self, text, font, x, y, width, height, inactive_color, active_color):
         """Create a clickable button."""
-        mouse_pos = pygame.mouse.get_pos()
+        mouse_pos = self.input.mouse_pos()
         button_rect = pygame.Rect(x, y, width, height)
 
         if button_rect.collidepoint(mouse_pos):
@@ -378,17 +581,30 @@ class SongGuessingGame:
                                          self.screen_width // 2 - 150, y_pos,
                                          300, button_height, self.GRAY, self.LIGHT_BLUE)
 
+        mode_button = self.create_button(f"Answer matching: {self.match_mode.capitalize()}", self.font_small,
+                                         self.screen_width // 2 - 250, 500,
+                                         240, 40, self.GRAY, self.LIGHT_BLUE)
+
+        timed_button = self.create_button(f"Timed rounds: {'On' if self.timed_mode else 'Off'}", self.font_small,
+                                          self.screen_width // 2 + 10, 500,
+                                          240, 40, self.GRAY, self.LIGHT_BLUE)
+
         # Display some game statistics if available
         if self.game_stats["total_games"] > 0:
             stats_y = 400
             self.render_text(f"Games Played: {self.game_stats['total_games']}",
                              self.font_small, self.BLACK,
                              self.screen_width // 2, stats_y, "center")
-            self.render_text(f"Average Score: {self.game_stats['avg_score']:.2f} points per game",
-                             self.font_small, self.BLACK,
+            self.render_text(self.average_score_text(), self.font_small, self.BLACK,
                              self.screen_width // 2, stats_y + 30, "center")
 
-        return start_button, stats_button, quit_button
+        return start_button, stats_button, quit_button, mode_button, timed_button
+
+    def average_score_text(self):
+        """Average score per game, separately for untimed and timed games (their points are not comparable)."""
+        averages = [f"{self.game_stats[f'avg_{mode}_score']:.2f} per {mode} game"
+                    for mode in ("untimed", "timed") if self.game_stats[f"{mode}_games"] > 0]
+        return "Average Score: " + ", ".join(averages)
 
     def render_game_screen(self):
         """Render the game screen."""
@@ -405,15 +621,21 @@ class SongGuessingGame:
                          self.screen_width // 2, 30, "center")
 
         # Score display
-        self.render_text(f"Score: {self.current_game_score} / {self.current_game_guesses}",
-                         self.font_medium, self.BLACK,
+        score_text = (f"Score: {self.current_game_score} pts" if self.timed_mode
+                      else f"Score: {self.current_game_score} / {self.current_game_guesses}")
+        self.render_text(score_text, self.font_medium, self.BLACK,
                          self.screen_width - 20, 20, "right")
 
         # Song progress
-        self.render_text(f"Song {self.current_song_index + 1} of {len(self.songs_for_current_game)}",
+        self.render_text(f"Song {self.current_song_index + 1} of {self.game_length}",
                          self.font_small, self.BLACK,
                          20, 20, "left")
 
+        # Running clock for timed rounds
+        if self.timed_mode and self.current_song and self.song_started_at is not None:
+            elapsed = self.last_answer_time if self.show_answer else perf_counter() - self.song_started_at
+            self.render_text(f"Time: {elapsed:.1f}s", self.font_small, self.BLACK, 20, 45, "left")
+
         # Song info
         if self.current_song:
             country, artist, song_name = self.parse_song_info(self.current_song)
@@ -431,16 +653,26 @@ class SongGuessingGame:
 
                 # Result message
                 if self.guess_result is True:
-                    self.render_text("Correct! +1 point", self.font_medium, self.GREEN,
+                    points = f"+{self.last_points} point{'s' if self.last_points != 1 else ''}"
+                    if self.timed_mode and self.last_answer_time is not None:
+                        points += f" ({self.last_answer_time:.2f}s)"
+                    self.render_text(f"Correct! {points}", self.font_medium, self.GREEN,
                                      self.screen_width // 2, 190, "center")
                 else:
                     self.render_text(f"Incorrect! The correct answer was: {country}",
                                      self.font_medium, self.RED,
                                      self.screen_width // 2, 190, "center")
 
+                # How quickly this song is usually answered
+                sketch = self.views.song_latency.get(self.current_song)
+                if sketch and sketch.count:
+                    self.render_text(f"Answer time for this song: median {sketch.percentile(0.5):.1f}s, "
+                                     f"90th percentile {sketch.percentile(0.9):.1f}s",
+                                     self.font_small, self.BLACK, self.screen_width // 2, 240, "center")
+
                 # Next song button
                 next_button = self.create_button(
-                    "Next Song" if self.current_song_index < len(self.songs_for_current_game) - 1 else "End Game",
+                    "Next Song" if self.current_song_index < self.game_length - 1 else "End Game",
                     self.font_medium,
                     self.screen_width // 2 - 100, 340,
                     200, 50, self.GRAY, self.LIGHT_BLUE
@@ -467,6 +699,16 @@ class SongGuessingGame:
                                                    200, 50, self.GRAY, self.LIGHT_BLUE)
                 next_button = None
 
+                # Autocomplete dropdown, drawn last so it sits on top of the submit button
+                self.suggestion_rects = []
+                for i, (label, _) in enumerate(self.suggestions):
+                    row_rect = pygame.Rect(input_box.x, input_box.bottom + i * 30, input_box.width, 30)
+                    pygame.draw.rect(self.screen, self.LIGHT_BLUE if i == self.suggestion_index else self.WHITE,
+                                     row_rect)
+                    pygame.draw.rect(self.screen, self.DARK_GRAY, row_rect, 1)
+                    self.render_text(label, self.font_small, self.BLACK, row_rect.x + 5, row_rect.y + 7)
+                    self.suggestion_rects.append(row_rect)
+
             # Playback controls guide
             controls_y = 400
             self.render_text("Playback Controls:", self.font_small, self.BLACK,
@@ -510,57 +752,66 @@ class SongGuessingGame:
 
             self.render_text(f"Total Games Played: {self.game_stats['total_games']}",
                              self.font_small, self.BLACK, 70, y_pos)
+
+            # The player's answer times, next to the game totals
+            sketch = self.views.player_latency.get(self.player_name) if self.views else None
+            if sketch and sketch.count:
+                self.render_text(f"Median answer time: {sketch.percentile(0.5):.1f}s",
+                                 self.font_small, self.BLACK, self.screen_width // 2 + 40, y_pos)
+                self.render_text(f"90th percentile: {sketch.percentile(0.9):.1f}s",
+                                 self.font_small, self.BLACK, self.screen_width // 2 + 40, y_pos + 30)
             y_pos += 30
 
-            self.render_text(f"Average Score: {self.game_stats['avg_score']:.2f} points per game",
-                             self.font_small, self.BLACK, 70, y_pos)
+            self.render_text(self.average_score_text(), self.font_small, self.BLACK, 70, y_pos)
             y_pos += 50
         else:
             self.render_text("No games played yet.", self.font_medium, self.BLACK, 50, y_pos)
             y_pos += 50
 
+        view_button = self.create_button("Raw view" if self.stats_view == "adjusted" else "Adjusted view",
+                                         self.font_small, self.screen_width - 170, 20,
+                                         150, 35, self.GRAY, self.LIGHT_BLUE)
+
         # Song stats
-        if self.guess_stats:
+        if self.stats_view == "adjusted":
+            self.render_adjusted_stats(y_pos)
+        elif self.guess_stats:
             self.render_text("Song Guessing Stats:", self.font_medium, self.BLACK, 50, y_pos)
             y_pos += 40
 
-            # Sort songs by correct rate
-            sorted_songs = sorted(
-                [(song, stats) for song, stats in self.guess_stats.items()
-                 if stats["total_guesses"] > 0],
-                key=lambda x: x[1]["correct_rate"],
-                reverse=True
-            )
+            # Best and worst songs come straight from the ordered correct-rate view
+            best_songs = self.views.accuracy.top(3)
+            worst_songs = self.views.accuracy.bottom(3)
 
-            if sorted_songs:
+            if best_songs:
                 # Best guessed songs
                 self.render_text("Top 3 Best-Guessed Songs:", self.font_small, self.GREEN, 70, y_pos)
                 y_pos += 30
 
-                for i, (song, stats) in enumerate(sorted_songs[:3]):
+                for i, (song, correct_rate) in enumerate(best_songs):
                     country, artist, _ = self.parse_song_info(song)
                     # Format artist with the capitalization rules
                     formatted_artist = self.format_name_capitalization(artist)
 
                     self.render_text(
-                        f"{i + 1}. {formatted_artist} ({country}): {stats['correct_rate']:.1f}% correct",
+                        f"{i + 1}. {formatted_artist} ({country}): {correct_rate:.1f}% correct",
                         self.font_small, self.BLACK, 90, y_pos
                     )
                     y_pos += 25
 
                 y_pos += 20
 
-                # Worst guessed songs
+                # Worst guessed songs, hardest first
                 self.render_text("Top 3 Most Challenging Songs:", self.font_small, self.RED, 70, y_pos)
                 y_pos += 30
 
-                for i, (song, stats) in enumerate(sorted_songs[-3:]):
+                for i, (song, correct_rate) in enumerate(worst_songs):
                     country, artist, _ = self.parse_song_info(song)
                     # Format artist with the capitalization rules
                     formatted_artist = self.format_name_capitalization(artist)
 
                     self.render_text(
-                        f"{i + 1}. {formatted_artist} ({country}): {stats['correct_rate']:.1f}% correct",
+                        f"{i + 1}. {formatted_artist} ({country}): {correct_rate:.1f}% correct",
                         self.font_small, self.BLACK, 90, y_pos
                     )
                     y_pos += 25
@@ -576,11 +827,54 @@ class SongGuessingGame:
                                          self.screen_width // 2 - 150, 500,
                                          300, 50, self.GRAY, self.LIGHT_BLUE)
 
-        return back_button
+        return back_button, view_button
+
+    def render_adjusted_stats(self, y_pos):
+        """Render difficulty-adjusted results from the item-response model."""
+        self.render_text("Difficulty-Adjusted Stats:", self.font_medium, self.BLACK, 50, y_pos)
+        y_pos += 40
+
+        guessed = [(song, stats) for song, stats in self.guess_stats.items() if stats["total_guesses"] > 0]
+        if self.irt is None or not guessed:
+            self.render_text("No song guessing data available yet.", self.font_small, self.BLACK, 70, y_pos)
+            return
+
+        # Player skill, and how actual results compare with what the model expects
+        ability = self.irt.get_ability(self.player_name)
+        average_chance = 1 / (1 + math.exp(-ability))
+        total = sum(stats["total_guesses"] for _, stats in guessed)
+        expected = sum(stats["total_guesses"] * self.irt.probability(self.player_name, song)
+                       for song, stats in guessed)
+        actual = sum(stats["correct_guesses"] for _, stats in guessed)
+
+        self.render_text(f"Your skill ({self.player_name}): {ability:+.2f} "
+                         f"({average_chance * 100:.0f}% expected on an average song)",
+                         self.font_small, self.BLACK, 70, y_pos)
+        y_pos += 25
+        self.render_text(f"Results vs expected: {(actual - expected) / total * 100:+.1f}% over {total} guesses",
+                         self.font_small, self.BLACK, 70, y_pos)
+        y_pos += 35
+
+        guessed_songs = {song for song, _ in guessed}
+        ranked = [(song, difficulty) for song, difficulty in self.irt.ranked_songs()
+                  if song in guessed_songs]
+
+        # Hardest and easiest songs side by side
+        columns = (("Hardest Songs (adjusted):", self.RED, ranked[:3], 70),
+                   ("Easiest Songs (adjusted):", self.GREEN, ranked[::-1][:3], self.screen_width // 2 + 20))
+        for title, color, songs, x in columns:
+            self.render_text(title, self.font_small, color, x, y_pos)
+            row_y = y_pos + 30
+            for i, (song, difficulty) in enumerate(songs):
+                country, _, _ = self.parse_song_info(song)
+                chance = self.irt.probability(self.player_name, song) * 100
+                self.render_text(f"{i + 1}. {country}: {difficulty:+.2f} ({chance:.0f}% expected)",
+                                 self.font_small, self.BLACK, x + 20, row_y)
+                row_y += 25
 
     def handle_playback_controls(self, event):
         """Handle playback controls for the song."""
-        if not pygame.mixer.music.get_busy() or not self.current_song:
+        if not pygame.mixer.get_init() or not pygame.mixer.music.get_busy() or not self.current_song:
             return
 
         song_path = os.path.join(self.recordings_dir, self.current_song)
@@ -602,16 +896,32 @@ class SongGuessingGame:
             pygame.mixer.music.play(start=new_pos)
             self.position_offset = new_pos
 
+    def render_timed(self, render):
+        """Draw the current screen with a render_* method, timing only the drawing for the profiler."""
+        start = perf_counter()
+        result = render()
+        if PROFILER.enabled:
+            PROFILER.record("render." + self.current_screen, perf_counter() - start)
+        return result
+
     def run(self):
         """Main game loop."""
         running = True
         clock = pygame.time.Clock()
 
         while running:
+            frame_start = perf_counter()
+            if self.current_screen != "main_menu":
+                # Every other screen reads the songs and statistics, so the loader must have finished
+                self.ensure_data_loaded()
+
             # Handle events
-            for event in pygame.event.get():
+            for event in self.input.get_events():
                 if event.type == pygame.QUIT:
                     running = False
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                    # Toggle the profiling overlay and timers
+                    PROFILER.toggle()
                 elif event.type == pygame.VIDEORESIZE:
                     # Update the screen size if window is resized
                     self.screen_width, self.screen_height = event.size
@@ -625,55 +935,86 @@ class SongGuessingGame:
                     # Handle text input for guessing
                     if self.current_screen == "game" and not self.show_answer:
                         if event.key == pygame.K_RETURN:
-                            # Submit guess
-                            if self.user_input.strip():
+                            if self.suggestion_index >= 0:
+                                # Take the highlighted suggestion; the next Enter submits
+                                self.accept_suggestion()
+                            elif self.user_input.strip():
+                                # Submit guess
+                                self.suggestions = []
                                 self.check_guess()
                         elif event.key == pygame.K_BACKSPACE:
                             self.user_input = self.user_input[:-1]
+                            self.update_suggestions()
+                        elif event.key == pygame.K_TAB:
+                            self.accept_suggestion()
+                        elif event.key == pygame.K_DOWN:
+                            self.move_suggestion(1)
+                        elif event.key == pygame.K_UP:
+                            self.move_suggestion(-1)
+                        elif event.key == pygame.K_ESCAPE:
+                            self.suggestions = []
+                            self.suggestion_index = -1
                         else:
                             # Add character to input (only if it's a letter or space)
                             if event.unicode.isalpha() or event.unicode.isspace():
                                 self.user_input += event.unicode
+                                self.update_suggestions()
                     # Handle Enter key to move to next song when showing answer
                     elif self.current_screen == "game" and self.show_answer and event.key == pygame.K_RETURN:
                         self.next_song()
-                        pygame.time.delay(200)  # Prevent double actions
+                        self.input.delay(200)  # Prevent double actions
 
             # Handle mouse clicks
-            mouse_clicked = pygame.mouse.get_pressed()[0]  # Left mouse button
-            mouse_pos = pygame.mouse.get_pos()
+            mouse_clicked = self.input.mouse_pressed()  # Left mouse button
+            mouse_pos = self.input.mouse_pos()
 
             # Render current screen and handle button clicks
             if self.current_screen == "main_menu":
-                buttons = self.render_main_menu()
+                buttons = self.render_timed(self.render_main_menu)
 
                 if mouse_clicked:
+                    self.ensure_data_loaded()
                     if buttons[0].collidepoint(mouse_pos):  # Start Game
                         self.start_new_game()
-                        pygame.time.delay(200)  # Prevent double-clicks
+                        self.input.delay(200)  # Prevent double-clicks
                     elif buttons[1].collidepoint(mouse_pos):  # Statistics
                         self.current_screen = "statistics"
-                        pygame.time.delay(200)
+                        self.input.delay(200)
                     elif buttons[2].collidepoint(mouse_pos):  # Quit
                         running = False
+                    elif buttons[3].collidepoint(mouse_pos):  # Cycle answer matching mode
+                        next_mode = (MATCH_MODES.index(self.match_mode) + 1) % len(MATCH_MODES)
+                        self.match_mode = MATCH_MODES[next_mode]
+                        self.input.delay(200)
+                    elif buttons[4].collidepoint(mouse_pos):  # Toggle timed rounds
+                        self.timed_mode = not self.timed_mode
+                        self.input.delay(200)
 
             elif self.current_screen == "game":
-                buttons = self.render_game_screen()
+                buttons = self.render_timed(self.render_game_screen)
                 back_button, next_button, submit_button, input_box = buttons
 
-                if mouse_clicked:
+                clicked_suggestion = None
+                if mouse_clicked and not self.show_answer:
+                    clicked_suggestion = next((i for i, rect in enumerate(self.suggestion_rects)
+                                               if rect.collidepoint(mouse_pos)), None)
+
+                if clicked_suggestion is not None:  # Pick an autocomplete suggestion
+                    self.accept_suggestion(clicked_suggestion)
+                    self.input.delay(200)
+                elif mouse_clicked:
                     if back_button.collidepoint(mouse_pos):  # Back to Menu
                         self.end_game()
-                        pygame.time.delay(200)
+                        self.input.delay(200)
 
                     if next_button and next_button.collidepoint(mouse_pos):  # Next Song / End Game
                         self.next_song()
-                        pygame.time.delay(200)
+                        self.input.delay(200)
 
                     if submit_button and submit_button.collidepoint(mouse_pos):  # Submit Guess
                         if self.user_input.strip():
                             self.check_guess()
-                            pygame.time.delay(200)
+                            self.input.delay(200)
 
                     if input_box and input_box.collidepoint(mouse_pos):  # Activate text input
                         self.input_active = True
@@ -681,21 +1022,35 @@ class SongGuessingGame:
                         self.input_active = False
 
             elif self.current_screen == "statistics":
-                back_button = self.render_statistics_screen()
+                back_button, view_button = self.render_timed(self.render_statistics_screen)
 
                 if mouse_clicked and back_button.collidepoint(mouse_pos):
                     self.current_screen = "main_menu"
-                    pygame.time.delay(200)
+                    self.input.delay(200)
+                elif mouse_clicked and view_button.collidepoint(mouse_pos):
+                    self.stats_view = "raw" if self.stats_view == "adjusted" else "adjusted"
+                    self.input.delay(200)
+
+            if PROFILER.enabled:
+                PROFILER.render_overlay(self.screen, self.font_small)
 
             # Update the display
             pygame.display.flip()
+            mark_first_frame()
 
-            # Cap the frame rate
-            clock.tick(60)
+            if PROFILER.enabled:
+                PROFILER.record("frame", perf_counter() - frame_start)
 
-        # Ensure stats are saved before exit
-        self.save_guess_stats()
-        self.save_game_stats()
+            # Cap the frame rate
+            clock.tick(self.frame_rate)
+
+        # Ensure stats are saved before exit (never overwrite them with a half-finished load)
+        self.ensure_data_loaded()
+        self.save_views()
+        self.save_irt_model()
+        self.guess_log.close()
+        PROFILER.dump(DUMP_PATH)
+        self.input.close()
 
         # Clean exit
         pygame.quit()
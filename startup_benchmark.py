@@ -0,0 +1,129 @@
+"""
+Reproducible time-to-first-frame benchmark for both applications.
+
+Each run launches a fresh headless interpreter in a scratch copy of the data
+files, renders the main menu once and exits. The reported time spans from
+process launch to the first display flip, so it covers interpreter start,
+imports, pygame initialization and the first render.
+
+Examples:
+    python startup_benchmark.py
+    python startup_benchmark.py --runs 20 --output startup.json
+    python startup_benchmark.py --baseline startup.json --tolerance 0.2
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+DATA_FILES = ["song_rankings.json", "listening_stats.json", "comparison_history.json",
+              "song_guess_stats.json", "game_stats.json"]
+
+APP_SNIPPETS = {
+    "ranker": "from main import SongRanker as App",
+    "guessing": "from song_guessing import SongGuessingGame as App",
+}
+
+CHILD_TEMPLATE = """
+import sys
+sys.path.insert(0, {repo!r})
+{import_line}
+from headless import ScriptedInput
+App(input_source=ScriptedInput([]), headless=True).run()
+"""
+
+
+def prepare_scratch(repo_dir):
+    """Copy recordings and data files into a scratch directory."""
+    scratch = tempfile.mkdtemp(prefix="esc_startup_")
+    recordings = os.path.join(repo_dir, "recordings")
+    if os.path.isdir(recordings):
+        shutil.copytree(recordings, os.path.join(scratch, "recordings"))
+    for file_name in DATA_FILES:
+        path = os.path.join(repo_dir, file_name)
+        if os.path.exists(path):
+            shutil.copy(path, scratch)
+    return scratch
+
+
+def measure_once(app, repo_dir, scratch):
+    """Launch one app process and return its time to first frame in milliseconds."""
+    code = CHILD_TEMPLATE.format(repo=repo_dir, import_line=APP_SNIPPETS[app])
+    env = dict(os.environ, ESC_HEADLESS="1", ESC_STARTUP_T0=repr(time.time()))
+    env.pop("ESC_TELEMETRY", None)
+    result = subprocess.run([sys.executable, "-c", code], cwd=scratch, env=env,
+                            capture_output=True, text=True, check=True)
+
+    for line in result.stdout.splitlines():
+        if line.startswith("first_frame_ms="):
+            return float(line.split("=", 1)[1])
+    raise RuntimeError(f"{app} did not report a first frame:\n{result.stdout}\n{result.stderr}")
+
+
+def run_startup_benchmark(runs=10, apps=("ranker", "guessing")):
+    """Return {app: {runs, median_ms, min_ms, max_ms, samples_ms}}."""
+    repo_dir = os.path.dirname(os.path.abspath(__file__))
+    report = {}
+    for app in apps:
+        scratch = prepare_scratch(repo_dir)
+        try:
+            measure_once(app, repo_dir, scratch)  # Warm the OS file cache
+            samples = [measure_once(app, repo_dir, scratch) for _ in range(runs)]
+        finally:
+            shutil.rmtree(scratch, ignore_errors=True)
+
+        report[app] = {
+            "runs": runs,
+            "median_ms": statistics.median(samples),
+            "min_ms": min(samples),
+            "max_ms": max(samples),
+            "samples_ms": samples
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time-to-first-frame benchmark")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--app", choices=["ranker", "guessing"], help="Only measure one application")
+    parser.add_argument("--output", help="Write the report to this JSON file")
+    parser.add_argument("--baseline", help="Compare medians against a previous report")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Allowed slowdown against the baseline as a fraction (default 0.2)")
+    args = parser.parse_args()
+
+    apps = (args.app,) if args.app else ("ranker", "guessing")
+    report = run_startup_benchmark(args.runs, apps)
+
+    for app, stats in report.items():
+        print(f"{app}: median {stats['median_ms']:.1f}ms "
+              f"(min {stats['min_ms']:.1f}ms, max {stats['max_ms']:.1f}ms, {stats['runs']} runs)")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=4)
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+
+        regressed = False
+        for app, stats in report.items():
+            if app not in baseline:
+                continue
+            limit = baseline[app]["median_ms"] * (1 + args.tolerance)
+            if stats["median_ms"] > limit:
+                print(f"REGRESSION: {app} median {stats['median_ms']:.1f}ms exceeds {limit:.1f}ms")
+                regressed = True
+        return 1 if regressed else 0
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+import math
+
+
+class SwissTournament:
+    """
+    Swiss-system rounds over a set of songs.
+
+    Every round pairs songs with equal or similar scores (a win is worth a
+    point, a bye too) without repeating a pairing from an earlier round, and
+    prefers pairs that have never been compared at all. About log2(n) rounds
+    are enough to separate the top of the field. Results are recorded one
+    match at a time, and the state is a small dict (to_dict/from_dict) so a
+    tournament can be paused and resumed.
+    """
+
+    SEARCH_BUDGET = 20000  # Matching steps before giving up on avoiding rematches
+
+    def __init__(self, songs, rounds=None):
+        self.songs = list(songs)
+        self.rounds = rounds or max(1, math.ceil(math.log2(max(2, len(self.songs)))))
+        self.scores = {song: 0.0 for song in self.songs}
+        self.byes = []  # Songs that sat out a round, in order
+        self.played = []  # Every [song1, song2] pairing so far
+        self.round = 0  # Number of the current round (0 before the first)
+        self.matches = []  # Pairs of the current round
+        self.next_match = 0  # Index of the next match to play in the current round
+
+    def round_complete(self):
+        return self.next_match >= len(self.matches)
+
+    def done(self):
+        return self.round >= self.rounds and self.round_complete()
+
+    def current_match(self):
+        """Return the next pair to play in the current round, or None once it is complete."""
+        return None if self.round_complete() else self.matches[self.next_match]
+
+    def record(self, winner, loser):
+        """Score the current match."""
+        if {winner, loser} != set(self.matches[self.next_match]):
+            raise ValueError(f"{winner!r} vs {loser!r} is not the current match")
+        self.scores[winner] += 1
+        self.next_match += 1
+
+    def standings(self):
+        """Songs by score, best first (ties keep the order songs were entered in, i.e. by seed)."""
+        return sorted(self.songs, key=lambda song: -self.scores[song])
+
+    def schedule_round(self, ratings=None, compared=None):
+        """
+        Pair every song for the next round and return the pairs.
+
+        `ratings` (song -> rating) breaks ties within a score group and
+        `compared(song1, song2)` tells how often two songs were compared
+        before, so never-compared pairs win ties.
+        """
+        ratings = ratings or {}
+        order = sorted(self.songs, key=lambda song: (-self.scores[song], -ratings.get(song, 0)))
+
+        # Odd field: the lowest-placed song without a bye sits this round out and gets its point
+        if len(order) % 2:
+            bye = next((song for song in reversed(order) if song not in self.byes), order[-1])
+            order.remove(bye)
+            self.byes.append(bye)
+            self.scores[bye] += 1
+
+        rematches = {frozenset(pair) for pair in self.played}
+        pairs = self._match(order, rematches, compared)
+        if pairs is None:
+            pairs = self._match(order, set(), compared)  # Every opponent already met: allow rematches
+
+        self.round += 1
+        self.matches = pairs
+        self.next_match = 0
+        self.played += [list(pair) for pair in pairs]
+        return pairs
+
+    def _match(self, order, forbidden, compared):
+        """
+        Pair songs top-down, each with the nearest available song in the
+        standings, backtracking when the remaining songs cannot all be paired.
+        Returns None if no pairing avoids `forbidden` within the search budget.
+        """
+        position = {song: index for index, song in enumerate(order)}
+        budget = self.SEARCH_BUDGET
+
+        def options(remaining):
+            first = remaining[0]
+            return first, iter(sorted(remaining[1:], key=lambda song: (
+                abs(self.scores[first] - self.scores[song]),
+                bool(compared and compared(first, song)),
+                position[song])))
+
+        # Depth-first search with an explicit stack, so large fields need no deep recursion
+        pairs = []
+        backtrack = []  # (remaining, first, candidates) before each chosen pair
+        remaining = list(order)
+        if not remaining:
+            return pairs
+        first, candidates = options(remaining)
+        while True:
+            for other in candidates:
+                if frozenset((first, other)) in forbidden:
+                    continue
+                budget -= 1
+                if budget < 0:
+                    return None
+                backtrack.append((remaining, first, candidates))
+                pairs.append((first, other))
+                remaining = [song for song in remaining if song != first and song != other]
+                if not remaining:
+                    return pairs
+                first, candidates = options(remaining)
+                break
+            else:
+                # No partner works for `first`: undo the previous pair and try its next candidate
+                if not backtrack:
+                    return None
+                remaining, first, candidates = backtrack.pop()
+                pairs.pop()
+
+    def to_dict(self):
+        return {"songs": self.songs, "rounds": self.rounds, "scores": self.scores, "byes": self.byes,
+                "played": self.played, "round": self.round, "matches": [list(pair) for pair in self.matches],
+                "next_match": self.next_match}
+
+    @classmethod
+    def from_dict(cls, data):
+        tournament = cls(data["songs"], data["rounds"])
+        tournament.scores = data["scores"]
+        tournament.byes = data["byes"]
+        tournament.played = data["played"]
+        tournament.round = data["round"]
+        tournament.matches = [tuple(pair) for pair in data["matches"]]
+        tournament.next_match = data["next_match"]
+        return tournament